@@ -31,6 +31,9 @@ function prepare_chapter3_data {
             | jq -r "select(.title == \"$name\") | .text" \
             > "${DATA_DIR}/jawiki-country.${name}.txt"
     done
+
+    # 記事ごとの抽出結果 (マニフェスト) とインデックスを作成する.
+    PYTHONPATH=src python -B -c 'import chapter3; chapter3.prepare_corpus()'
 }
 prepare_chapter3_data
 
@@ -3,13 +3,20 @@
 # https://nlp100.github.io/ja/ch01.html
 #
 
+import array
+import collections
 import doctest
+import io
 import random
 import re
 import typing
 import unittest
 
 
+# 単語 (英数字の並び) にマッチするパターン.
+WORD_PATTERN = re.compile(r'[0-9a-zA-Z]+')
+
+
 def to_words(
         text: str,
     ) -> typing.List[str]:
@@ -26,8 +33,7 @@ def to_words(
         words : typing.List[str]
             text に含まれる単語からなるリスト.
     """
-    pattern = re.compile(r'[0-9a-zA-Z]+')
-    return pattern.findall(text)
+    return WORD_PATTERN.findall(text)
 
 
 class ToWordsTestCase(unittest.TestCase):
@@ -50,6 +56,194 @@ class ToWordsTestCase(unittest.TestCase):
             to_words("It's a fine day!"))
 
 
+# 文字種.
+SCRIPT_KANJI = 'kanji'
+SCRIPT_HIRAGANA = 'hiragana'
+SCRIPT_KATAKANA = 'katakana'
+SCRIPT_LATIN = 'latin'
+SCRIPT_DIGIT = 'digit'
+
+
+# 文字種ごとの文字コードの範囲 (両端を含む).
+SCRIPT_RANGES = {
+    SCRIPT_KANJI: [
+        (0x3005, 0x3005),   # 々
+        (0x3007, 0x3007),   # 〇
+        (0x3400, 0x4DBF),   # CJK 統合漢字拡張 A
+        (0x4E00, 0x9FFF),   # CJK 統合漢字
+        (0xF900, 0xFAFF),   # CJK 互換漢字
+        (0x20000, 0x3FFFF), # CJK 統合漢字拡張 B 以降 (追加漢字面, 第三漢字面)
+    ],
+    SCRIPT_HIRAGANA: [
+        (0x3041, 0x3096),
+        (0x309D, 0x309F),
+    ],
+    SCRIPT_KATAKANA: [
+        (0x30A1, 0x30FA),
+        (0x30FC, 0x30FF),   # 長音符, 踊り字
+        (0x31F0, 0x31FF),   # 小書き片仮名
+        (0xFF66, 0xFF9F),   # 半角片仮名
+    ],
+    SCRIPT_LATIN: [
+        (0x0041, 0x005A),
+        (0x0061, 0x007A),
+        (0x00C0, 0x00D6),
+        (0x00D8, 0x00F6),
+        (0x00F8, 0x024F),   # ラテン文字拡張 A, B
+        (0xFF21, 0xFF3A),   # 全角英大文字
+        (0xFF41, 0xFF5A),   # 全角英小文字
+    ],
+    SCRIPT_DIGIT: [
+        (0x0030, 0x0039),
+        (0xFF10, 0xFF19),   # 全角数字
+    ],
+}
+
+
+def _script_character_class(
+        ranges: typing.List[typing.Tuple[int, int]],
+    ) -> str:
+    """
+        文字コードの範囲のリストから正規表現の文字クラスを作成する.
+
+        Arguments
+        ---------
+        ranges : typing.List[typing.Tuple[int, int]]
+            文字コードの範囲 (両端を含む) のリスト.
+
+        Returns
+        -------
+        str
+            文字クラス.
+
+        Examples
+        --------
+        >>> _script_character_class([(0x30, 0x39), (0x5F, 0x5F)])
+        '[0-9_]'
+    """
+    return '[{}]'.format(''.join(
+        re.escape(chr(first)) + ('-' + re.escape(chr(last)) if first < last else '')
+        for first, last in ranges))
+
+
+# 同じ文字種の文字の連続にマッチするパターン. 文字種ごとの名前付きグループを持つ.
+SCRIPT_TOKEN_PATTERN = re.compile('|'.join(
+    '(?P<{}>{}+)'.format(script, _script_character_class(ranges))
+    for script, ranges in SCRIPT_RANGES.items()))
+
+
+class ScriptToken(typing.NamedTuple):
+    """
+        iterate_script_tokens() が生成するトークン.
+    """
+
+    # トークンの文字列.
+    text: str
+
+    # 文字種 (SCRIPT_KANJI など).
+    script: str
+
+    # 元のテキストにおける開始位置.
+    start: int
+
+
+def iterate_script_tokens(
+        text: str,
+    ) -> typing.Iterator[ScriptToken]:
+    """
+        テキストを文字種 (漢字, 平仮名, 片仮名, ラテン文字, 数字) の境界で
+        分割する.
+
+        文字種の判定は SCRIPT_RANGES から作った正規表現の文字クラス (文字コード
+        の表) で行い, テキストを 1 回だけ走査する. どの文字種でもない文字
+        (記号, 空白など) は捨てる.
+
+        Arguments
+        ---------
+        text : str
+            分割するテキスト.
+
+        Returns
+        -------
+        typing.Iterator[ScriptToken]
+            トークンを出現順に生成するイテレータ.
+
+        Examples
+        --------
+        >>> for token in iterate_script_tokens('日本は1945年にGHQの占領下'):
+        ...     print(token.text, token.script, token.start)
+        日本 kanji 0
+        は hiragana 2
+        1945 digit 3
+        年 kanji 7
+        に hiragana 8
+        GHQ latin 9
+        の hiragana 12
+        占領下 kanji 13
+    """
+    for match in SCRIPT_TOKEN_PATTERN.finditer(text):
+        yield ScriptToken(match[0], match.lastgroup, match.start())
+
+
+def to_script_tokens(
+        text: str,
+    ) -> typing.List[str]:
+    """
+        テキストを文字種の境界で分割する.
+
+        iterate_script_tokens() と同じ分割を, ScriptToken を作らずに行う.
+
+        Arguments
+        ---------
+        text : str
+            分割するテキスト.
+
+        Returns
+        -------
+        typing.List[str]
+            トークンのリスト.
+
+        Examples
+        --------
+        >>> to_script_tokens('イギリスは、ヨーロッパの島国（面積２４万km²）。')
+        ['イギリス', 'は', 'ヨーロッパ', 'の', '島国', '面積', '２４', '万', 'km']
+    """
+    return [match[0] for match in SCRIPT_TOKEN_PATTERN.finditer(text)]
+
+
+class ScriptTokensTestCase(unittest.TestCase):
+    """
+        iterate_script_tokens(), to_script_tokens() のテストケース.
+    """
+
+    def test_ascii(self):
+        self.assertEqual(
+            ['It', 's', 'a', 'fine', 'day'],
+            to_script_tokens("It's a fine day!"))
+        self.assertEqual(['abc', '123', 'def'], to_script_tokens('abc123def'))
+        self.assertEqual([], to_script_tokens(''))
+
+    def test_japanese(self):
+        self.assertEqual(
+            [
+                ('々木', SCRIPT_KANJI),
+                ('ｶﾀｶﾅ', SCRIPT_KATAKANA),
+                ('Ｆｕｌｌ', SCRIPT_LATIN),
+                ('Café', SCRIPT_LATIN),
+                ('𠮷野', SCRIPT_KANJI),
+                ('ゝ', SCRIPT_HIRAGANA),
+            ],
+            [
+                (token.text, token.script)
+                for token in iterate_script_tokens('々木ｶﾀｶﾅＦｕｌｌ Café 𠮷野ゝ')
+            ])
+
+    def test_start(self):
+        text = '東京都（とうきょうと）は日本の首都。'
+        for token in iterate_script_tokens(text):
+            self.assertEqual(token.text, text[token.start:token.start + len(token.text)])
+
+
 def to_word_ngram(
         n: int,
         text: str,
@@ -192,6 +386,660 @@ class ToCharNgramTestCase(unittest.TestCase):
             to_char_ngram(3, "It's a fine day!"))
 
 
+class NgramSpans:
+    """
+        元のテキスト上の位置 (start, end) で表した N-gram の列.
+
+        N-gram ごとに文字列を作らず, 開始位置と終了位置を整数の配列で持つ.
+        N-gram の文字列は参照した時に作り, 単語以外の文字を除いて連結する
+        (to_word_ngram(), to_char_ngram() の要素と一致する).
+    """
+
+    def __init__(
+            self,
+            text: str,
+            starts: array.array,
+            ends: array.array,
+        ) -> None:
+        """
+            Arguments
+            ---------
+            text : str
+                元のテキスト.
+            starts : array.array
+                各 N-gram の開始位置の配列.
+            ends : array.array
+                各 N-gram の終了位置の配列.
+        """
+        self.text = text
+        self.starts = starts
+        self.ends = ends
+
+    def __len__(self) -> int:
+        return len(self.starts)
+
+    def span(
+            self,
+            index: int,
+        ) -> typing.Tuple[int, int]:
+        """
+            N-gram の位置を返す.
+
+            Arguments
+            ---------
+            index : int
+                N-gram の番号.
+
+            Returns
+            -------
+            typing.Tuple[int, int]
+                (開始位置, 終了位置).
+        """
+        return self.starts[index], self.ends[index]
+
+    def __getitem__(
+            self,
+            index: typing.Union[int, slice],
+        ) -> typing.Union[str, typing.List[str]]:
+        if isinstance(index, slice):
+            # リストと同じく, スライスは N-gram の文字列のリストを返す.
+            return list(map(self.__getitem__, range(len(self))[index]))
+        start, end = self.starts[index], self.ends[index]
+        return ''.join(WORD_PATTERN.findall(self.text, start, end))
+
+    def __iter__(self) -> typing.Iterator[str]:
+        return map(self.__getitem__, range(len(self)))
+
+    def encoded(
+            self,
+            encoding: str='utf-8',
+        ) -> typing.Tuple[memoryview, array.array, array.array]:
+        """
+            エンコードしたテキストと, その上の位置で表した N-gram を返す.
+
+            バイト単位の位置は, 直前の位置からの差分の部分文字列だけを
+            エンコードして求める (位置が昇順であれば各文字を 1 回だけ
+            エンコードする).
+
+            Arguments
+            ---------
+            encoding : str
+                エンコーディング. BOM を付けないものに限る.
+
+            Returns
+            -------
+            typing.Tuple[memoryview, array.array, array.array]
+                (エンコードしたテキストの memoryview, 開始位置の配列,
+                終了位置の配列). 位置はバイト単位.
+        """
+        data = self.text.encode(encoding)
+        if len(data) == len(self.text):
+            return memoryview(data), self.starts, self.ends
+
+        def byte_offsets(positions):
+            offsets = array.array('L')
+            previous, offset = 0, 0
+            for position in positions:
+                if position < previous:
+                    previous, offset = 0, 0
+                offset += len(self.text[previous:position].encode(encoding))
+                previous = position
+                offsets.append(offset)
+            return offsets
+
+        return memoryview(data), byte_offsets(self.starts), byte_offsets(self.ends)
+
+
+def to_word_ngram_spans(
+        n: int,
+        text: str,
+    ) -> NgramSpans:
+    """
+        テキストを単語 N-gram に分割し, 位置で表す.
+
+        Arguments
+        ---------
+        n : int
+            分割数.
+        text : str
+            分割するテキスト.
+
+        Returns
+        -------
+        NgramSpans
+            text の単語 N-gram.
+
+        Examples
+        --------
+        >>> spans = to_word_ngram_spans(2, "It's a fine day!")
+        >>> list(zip(spans.starts, spans.ends))
+        [(0, 4), (3, 6), (5, 11), (7, 15)]
+        >>> list(spans)
+        ['Its', 'sa', 'afine', 'fineday']
+    """
+    word_starts, word_ends = array.array('L'), array.array('L')
+    for match in WORD_PATTERN.finditer(text):
+        start, end = match.span()
+        word_starts.append(start)
+        word_ends.append(end)
+    count = max(len(word_starts) - n + 1, 0)
+    return NgramSpans(text, word_starts[:count], word_ends[n-1:n-1+count])
+
+
+def to_char_ngram_spans(
+        n: int,
+        text: str,
+    ) -> NgramSpans:
+    """
+        テキストを文字 N-gram に分割し, 位置で表す.
+
+        to_char_ngram() と同じく単語以外の文字は飛ばすため, N-gram の範囲に
+        記号や空白を含む場合がある.
+
+        Arguments
+        ---------
+        n : int
+            分割数.
+        text : str
+            分割するテキスト.
+
+        Returns
+        -------
+        NgramSpans
+            text の文字 N-gram.
+
+        Examples
+        --------
+        >>> spans = to_char_ngram_spans(2, 'I am an NLPer')
+        >>> spans.span(1), spans[1]
+        ((2, 4), 'am')
+        >>> spans.span(2), spans[2]
+        ((3, 6), 'ma')
+    """
+    positions = array.array('L')
+    for match in WORD_PATTERN.finditer(text):
+        positions.extend(range(*match.span()))
+    count = max(len(positions) - n + 1, 0)
+    ends = array.array('L', (position + 1 for position in positions[n-1:n-1+count]))
+    return NgramSpans(text, positions[:count], ends)
+
+
+class NgramSpansTestCase(unittest.TestCase):
+    """
+        to_word_ngram_spans(), to_char_ngram_spans() のテストケース.
+    """
+
+    TEXTS = ['', "It's a fine day!", 'I am an NLPer', '日本は、東アジアの島国。']
+
+    def test_same_as_ngram(self):
+        for text in self.TEXTS:
+            for n in [1, 2, 3, 5]:
+                self.assertEqual(
+                    to_word_ngram(n, text), list(to_word_ngram_spans(n, text)))
+                self.assertEqual(
+                    to_char_ngram(n, text), list(to_char_ngram_spans(n, text)))
+
+    def test_getitem(self):
+        text = 'I am an NLPer'
+        spans = to_char_ngram_spans(2, text)
+        self.assertEqual('er', spans[-1])
+        self.assertEqual(to_char_ngram(2, text)[1:7:2], spans[1:7:2])
+        self.assertEqual([], spans[100:])
+
+    def test_encoded(self):
+        text = '日本の NLPer は、fine。'
+        for spans in [to_char_ngram_spans(2, text), to_word_ngram_spans(2, text)]:
+            data, starts, ends = spans.encoded()
+            self.assertTrue(spans)
+            self.assertEqual(
+                list(spans),
+                [''.join(to_words(bytes(data[start:end]).decode()))
+                 for start, end in zip(starts, ends)])
+            self.assertEqual('L', starts.typecode)
+
+
+def _bit_count(
+        value: int,
+    ) -> int:
+    """
+        0 以上の整数の立っているビットの数を数える.
+
+        Python 3.10 以上では int.bit_count() に置き換える.
+
+        Arguments
+        ---------
+        value : int
+            0 以上の整数.
+
+        Returns
+        -------
+        int
+            立っているビットの数.
+
+        Examples
+        --------
+        >>> _bit_count(0b1011)
+        3
+    """
+    return bin(value).count('1')
+
+
+if hasattr(int, 'bit_count'):
+    _bit_count = int.bit_count
+
+
+def to_bigram_bitsets(
+        texts: typing.List[str],
+    ) -> typing.Tuple[typing.Dict[str, int], typing.List[int]]:
+    """
+        各テキストの文字 bi-gram の集合を, 共通の語彙上のビット集合に変換する.
+
+        ビット集合は整数で表し, 語彙の i 番目の bi-gram を含む場合に i ビット目
+        を立てる. 集合演算はビット演算 (&, |) に, 要素数は立っているビットの数
+        に置き換えられる.
+
+        Arguments
+        ---------
+        texts : typing.List[str]
+            テキストのリスト.
+
+        Returns
+        -------
+        typing.Tuple[typing.Dict[str, int], typing.List[int]]
+            (bi-gram からビット位置への辞書, テキストごとのビット集合のリスト).
+
+        Examples
+        --------
+        >>> vocabulary, bitsets = to_bigram_bitsets(['paraparaparadise', 'paragraph'])
+        >>> sorted(vocabulary, key=vocabulary.get)
+        ['pa', 'ar', 'ra', 'ap', 'ad', 'di', 'is', 'se', 'ag', 'gr', 'ph']
+        >>> [bin(bitset) for bitset in bitsets]
+        ['0b11111111', '0b11100001111']
+    """
+    vocabulary = {}
+    indices_list = []
+    for text in texts:
+        indices_list.append({
+            vocabulary.setdefault(bigram, len(vocabulary))
+            for bigram in to_char_ngram(2, text)
+        })
+
+    bitsets = []
+    for indices in indices_list:
+        bits = bytearray((len(vocabulary) + 7) // 8)
+        for index in indices:
+            bits[index >> 3] |= 1 << (index & 7)
+        bitsets.append(int.from_bytes(bits, 'little'))
+    return vocabulary, bitsets
+
+
+def jaccard_similarity(
+        bitset1: int,
+        bitset2: int,
+    ) -> float:
+    """
+        ビット集合の Jaccard 係数を求める.
+
+        Arguments
+        ---------
+        bitset1 : int
+            ビット集合.
+        bitset2 : int
+            ビット集合.
+
+        Returns
+        -------
+        float
+            |X & Y| / |X | Y|. 両方とも空集合の場合は 0.0.
+
+        Examples
+        --------
+        >>> jaccard_similarity(0b1110, 0b0111)
+        0.5
+    """
+    union = _bit_count(bitset1 | bitset2)
+    return _bit_count(bitset1 & bitset2) / union if union else 0.0
+
+
+def iterate_jaccard_similarity_blocks(
+        bitsets: typing.List[int],
+        block_size: int=64,
+    ) -> typing.Iterator[typing.Tuple[int, int, typing.List[array.array]]]:
+    """
+        Jaccard 係数の行列の上三角部分を, ブロックごとに生成する.
+
+        行列は対称なので, 行の範囲が列の範囲より前にあるブロック (と対角ブロック)
+        だけを計算し, 各組の係数は 1 回だけ求める. 各ビット集合の要素数を先に
+        求めておき, 組ごとには共通部分の要素数だけを数える
+        (|X | Y| = |X| + |Y| - |X & Y|). 1 つのブロックでは同じ block_size 個の
+        列のビット集合を各行で使い回す.
+
+        Arguments
+        ---------
+        bitsets : typing.List[int]
+            ビット集合のリスト.
+        block_size : int
+            ブロックの行数と列数.
+
+        Returns
+        -------
+        typing.Iterator[typing.Tuple[int, int, typing.List[array.array]]]
+            (行の開始位置, 列の開始位置, ブロックの各行 (typecode 'd') のリスト)
+            を生成するイテレータ. 行の開始位置 <= 列の開始位置であり,
+            対角ブロックは下三角部分も埋める.
+    """
+    size = len(bitsets)
+    counts = list(map(_bit_count, bitsets))
+    for row_start in range(0, size, block_size):
+        row_end = min(row_start + block_size, size)
+        for column_start in range(row_start, size, block_size):
+            columns = range(column_start, min(column_start + block_size, size))
+            block = []
+            for i in range(row_start, row_end):
+                bitset, count = bitsets[i], counts[i]
+                row = array.array('d', bytes(8 * len(columns)))
+                for j in columns:
+                    if j < i:
+                        # 対角ブロックの下三角部分は, 計算済みの行から写す.
+                        row[j - column_start] = block[j - row_start][i - column_start]
+                        continue
+                    intersection = _bit_count(bitset & bitsets[j])
+                    union = count + counts[j] - intersection
+                    row[j - column_start] = intersection / union if union else 0.0
+                block.append(row)
+            yield row_start, column_start, block
+
+
+def write_jaccard_similarity_matrix(
+        bitsets: typing.List[int],
+        file: typing.BinaryIO,
+        block_size: int=64,
+    ) -> None:
+    """
+        全てのビット集合の組の Jaccard 係数の行列をファイルに書き込む.
+
+        行列は倍精度浮動小数点数 (マシンのバイトオーダー) を行優先で並べたもの
+        で, array.array('d').fromfile() で読み込める. 上三角部分のブロックと
+        その転置を行列内の位置に書き込むため, file はシークできる必要がある.
+        行列は file の現在位置から書き込む.
+
+        Arguments
+        ---------
+        bitsets : typing.List[int]
+            ビット集合のリスト.
+        file : typing.BinaryIO
+            書き込み先のファイル.
+        block_size : int
+            一度に計算するブロックの行数と列数.
+    """
+    size = len(bitsets)
+    item_size = array.array('d').itemsize
+    base = file.tell()
+    blocks = iterate_jaccard_similarity_blocks(bitsets, block_size)
+    for row_start, column_start, block in blocks:
+        for i, row in enumerate(block, row_start):
+            file.seek(base + (i * size + column_start) * item_size)
+            row.tofile(file)
+        if row_start == column_start:
+            continue
+        for j in range(column_start, column_start + len(block[0])):
+            column = array.array('d', [row[j - column_start] for row in block])
+            file.seek(base + (j * size + row_start) * item_size)
+            column.tofile(file)
+    file.seek(base + size * size * item_size)
+
+
+class JaccardSimilarityTestCase(unittest.TestCase):
+    """
+        ビット集合による Jaccard 係数のテストケース.
+    """
+
+    TEXTS = ['paraparaparadise', 'paragraph', 'paradise', 'graph', '']
+
+    def expected_similarity(self, text1, text2):
+        X, Y = set(to_char_ngram(2, text1)), set(to_char_ngram(2, text2))
+        return len(X & Y) / len(X | Y) if X | Y else 0.0
+
+    def test_blocks(self):
+        _, bitsets = to_bigram_bitsets(self.TEXTS)
+        similarities = {}
+        for row_start, column_start, block in \
+                iterate_jaccard_similarity_blocks(bitsets, block_size=2):
+            self.assertLessEqual(row_start, column_start)
+            for i, row in enumerate(block, row_start):
+                for j, similarity in enumerate(row, column_start):
+                    similarities[i, j] = similarity
+
+        for i, text1 in enumerate(self.TEXTS):
+            for j, text2 in enumerate(self.TEXTS[i:], i):
+                expected = self.expected_similarity(text1, text2)
+                self.assertAlmostEqual(expected, similarities[i, j])
+                self.assertAlmostEqual(
+                    expected, jaccard_similarity(bitsets[i], bitsets[j]))
+
+    def test_write_matrix(self):
+        _, bitsets = to_bigram_bitsets(self.TEXTS)
+        for block_size in [1, 2, 64]:
+            file = io.BytesIO()
+            write_jaccard_similarity_matrix(bitsets, file, block_size)
+            matrix = array.array('d', file.getvalue())
+            self.assertEqual(len(bitsets) ** 2, len(matrix))
+            for i, text1 in enumerate(self.TEXTS):
+                for j, text2 in enumerate(self.TEXTS):
+                    self.assertAlmostEqual(
+                        self.expected_similarity(text1, text2),
+                        matrix[i * len(bitsets) + j])
+
+
+# ローリングハッシュの基数.
+ROLLING_HASH_BASE = 1000003
+
+
+# ローリングハッシュの法 (メルセンヌ素数 2^61 - 1).
+ROLLING_HASH_MODULUS = (1 << 61) - 1
+
+
+def iterate_rolling_hashes(
+        n: int,
+        text: typing.Iterable[str],
+    ) -> typing.Iterator[int]:
+    """
+        テキストの文字 N-gram のハッシュ値を, 部分文字列を作らずに先頭から順に
+        求める (Rabin-Karp 法).
+
+        text[i:i+n] のハッシュ値は, 各文字のコードポイントを係数とする
+        ROLLING_HASH_BASE の多項式を ROLLING_HASH_MODULUS で割った余りである.
+        直近の n 文字のコードポイントだけを保持するため, 文字を生成する
+        イテレータを渡せば, テキスト全体をメモリに載せずに 1 回の走査で求まる.
+
+        Arguments
+        ---------
+        n : int
+            N-gram の文字数.
+        text : typing.Iterable[str]
+            テキスト (または文字を生成するイテレータ).
+
+        Returns
+        -------
+        typing.Iterator[int]
+            文字 N-gram のハッシュ値を出現順に生成するイテレータ.
+
+        Examples
+        --------
+        >>> list(iterate_rolling_hashes(2, 'abab')) == \\
+        ...     [ord('a') * ROLLING_HASH_BASE + ord('b'),
+        ...      ord('b') * ROLLING_HASH_BASE + ord('a'),
+        ...      ord('a') * ROLLING_HASH_BASE + ord('b')]
+        True
+    """
+    if n <= 0:
+        return
+    base, modulus = ROLLING_HASH_BASE, ROLLING_HASH_MODULUS
+    # 先頭の文字を取り除く際に掛ける base^(n-1).
+    leading = pow(base, n - 1, modulus)
+    # 直近の n 文字のコードポイント.
+    window = collections.deque()
+
+    value = 0
+    for code in map(ord, text):
+        if len(window) == n:
+            value -= window.popleft() * leading
+        window.append(code)
+        value = (value * base + code) % modulus
+        if len(window) == n:
+            yield value
+
+
+def winnow(
+        hashes: typing.Iterable[int],
+        window: int,
+    ) -> typing.List[typing.Tuple[int, int]]:
+    """
+        ハッシュ値の列から winnowing によりフィンガープリントを選ぶ.
+
+        連続する window 個のハッシュ値ごとに最小値 (同じ値なら右端) を選び,
+        直前に選んだものと位置が異なる場合だけ記録する. window + n - 1 文字
+        以上の共通部分文字列を持つテキストは, 共通のフィンガープリントを
+        少なくとも 1 つ持つ. ハッシュ値の列は先頭から 1 回だけ読み進める.
+
+        Arguments
+        ---------
+        hashes : typing.Iterable[int]
+            ハッシュ値の列.
+        window : int
+            ウィンドウの大きさ (1 以上).
+
+        Returns
+        -------
+        typing.List[typing.Tuple[int, int]]
+            (ハッシュ値, 位置) のリスト (位置の昇順).
+
+        Examples
+        --------
+        >>> winnow([77, 74, 42, 17, 98, 50, 17, 98, 8, 88, 67, 39, 77, 74, 42, 17, 98], 4)
+        [(17, 3), (17, 6), (8, 8), (39, 11), (17, 15)]
+    """
+    if window < 1:
+        raise ValueError('window must be positive: {}'.format(window))
+
+    fingerprints = []
+    # 位置の昇順かつハッシュ値が狭義単調増加になるよう (位置, ハッシュ値) を保持する.
+    candidates = collections.deque()
+    count = 0
+
+    for position, value in enumerate(hashes):
+        count += 1
+        while candidates and candidates[-1][1] >= value:
+            candidates.pop()
+        candidates.append((position, value))
+        if candidates[0][0] <= position - window:
+            candidates.popleft()
+        if position >= window - 1:
+            selected_position, selected_value = candidates[0]
+            if not fingerprints or fingerprints[-1][1] != selected_position:
+                fingerprints.append((selected_value, selected_position))
+
+    if 0 < count < window:
+        # ウィンドウに満たない短いテキストは全体の最小値を選ぶ.
+        selected_position, selected_value = candidates[0]
+        fingerprints.append((selected_value, selected_position))
+    return fingerprints
+
+
+def find_shared_fingerprints(
+        texts: typing.Iterable[str],
+        n: int=8,
+        window: int=8,
+    ) -> typing.Dict[int, typing.List[typing.Tuple[int, int]]]:
+    """
+        複数のテキストに現れるフィンガープリントを求める.
+
+        各テキストを 1 回ずつ走査して winnowing でフィンガープリントを選び,
+        2 つ以上のテキストに現れるものを返す. 重複した段落や定型文の検出に使う.
+
+        Arguments
+        ---------
+        texts : typing.Iterable[str]
+            テキスト.
+        n : int
+            N-gram の文字数.
+        window : int
+            winnowing のウィンドウの大きさ.
+
+        Returns
+        -------
+        typing.Dict[int, typing.List[typing.Tuple[int, int]]]
+            キーがフィンガープリント, 値が (テキストの番号, 文字位置) のリスト.
+    """
+    occurrences = collections.defaultdict(list)
+    for index, text in enumerate(texts):
+        for value, position in winnow(iterate_rolling_hashes(n, text), window):
+            occurrences[value].append((index, position))
+    return {
+        value: positions
+        for value, positions in occurrences.items()
+        if len({index for index, _ in positions}) >= 2
+    }
+
+
+class RollingHashTestCase(unittest.TestCase):
+    """
+        ローリングハッシュと winnowing のテストケース.
+    """
+
+    def direct_hash(self, text):
+        value = 0
+        for c in text:
+            value = (value * ROLLING_HASH_BASE + ord(c)) % ROLLING_HASH_MODULUS
+        return value
+
+    def test_rolling_hashes(self):
+        text = 'パタトクカシーー It\'s a fine day!'
+        for n in [1, 2, 3, 8]:
+            self.assertEqual(
+                [self.direct_hash(ngram) for ngram in
+                    [text[i:i+n] for i in range(len(text) - n + 1)]],
+                list(iterate_rolling_hashes(n, text)))
+        self.assertEqual([], list(iterate_rolling_hashes(3, 'ab')))
+        self.assertEqual(
+            list(iterate_rolling_hashes(3, text)),
+            list(iterate_rolling_hashes(3, iter(text))))
+
+    def test_winnow(self):
+        random_ = random.Random(0)
+        for _ in range(200):
+            hashes = [random_.randrange(10) for _ in range(random_.randint(1, 30))]
+            window = random_.randint(1, 6)
+            fingerprints = winnow(iter(hashes), window)
+            # 全てのウィンドウで, 最小値 (右端) が選ばれていること.
+            positions = {position for _, position in fingerprints}
+            for start in range(max(1, len(hashes) - window + 1)):
+                values = hashes[start:start+window]
+                minimum = min(values)
+                rightmost = start + max(
+                    i for i, value in enumerate(values) if value == minimum)
+                self.assertIn(rightmost, positions)
+            for value, position in fingerprints:
+                self.assertEqual(hashes[position], value)
+
+    def test_winnow_invalid_window(self):
+        for window in [0, -1]:
+            with self.assertRaises(ValueError):
+                winnow([1, 2, 3], window)
+
+    def test_find_shared_fingerprints(self):
+        boilerplate = 'この記事は書きかけです。加筆、訂正して下さる協力者を求めています。'
+        texts = [
+            '日本は東アジアに位置する島国。' + boilerplate,
+            boilerplate + 'スイスは中央ヨーロッパの内陸国。',
+            'フランスは西ヨーロッパの共和国。',
+        ]
+        shared = find_shared_fingerprints(texts, n=5, window=4)
+        self.assertTrue(shared)
+        indices = {index for positions in shared.values() for index, _ in positions}
+        self.assertEqual({0, 1}, indices)
+
+
 def cipher(
         text: str,
     ) -> str:
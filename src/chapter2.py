@@ -5,8 +5,15 @@
 
 import contextlib
 import doctest
+import functools
 import io
+import mmap
+import multiprocessing
+import operator
 import os
+import random
+import sys
+import tempfile
 import typing
 import unittest
 
@@ -234,6 +241,528 @@ class ToChunksTestCase(unittest.TestCase):
         self.assertEqual(['A', '', 'B', '', 'C', '', 'D', '', 'E', ''], to_chunks(10, text))
 
 
+def bytes_from_file(
+        file_path: str,
+    ) -> bytes:
+    """
+        ファイルをデコードせずにバイト列として読み込む.
+
+        Arguments
+        ---------
+        file_path : str
+            ファイルのパス.
+
+        Returns
+        -------
+        data : bytes
+            ファイルの内容.
+    """
+    with open(file_path, 'rb') as file:
+        return file.read()
+
+
+def write_bytes(
+        data: bytes,
+    ) -> None:
+    """
+        バイト列をエンコードし直さずに標準出力に書き込む.
+
+        標準出力がバイト列を書き込めない場合 (io.StringIO にリダイレクト
+        されている場合など) はデコードして書き込む.
+
+        Arguments
+        ---------
+        data : bytes
+            書き込むバイト列.
+    """
+    buffer = getattr(sys.stdout, 'buffer', None)
+    if buffer is None:
+        sys.stdout.write(data.decode())
+    else:
+        sys.stdout.flush()
+        buffer.write(data)
+        buffer.flush()
+
+
+def count_lines_bytes(
+        data: bytes,
+    ) -> int:
+    """
+        バイト列の行数を求める.
+
+        改行 (b'\\n') の数を数えるだけで, 行に分割しない.
+        行の区切りは b'\\n' だけであり, count_lines() (str.splitlines()) と
+        異なり b'\\r' 単独や b'\\x0b', b'\\x1c' などでは区切らない.
+        b'\\r\\n' は 1 つの改行として数える.
+
+        Arguments
+        ---------
+        data : bytes
+            バイト列.
+
+        Returns
+        -------
+        count : int
+            data の行数 (末尾に改行のない最終行も 1 行と数える).
+
+        Examples
+        --------
+        >>> count_lines_bytes(b'abc\\ndef\\nghi')
+        3
+        >>> count_lines_bytes(b'abc\\r\\ndef\\rghi\\n')
+        2
+    """
+    count = data.count(b'\n')
+    if data and not data.endswith(b'\n'):
+        count += 1
+    return count
+
+
+def cut_bytes(
+        data: bytes,
+        column: int,
+        delimiter: bytes=b'\t',
+    ) -> typing.List[bytes]:
+    """
+        バイト列の各行から指定した列を取り出す.
+
+        Arguments
+        ---------
+        data : bytes
+            バイト列.
+        column : int
+            取り出す列の (0 から始まる) 番号.
+        delimiter : bytes
+            列の区切り.
+
+        Returns
+        -------
+        values : typing.List[bytes]
+            各行の column 列目の値のリスト.
+
+        Examples
+        --------
+        >>> cut_bytes(b'Mary\\tF\\nAnna\\tF\\n', 0)
+        [b'Mary', b'Anna']
+    """
+    maxsplit = column + 1
+    return [line.split(delimiter, maxsplit)[column] for line in data.splitlines()]
+
+
+def paste_bytes(
+        columns: typing.List[typing.List[bytes]],
+        delimiter: bytes=b'\t',
+    ) -> bytes:
+    """
+        列ごとの値を行ごとに区切り文字で連結する.
+
+        Arguments
+        ---------
+        columns : typing.List[typing.List[bytes]]
+            列ごとの値のリスト. 最も短い列に合わせる.
+        delimiter : bytes
+            列の区切り.
+
+        Returns
+        -------
+        data : bytes
+            連結した行を改行で終端したバイト列.
+
+        Examples
+        --------
+        >>> paste_bytes([[b'Mary', b'Anna'], [b'F', b'F']])
+        b'Mary\\tF\\nAnna\\tF\\n'
+    """
+    return b''.join(delimiter.join(values) + b'\n' for values in zip(*columns))
+
+
+def sort_lines_bytes(
+        data: bytes,
+        column: int,
+        reverse: bool=False,
+        delimiter: bytes=b'\t',
+    ) -> typing.List[bytes]:
+    """
+        バイト列の各行を, 指定した列の数値で並べ替える.
+
+        列の値はデコードせずに int() で数値に変換する.
+
+        Arguments
+        ---------
+        data : bytes
+            バイト列.
+        column : int
+            並べ替えのキーとする列の (0 から始まる) 番号.
+        reverse : bool
+            True の場合は降順に並べる.
+        delimiter : bytes
+            列の区切り.
+
+        Returns
+        -------
+        lines : typing.List[bytes]
+            並べ替えた行のリスト.
+
+        Examples
+        --------
+        >>> sort_lines_bytes(b'a\\t10\\nb\\t9\\nc\\t100', 1)
+        [b'b\\t9', b'a\\t10', b'c\\t100']
+    """
+    maxsplit = column + 1
+    to_key = lambda line: int(line.split(delimiter, maxsplit)[column])
+    return sorted(data.splitlines(), key=to_key, reverse=reverse)
+
+
+class BytesTestCase(unittest.TestCase):
+    """
+        バイト列を扱う関数のテストケース.
+    """
+
+    TEXT = 'Mary\tF\t7065\t1880\nAnna\tF\t2604\t1880\nÉmile\tM\t12585\t2018\nMary\tF\t30\t1881\n'
+
+    def test_same_as_text(self):
+        data = self.TEXT.encode()
+        lines = self.TEXT.splitlines()
+
+        self.assertEqual(count_lines(self.TEXT), count_lines_bytes(data))
+        self.assertEqual(count_lines('a\nb'), count_lines_bytes(b'a\nb'))
+        self.assertEqual(0, count_lines_bytes(b''))
+
+        names = [line.split('\t')[0] for line in lines]
+        self.assertEqual(names, [value.decode() for value in cut_bytes(data, 0)])
+
+        self.assertEqual(
+            to_histogram(names),
+            {key.decode(): count for key, count in to_histogram(cut_bytes(data, 0)).items()})
+
+        self.assertEqual(
+            sorted(lines, key=lambda line: int(line.split()[2]), reverse=True),
+            [line.decode() for line in sort_lines_bytes(data, 2, reverse=True)])
+
+        self.assertEqual(
+            ''.join('{}\t{}\n'.format(*line.split('\t')[:2]) for line in lines),
+            paste_bytes([cut_bytes(data, 0), cut_bytes(data, 1)]).decode())
+
+    def test_write_bytes(self):
+        stdout = io.StringIO()
+        with contextlib.redirect_stdout(stdout):
+            write_bytes('Émile\n'.encode())
+        self.assertEqual('Émile\n', stdout.getvalue())
+
+
+def newline_aligned_ranges(
+        file_path: str,
+        chunk_count: int,
+    ) -> typing.List[typing.Tuple[int, int]]:
+    """
+        ファイルを行の途中で切らないように, ほぼ同じ大きさのバイト範囲に分割する.
+
+        Arguments
+        ---------
+        file_path : str
+            ファイルのパス.
+        chunk_count : int
+            分割数. 行数が少ない場合は範囲の数がこれより少なくなる.
+
+        Returns
+        -------
+        ranges : typing.List[typing.Tuple[int, int]]
+            (開始位置, 終了位置) のリスト. 各範囲は行頭から始まり, 改行の直後
+            (またはファイルの末尾) で終わる. 空のファイルの場合は [(0, 0)].
+    """
+    size = os.path.getsize(file_path)
+    boundaries = [0]
+    with open(file_path, 'rb') as file:
+        for i in range(1, chunk_count):
+            position = max(size * i // chunk_count, boundaries[-1])
+            if position >= size:
+                break
+            file.seek(position)
+            # 境界を次の改行の直後まで進める.
+            file.readline()
+            position = file.tell()
+            if position > boundaries[-1] and position < size:
+                boundaries.append(position)
+    boundaries.append(size)
+    return list(zip(boundaries[:-1], boundaries[1:]))
+
+
+def _process_range(
+        arguments: typing.Tuple[str, int, int, typing.Callable[[bytes], typing.Any]],
+    ) -> typing.Any:
+    """
+        ファイルのバイト範囲を読み込み, 関数を適用する.
+
+        ワーカープロセスで実行する. ファイルの内容は親プロセスから受け取らず,
+        ワーカープロセスが自分で mmap する.
+
+        Arguments
+        ---------
+        arguments : typing.Tuple[str, int, int, typing.Callable[[bytes], typing.Any]]
+            (ファイルのパス, 開始位置, 終了位置, 関数).
+
+        Returns
+        -------
+        result : typing.Any
+            関数の戻り値.
+    """
+    file_path, start, end, function = arguments
+    if start == end:
+        return function(b'')
+    with open(file_path, 'rb') as file, \
+         mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as data:
+        return function(data[start:end])
+
+
+def map_reduce_file(
+        file_path: str,
+        function: typing.Callable[[bytes], typing.Any],
+        merge: typing.Callable[[typing.Any, typing.Any], typing.Any],
+        processes: typing.Optional[int]=None,
+        chunk_count: typing.Optional[int]=None,
+    ) -> typing.Any:
+    """
+        ファイルを行単位のバイト範囲に分割して並列に処理し, 結果を統合する.
+
+        Arguments
+        ---------
+        file_path : str
+            ファイルのパス.
+        function : typing.Callable[[bytes], typing.Any]
+            バイト範囲の内容 (完全な行の並び) を受け取り, 部分的な結果を返す
+            関数. ワーカープロセスに渡すため, pickle できる必要がある.
+        merge : typing.Callable[[typing.Any, typing.Any], typing.Any]
+            2 つの部分的な結果を統合する関数. 範囲の順に適用する.
+        processes : typing.Optional[int]
+            ワーカープロセス数. None の場合は CPU 数. 1 の場合は並列化しない.
+        chunk_count : typing.Optional[int]
+            分割数. None の場合はワーカープロセス数.
+
+        Returns
+        -------
+        result : typing.Any
+            統合した結果.
+    """
+    processes = processes or os.cpu_count() or 1
+    ranges = newline_aligned_ranges(file_path, chunk_count or processes)
+    tasks = [(file_path, start, end, function) for start, end in ranges]
+
+    if processes == 1 or len(tasks) == 1:
+        results = map(_process_range, tasks)
+        return functools.reduce(merge, results)
+    with multiprocessing.Pool(min(processes, len(tasks))) as pool:
+        return functools.reduce(merge, pool.imap(_process_range, tasks))
+
+
+def _histogram_of_column(
+        data: bytes,
+        column: int,
+    ) -> typing.Dict[bytes, int]:
+    """
+        バイト列の各行の指定した列の値の出現回数を求める.
+    """
+    return to_histogram(cut_bytes(data, column))
+
+
+def _distinct_values_of_column(
+        data: bytes,
+        column: int,
+    ) -> typing.Set[bytes]:
+    """
+        バイト列の各行の指定した列の値の集合を求める.
+    """
+    return set(cut_bytes(data, column))
+
+
+def _cut_column(
+        data: bytes,
+        column: int,
+    ) -> typing.List[bytes]:
+    """
+        バイト列の各行から指定した列を取り出し, 改行で終端して連結したものを
+        要素が 1 つのリストで返す.
+    """
+    return [b''.join(value + b'\n' for value in cut_bytes(data, column))]
+
+
+def _merge_histograms(
+        histogram1: typing.Dict[typing.Any, int],
+        histogram2: typing.Dict[typing.Any, int],
+    ) -> typing.Dict[typing.Any, int]:
+    """
+        histogram2 の出現回数を histogram1 に加える.
+    """
+    for value, count in histogram2.items():
+        histogram1[value] = histogram1.get(value, 0) + count
+    return histogram1
+
+
+def parallel_count_lines(
+        file_path: str,
+        processes: typing.Optional[int]=None,
+    ) -> int:
+    """
+        ファイルの行数を並列に求める.
+
+        Arguments
+        ---------
+        file_path : str
+            ファイルのパス.
+        processes : typing.Optional[int]
+            ワーカープロセス数.
+
+        Returns
+        -------
+        count : int
+            ファイルの行数.
+    """
+    return map_reduce_file(file_path, count_lines_bytes, operator.add, processes)
+
+
+def parallel_histogram(
+        file_path: str,
+        column: int,
+        processes: typing.Optional[int]=None,
+    ) -> typing.Dict[bytes, int]:
+    """
+        ファイルの各行の指定した列の値の出現回数を並列に求める.
+
+        Arguments
+        ---------
+        file_path : str
+            ファイルのパス.
+        column : int
+            列の (0 から始まる) 番号.
+        processes : typing.Optional[int]
+            ワーカープロセス数.
+
+        Returns
+        -------
+        histogram : typing.Dict[bytes, int]
+            値から出現回数への辞書.
+    """
+    function = functools.partial(_histogram_of_column, column=column)
+    return map_reduce_file(file_path, function, _merge_histograms, processes)
+
+
+def parallel_count_distinct(
+        file_path: str,
+        column: int,
+        processes: typing.Optional[int]=None,
+    ) -> int:
+    """
+        ファイルの各行の指定した列の値の異なり数を並列に求める.
+
+        Arguments
+        ---------
+        file_path : str
+            ファイルのパス.
+        column : int
+            列の (0 から始まる) 番号.
+        processes : typing.Optional[int]
+            ワーカープロセス数.
+
+        Returns
+        -------
+        count : int
+            異なる値の数.
+    """
+    function = functools.partial(_distinct_values_of_column, column=column)
+    return len(map_reduce_file(file_path, function, operator.ior, processes))
+
+
+def parallel_cut(
+        file_path: str,
+        column: int,
+        processes: typing.Optional[int]=None,
+    ) -> bytes:
+    """
+        ファイルの各行から指定した列を並列に取り出す.
+
+        Arguments
+        ---------
+        file_path : str
+            ファイルのパス.
+        column : int
+            列の (0 から始まる) 番号.
+        processes : typing.Optional[int]
+            ワーカープロセス数.
+
+        Returns
+        -------
+        data : bytes
+            各行の値を改行で終端して連結したバイト列 (元の行の順).
+    """
+    function = functools.partial(_cut_column, column=column)
+    # バイト列を連結しながら統合すると分割数の 2 乗に比例するコピーが
+    # 生じるため, リストに集めて最後に 1 回だけ連結する.
+    parts = map_reduce_file(file_path, function, operator.iadd, processes)
+    return b''.join(parts)
+
+
+class MapReduceFileTestCase(unittest.TestCase):
+    """
+        map_reduce_file() とその利用者のテストケース.
+    """
+
+    def write_file(self, directory, text):
+        file_path = os.path.join(directory, 'names.txt')
+        with open(file_path, 'wb') as file:
+            file.write(text.encode())
+        return file_path
+
+    def test_newline_aligned_ranges(self):
+        with tempfile.TemporaryDirectory() as directory:
+            text = 'a\nbb\n\nccc\ndddd'
+            file_path = self.write_file(directory, text)
+            data = text.encode()
+            for chunk_count in range(1, 20):
+                ranges = newline_aligned_ranges(file_path, chunk_count)
+                self.assertLessEqual(len(ranges), chunk_count)
+                self.assertEqual(0, ranges[0][0])
+                self.assertEqual(len(data), ranges[-1][1])
+                for (_, end), (start, _) in zip(ranges, ranges[1:]):
+                    self.assertEqual(end, start)
+                    self.assertEqual(b'\n', data[end-1:end])
+
+            file_path = self.write_file(directory, '')
+            self.assertEqual([(0, 0)], newline_aligned_ranges(file_path, 4))
+
+    def test_parallel(self):
+        random_ = random.Random(0)
+        names = ['Mary', 'Anna', 'Émile', 'Zoë']
+        text = ''.join(
+            '{}\t{}\t{}\n'.format(random_.choice(names), random_.choice('FM'), i)
+            for i in range(1000)).rstrip('\n')
+        data = text.encode()
+
+        with tempfile.TemporaryDirectory() as directory:
+            file_path = self.write_file(directory, text)
+            for processes in [1, 3]:
+                self.assertEqual(
+                    count_lines_bytes(data),
+                    parallel_count_lines(file_path, processes))
+                self.assertEqual(
+                    to_histogram(cut_bytes(data, 0)),
+                    parallel_histogram(file_path, 0, processes))
+                self.assertEqual(
+                    len(set(cut_bytes(data, 1))),
+                    parallel_count_distinct(file_path, 1, processes))
+                self.assertEqual(
+                    b''.join(value + b'\n' for value in cut_bytes(data, 2)),
+                    parallel_cut(file_path, 2, processes))
+
+            # 分割数がワーカープロセス数より多い場合も結果は同じ.
+            self.assertEqual(
+                count_lines_bytes(data),
+                map_reduce_file(
+                    file_path, count_lines_bytes, operator.add, 2, chunk_count=50))
+
+            file_path = self.write_file(directory, '')
+            self.assertEqual(0, parallel_count_lines(file_path, 2))
+            self.assertEqual({}, parallel_histogram(file_path, 0, 2))
+
+
 def practice10():
     """ 10. 行数のカウント
 
@@ -244,8 +773,8 @@ def practice10():
         >>> practice10()
         2780
     """
-    text = text_from_file('data/popular-names.txt')
-    print(count_lines(text))
+    data = bytes_from_file('data/popular-names.txt')
+    print(count_lines_bytes(data))
 
 
 def practice11():
@@ -255,8 +784,8 @@ def practice11():
         タブ 1 文字につきスペース 1 文字に置換せよ. 確認には sed コマンド, tr
         コマンド, もしくは expand コマンドを用いよ.
     """
-    text = text_from_file('data/popular-names.txt')
-    print(expand_tab(text, 1))
+    data = bytes_from_file('data/popular-names.txt')
+    write_bytes(data.replace(b'\t', b' ') + b'\n')
 
 
 class practice11TestCase(unittest.TestCase):
@@ -282,15 +811,13 @@ def practice12():
         各行の 1 列目だけを抜き出したものを col1.txt に, 2 列目だけを抜き出した
         ものを col2.txt としてファイルに保存せよ. 確認には cut コマンドを用いよ.
     """
-    text = text_from_file('data/popular-names.txt')
-    lines = text.splitlines()
+    data = bytes_from_file('data/popular-names.txt')
 
-    with open('data/col1.txt', 'w') as col1_file, \
-         open('data/col2.txt', 'w') as col2_file:
-        for line in lines:
-            columns = line.split('\t')
-            col1_file.write(columns[0] + '\n')
-            col2_file.write(columns[1] + '\n')
+    with open('data/col1.txt', 'wb') as col1_file, \
+         open('data/col2.txt', 'wb') as col2_file:
+        for file, column in [(col1_file, 0), (col2_file, 1)]:
+            values = cut_bytes(data, column)
+            file.write(b'\n'.join(values) + b'\n' if values else b'')
 
 
 class practice12TestCase(unittest.TestCase):
@@ -326,11 +853,9 @@ def practice13():
         目をタブ区切りで並べたテキストファイルを作成せよ. 確認には paste コマン
         ドを用いよ.
     """
-    col1_lines = text_from_file('data/col1.txt').splitlines()
-    col2_lines = text_from_file('data/col2.txt').splitlines()
-
-    for values in zip(col1_lines, col2_lines):
-        print('\t'.join(values))
+    col1_lines = bytes_from_file('data/col1.txt').splitlines()
+    col2_lines = bytes_from_file('data/col2.txt').splitlines()
+    write_bytes(paste_bytes([col1_lines, col2_lines]))
 
 
 class practice13TestCase(unittest.TestCase):
@@ -414,9 +939,8 @@ def practice17():
         >>> practice17()
         136
     """
-    text = text_from_file('data/popular-names.txt')
-    lines = text.splitlines()
-    names = [line.split()[0] for line in lines]
+    data = bytes_from_file('data/popular-names.txt')
+    names = cut_bytes(data, 0)
     print(len(set(names)))
 
 
@@ -428,24 +952,22 @@ def practice18():
         び替えよ). 確認には sort コマンドを用いよ (この問題はコマンドで実行した
         時の結果と合わなくてもよい).
     """
-    text = text_from_file('data/popular-names.txt')
-    lines = text.splitlines()
-    to_key = lambda line: int(line.split()[2])
-    sorted_lines = sorted(lines, key=to_key, reverse=True)
-    print('\n'.join(sorted_lines))
+    data = bytes_from_file('data/popular-names.txt')
+    sorted_lines = sort_lines_bytes(data, 2, reverse=True)
+    write_bytes(b'\n'.join(sorted_lines) + b'\n')
 
 
 def practice19():
     """
         19. 各行の 1 コラム目の文字列の出現頻度を求め, 出現頻度の高い順に並べる.
     """
-    text = text_from_file('data/popular-names.txt')
-    lines = text.splitlines()
-    values = [line.split()[0] for line in lines]
+    data = bytes_from_file('data/popular-names.txt')
+    values = cut_bytes(data, 0)
     histogram = to_histogram(values)
 
+    # 出力する名前だけをデコードする.
     for value, count in sorted(histogram.items(), key=lambda pair: pair[1], reverse=True):
-        print(count, value)
+        print(count, value.decode())
 
 
 def to_histogram(values):
@@ -4,27 +4,185 @@
 #
 
 from chapter2 import text_from_file
+import array
+import asyncio
+import bisect
+import collections
+import collections.abc
+import concurrent.futures
 import doctest
 import functools
+import hashlib
+import http.server
 import itertools
 import json
+import math
+import multiprocessing
+import os
 import parameterized
+import random
 import re
-import regex
 import requests
+import sys
+import tempfile
+import threading
 import typing
 import unittest
+import unittest.mock
+import urllib.parse
+import zlib
 
 
-def _load_documents() -> typing.List[dict]:
+# 本章で扱うドキュメントのパス.
+DOCUMENTS_PATH = 'data/jawiki-country.json'
+
+
+# JSON 行の先頭にある "title" フィールドにマッチするパターン.
+DOCUMENT_TITLE_PATTERN = \
+    re.compile(rb'\{\s*"title"\s*:\s*("(?:[^"\\]|\\.)*")')
+
+
+def title_from_raw_document(
+        raw: bytes,
+    ) -> typing.Optional[str]:
+    """
+        JSON 形式のドキュメントの先頭だけを調べ, タイトルを取り出す.
+
+        本文を含む行全体を json.loads() しないため, タイトルだけで
+        ドキュメントを選別する場合に速い.
+
+        Arguments
+        ---------
+        raw : bytes
+            JSON 形式のドキュメント (UTF-8).
+
+        Returns
+        -------
+        typing.Optional[str]
+            タイトル. "title" フィールドが先頭にない場合は None.
+
+        Examples
+        --------
+        >>> title_from_raw_document(b'{"title": "\\u30a8\\u30b8\\u30d7\\u30c8", "text": "..."}')
+        'エジプト'
+        >>> title_from_raw_document(b'{"text": "...", "title": "A"}') is None
+        True
+    """
+    match = DOCUMENT_TITLE_PATTERN.match(raw)
+    return json.loads(match[1]) if match else None
+
+
+class Document:
+    """
+        JSON Lines の 1 行分のドキュメント.
+
+        行の UTF-8 バイト列を保持し, タイトルは生成時に, 本文は最初に参照した
+        時に復号する. dict と同じく document['title'], document['text'] でも
+        参照できる.
+    """
+
+    __slots__ = ('_raw', 'title', '_text')
+
+    def __init__(
+            self,
+            raw: bytes,
+            title: typing.Optional[str]=None,
+        ) -> None:
+        """
+            Arguments
+            ---------
+            raw : bytes
+                JSON 形式のドキュメント (UTF-8).
+            title : typing.Optional[str]
+                取り出し済みのタイトル. None の場合は raw から取り出す.
+        """
+        self._raw = raw
+        self._text = None
+
+        if title is None:
+            title = title_from_raw_document(raw)
+        if title is not None:
+            self.title = title
+        else:
+            # "title" が先頭にない場合は全体を復号する.
+            value = json.loads(raw)
+            self.title = value['title']
+            self._text = value['text']
+
+    @property
+    def text(self) -> str:
+        """
+            ドキュメントの本文.
+        """
+        if self._text is None:
+            self._text = json.loads(self._raw)['text']
+        return self._text
+
+    def __getitem__(
+            self,
+            key: str,
+        ) -> str:
+        if key == 'title':
+            return self.title
+        if key == 'text':
+            return self.text
+        raise KeyError(key)
+
+    def __repr__(self) -> str:
+        return 'Document(title={!r})'.format(self.title)
+
+    def release(self) -> None:
+        """
+            復号した本文を破棄する.
+
+            再度 text を参照した場合はバイト列から復号し直す.
+        """
+        self._text = None
+
+
+class DocumentTestCase(unittest.TestCase):
+    """
+        Document のテストケース.
+    """
+
+    def test_lazy_text(self):
+        raw = json.dumps({'title': 'A "B"', 'text': 'テキスト'}).encode()
+        document = Document(raw)
+        self.assertEqual('A "B"', document.title)
+        self.assertIsNone(document._text)
+        self.assertEqual('テキスト', document['text'])
+        self.assertIsNotNone(document._text)
+
+        document.release()
+        self.assertIsNone(document._text)
+        self.assertEqual('テキスト', document.text)
+
+    def test_title_not_first(self):
+        raw = json.dumps({'text': 'テキスト', 'title': 'A'}).encode()
+        document = Document(raw)
+        self.assertEqual('A', document['title'])
+        self.assertEqual('テキスト', document['text'])
+        with self.assertRaises(KeyError):
+            document['name']
+
+
+def _load_documents(
+        title_predicate: typing.Optional[typing.Callable[[str], bool]]=None,
+    ) -> typing.List[Document]:
     """
         本章で扱うドキュメントをロードする.
 
+        Arguments
+        ---------
+        title_predicate : typing.Optional[typing.Callable[[str], bool]]
+            タイトルを受け取り, ロードするかどうかを返す関数.
+            None の場合は全てのドキュメントをロードする.
+
         Returns
         -------
-        typing.List[dict]
+        typing.List[Document]
             本性で扱うドキュメント.
-            キーに 'title', 'text' を持つ dict のリスト.
+            キー 'title', 'text' で参照できる Document のリスト.
 
         Examples
         --------
@@ -34,9 +192,174 @@ def _load_documents() -> typing.List[dict]:
         >>> documents[0]['text'][:40]
         '{{otheruses|主に現代のエジプト・アラブ共和国|古代|古代エジプト}}'
     """
-    text = text_from_file('data/jawiki-country.json')
-    documents = map(json.loads, text.splitlines())
-    return list(documents)
+    return list(iterate_documents(DOCUMENTS_PATH, title_predicate))
+
+
+def iterate_documents(
+        file_path: str,
+        title_predicate: typing.Optional[typing.Callable[[str], bool]]=None,
+    ) -> typing.Iterator[Document]:
+    """
+        JSON Lines 形式のファイルからドキュメントを 1 件ずつ読み込む.
+
+        ファイル全体を一度に読み込まないため, 大きなダンプでも
+        メモリ使用量は 1 件分の大きさに収まる. title_predicate を指定した場合,
+        各行の先頭からタイトルだけを取り出して選別し, 選ばれなかった行は
+        JSON として復号しない.
+
+        Arguments
+        ---------
+        file_path : str
+            JSON Lines 形式のファイルのパス.
+        title_predicate : typing.Optional[typing.Callable[[str], bool]]
+            タイトルを受け取り, ドキュメントを生成するかどうかを返す関数.
+            None の場合は全てのドキュメントを生成する.
+
+        Returns
+        -------
+        typing.Iterator[Document]
+            ドキュメントを生成するイテレータ.
+    """
+    with open(file_path, 'rb') as file:
+        for line in file:
+            if not line.strip():
+                continue
+            if title_predicate is None:
+                yield Document(line)
+                continue
+            title = title_from_raw_document(line)
+            if title is None:
+                title = json.loads(line)['title']
+            if title_predicate(title):
+                yield Document(line, title)
+
+
+class IterateDocumentsTestCase(unittest.TestCase):
+    """
+        iterate_documents() のテストケース.
+    """
+
+    def test(self):
+        documents = [
+            {'title': 'A', 'text': 'a\nb'},
+            {'title': 'B', 'text': 'c'},
+        ]
+        with tempfile.TemporaryDirectory() as directory:
+            file_path = os.path.join(directory, 'documents.json')
+            with open(file_path, 'w') as file:
+                for document in documents:
+                    print(json.dumps(document, ensure_ascii=False), file=file)
+                print(file=file)
+            self.assertEqual(
+                [(document['title'], document['text']) for document in documents],
+                [(document.title, document.text)
+                 for document in iterate_documents(file_path)])
+
+    def test_title_predicate(self):
+        with tempfile.TemporaryDirectory() as directory:
+            file_path = os.path.join(directory, 'documents.json')
+            with open(file_path, 'w') as file:
+                print('{"title": "イギリス", "text": "a"}', file=file)
+                # 選ばれない行は本文が壊れていても復号しない.
+                print('{"title": "日本", "text": ', file=file)
+                print('{"text": "b", "title": "イギリス領"}', file=file)
+            documents = iterate_documents(
+                file_path, lambda title: 'イギリス' in title)
+            self.assertEqual(
+                [('イギリス', 'a'), ('イギリス領', 'b')],
+                [(document.title, document.text) for document in documents])
+
+
+def _load_json(
+        file_path: str,
+        default: typing.Any,
+    ) -> typing.Any:
+    """
+        JSON ファイルを読み込む.
+
+        Arguments
+        ---------
+        file_path : str
+            JSON ファイルのパス.
+        default : typing.Any
+            ファイルが存在しない場合に返す値.
+
+        Returns
+        -------
+        typing.Any
+            ファイルの内容.
+    """
+    if not os.path.exists(file_path):
+        return default
+    with open(file_path) as file:
+        return json.load(file)
+
+
+def _save_json(
+        file_path: str,
+        value: typing.Any,
+    ) -> None:
+    """
+        JSON ファイルに書き込む.
+
+        書き込みの途中で中断しても既存のファイルが壊れないよう,
+        一時ファイルに書き込んでから置き換える.
+
+        Arguments
+        ---------
+        file_path : str
+            JSON ファイルのパス.
+        value : typing.Any
+            書き込む値.
+    """
+    temporary_path = '{}.tmp'.format(file_path)
+    with open(temporary_path, 'w') as file:
+        json.dump(value, file, ensure_ascii=False)
+    os.replace(temporary_path, file_path)
+
+
+def _fingerprint(
+        text: str,
+    ) -> str:
+    """
+        テキストのフィンガープリント (ハッシュ値) を求める.
+
+        Arguments
+        ---------
+        text : str
+            テキスト.
+
+        Returns
+        -------
+        str
+            フィンガープリントを 16 進数で表した文字列.
+    """
+    return hashlib.blake2b(text.encode(), digest_size=16).hexdigest()
+
+
+def _saved_and_loaded(
+        value: typing.Any,
+        load: typing.Callable[[str], typing.Any],
+    ) -> typing.Any:
+    """
+        value.save() で一時ファイルに保存し, load() で読み込み直す (テスト用).
+
+        Arguments
+        ---------
+        value : typing.Any
+            save(file_path) を持つオブジェクト.
+        load : typing.Callable[[str], typing.Any]
+            ファイルのパスを受け取り, 保存したオブジェクトを読み込む関数.
+
+        Returns
+        -------
+        typing.Any
+            読み込んだオブジェクト.
+    """
+    with tempfile.TemporaryDirectory() as directory:
+        file_path = os.path.join(directory, 'saved')
+        value.save(file_path)
+        return load(file_path)
 
 
 def text_from_document(
@@ -58,52 +381,116 @@ def text_from_document(
     return document['text']
 
 
-def texts_from_documents(
-        documents: typing.List[dict],
-    ) -> typing.List[str]:
+class LineRecord(typing.NamedTuple):
     """
-        ドキュメントのリストを本文のリストに変換する.
+        iterate_line_records() が生成する行.
+    """
+
+    # 行を含むドキュメントの (0 から始まる) 番号.
+    document_index: int
+
+    # ドキュメントの本文における (1 から始まる) 行番号.
+    line_number: int
+
+    # 行 (改行文字を含まない).
+    line: str
+
+
+def iterate_line_records(
+        documents: typing.Iterable[dict],
+    ) -> typing.Iterator[LineRecord]:
+    """
+        ドキュメントを本文の行に分解し, 出所とともに 1 行ずつ生成する.
+
+        ドキュメントは 1 件ずつ読み進めるため, iterate_documents() と組み合わせ
+        ればダンプ全体をメモリに載せずに行単位の処理ができる.
 
         Arguments
         ---------
-        documents : typing.List[dict]
-            ドキュメントのリスト.
+        documents: typing.Iterable[dict]
+            ドキュメント.
 
         Returns
         -------
-        texts : typing.List[str]
-            本文のリスト.
+        typing.Iterator[LineRecord]
+            (ドキュメント番号, 行番号, 行) を生成するイテレータ.
+
+        Examples
+        --------
+        >>> documents = [{'text': 'a\\nb'}, {'text': 'c'}]
+        >>> for record in iterate_line_records(documents):
+        ...     print(tuple(record))
+        (0, 1, 'a')
+        (0, 2, 'b')
+        (1, 1, 'c')
+    """
+    for document_index, document in enumerate(documents):
+        text = text_from_document(document)
+        for line_number, line in enumerate(text.splitlines(), 1):
+            yield LineRecord(document_index, line_number, line)
+
+
+class IterateLineRecordsTestCase(unittest.TestCase):
+    """
+        iterate_line_records() のテストケース.
     """
-    return list(map(text_from_document, documents))
 
+    def test_lazy(self):
+        consumed = []
+
+        def documents():
+            for text in ['a\nb', '', 'c']:
+                consumed.append(text)
+                yield {'text': text}
+
+        records = iterate_line_records(documents())
+        self.assertEqual(LineRecord(0, 1, 'a'), next(records))
+        self.assertEqual(['a\nb'], consumed)
+        self.assertEqual(
+            [LineRecord(0, 2, 'b'), LineRecord(2, 1, 'c')],
+            list(records))
+
+
+# '[[Category:<name>|<sort key>]]' の行にマッチするパターン.
+CATEGORY_LINE_PATTERN = \
+    re.compile(r'\[\[Category:(.+?)(:?\|.+)?\]\]')
+
+
+# '== <name> ==' の行にマッチするパターン.
+SECTION_LINE_PATTERN = \
+    re.compile(r'(?P<mark>=+) (.*) (?P=mark)')
+
+
+# '[[ファイル:<name>|...]]' にマッチするパターン.
+FILE_REFERENCE_PATTERN = \
+    re.compile(r'\[\[ファイル:(.+?)(:?\|.+)\]\]')
 
-def lines_from_documents(
-        documents: typing.List[dict],
-    ) -> typing.List[str]:
+
+def match_category_line(
+        line: str,
+    ) -> typing.Optional[re.Match]:
     """
-        ドキュメントのリストを本文の行リストに変換する.
+        カテゴリ行としてマッチさせる.
 
         Arguments
         ---------
-        documents: typing.List[dict]
-            ドキュメントのリスト.
+        line : str
+            行データ.
 
         Returns
         -------
-        lines : typing.List[str]
-        各ドキュメントの本文を行リストに変換し,
-        それをフラットに連結した 1 次元のリスト.
+        typing.Optional[re.Match]
+            line がカテゴリ行の場合はマッチ結果.
+            マッチしなかった場合は None.
     """
-    texts = texts_from_documents(documents)
-    lines = itertools.chain(*map(str.splitlines, texts))
-    return list(lines)
+    return CATEGORY_LINE_PATTERN.fullmatch(line)
 
 
-def match_category_line(
+def match_section_line(
         line: str,
     ) -> typing.Optional[re.Match]:
     """
-        カテゴリ行としてマッチさせる.
+        セクション行としてマッチさせる.
 
         Arguments
         ---------
@@ -113,120 +500,3722 @@ def match_category_line(
         Returns
         -------
         typing.Optional[re.Match]
-            line がカテゴリ行の場合はマッチ結果.
+            line がセクション行の場合はマッチ結果.
             マッチしなかった場合は None.
     """
-    pattern = re.compile('\[\[Category:(.+?)(:?\|.+)?\]\]')
-    return pattern.fullmatch(line)
+    return SECTION_LINE_PATTERN.fullmatch(line)
+
+
+def match_file_references(
+        line: str,
+    ) -> typing.Iterable[re.Match]:
+    """
+        行に含まれるファイル参照をマッチさせる.
+
+        Arguments
+        ---------
+        line : str
+            行データ.
+
+        Returns
+        -------
+        typing.Iterable[re.Match]
+            ファイル参照のマッチ結果 (出現順).
+            '[[ファイル:' を含まない行は正規表現を適用せず, 空のタプルを返す.
+    """
+    if '[[ファイル:' not in line:
+        return ()
+    return FILE_REFERENCE_PATTERN.finditer(line)
+
+
+# 走査イベントの種類.
+SCAN_EVENT_CATEGORY = 'category'
+SCAN_EVENT_SECTION = 'section'
+SCAN_EVENT_FILE = 'file'
+
+
+def scan_lines(
+        lines: typing.Iterable[str],
+    ) -> typing.Iterator[typing.Tuple[str, re.Match]]:
+    """
+        行を 1 回だけ走査し, カテゴリ行, セクション行, ファイル参照を検出する.
+
+        正規表現を適用する前に先頭文字や部分文字列で候補を絞り込むため,
+        いずれにも該当しない大部分の行は正規表現を通らない.
+
+        Arguments
+        ---------
+        lines : typing.Iterable[str]
+            行データ.
+
+        Returns
+        -------
+        typing.Iterator[typing.Tuple[str, re.Match]]
+            (イベントの種類, マッチ結果) を出現順に返すイテレータ.
+            イベントの種類は SCAN_EVENT_CATEGORY, SCAN_EVENT_SECTION,
+            SCAN_EVENT_FILE のいずれか.
+    """
+    for line in lines:
+        if not line:
+            continue
+        head = line[0]
+        if head == '[' and line.startswith('[[Category:'):
+            match = CATEGORY_LINE_PATTERN.fullmatch(line)
+            if match:
+                yield SCAN_EVENT_CATEGORY, match
+        elif head == '=':
+            match = SECTION_LINE_PATTERN.fullmatch(line)
+            if match:
+                yield SCAN_EVENT_SECTION, match
+        for match in match_file_references(line):
+            yield SCAN_EVENT_FILE, match
+
+
+class ScanLinesTestCase(unittest.TestCase):
+    """
+        scan_lines() のテストケース.
+    """
+
+    def test(self):
+        lines = [
+            '',
+            '本文',
+            '== 歴史 ==',
+            '=== 古代 ===',
+            '[[ファイル:A.png|thumb|説明]]',
+            '本文 [[ファイル:B.png|thumb]]',
+            '[[Category:国]]',
+            '[[Category:島国|くに]]',
+            '[[記事名]]',
+            '=不正=',
+        ]
+        events = [
+            (kind, match.group(0))
+            for kind, match in scan_lines(lines)
+        ]
+        self.assertEqual([
+            (SCAN_EVENT_SECTION, '== 歴史 =='),
+            (SCAN_EVENT_SECTION, '=== 古代 ==='),
+            (SCAN_EVENT_FILE, '[[ファイル:A.png|thumb|説明]]'),
+            (SCAN_EVENT_FILE, '[[ファイル:B.png|thumb]]'),
+            (SCAN_EVENT_CATEGORY, '[[Category:国]]'),
+            (SCAN_EVENT_CATEGORY, '[[Category:島国|くに]]'),
+        ], events)
+
+    def test_consistent_with_match_functions(self):
+        lines = [
+            '[[Category:国]]',
+            ' [[Category:国]]',
+            '== 歴史 ==',
+            '==歴史==',
+        ]
+        kinds = dict(
+            (match.string, kind)
+            for kind, match in scan_lines(lines)
+        )
+        for line in lines:
+            self.assertEqual(
+                match_category_line(line) is not None,
+                kinds.get(line) == SCAN_EVENT_CATEGORY)
+            self.assertEqual(
+                match_section_line(line) is not None,
+                kinds.get(line) == SCAN_EVENT_SECTION)
+
+
+class CorpusScanResult(typing.NamedTuple):
+    """
+        IncrementalExtractor.scan_result() の結果.
+    """
+
+    # カテゴリ行の集合.
+    category_lines: typing.Set[str]
+
+    # カテゴリ名の集合.
+    category_names: typing.Set[str]
+
+    # セクションの (レベル, 名前) の集合.
+    sections: typing.Set[typing.Tuple[int, str]]
+
+    # 参照されているメディアファイル名のリスト (出現順).
+    file_names: typing.List[str]
+
+
+@functools.lru_cache(maxsize=None)
+def _corpus_extractor() -> 'IncrementalExtractor':
+    """
+        本章で扱うドキュメントで更新した IncrementalExtractor を返す.
+
+        prepare_corpus() で保存したマニフェストから追加・変更された記事だけを
+        走査し, 同じプロセス内では以降の呼び出しで結果を使い回す.
+        マニフェストは保存しない.
+
+        Returns
+        -------
+        IncrementalExtractor
+            更新済みの IncrementalExtractor.
+    """
+    extractor = IncrementalExtractor(DOCUMENT_MANIFEST_PATH)
+    extractor.update(iterate_documents(DOCUMENTS_PATH))
+    return extractor
+
+
+def _corpus_artifacts() -> dict:
+    """
+        本章で扱うドキュメントから作成し, ファイルに保存するデータを返す.
+
+        Returns
+        -------
+        dict
+            キーがファイルのパス, 値が (作成する関数, 読み込む関数) である辞書.
+    """
+    return {
+        INVERTED_INDEX_PATH: (
+            lambda: InvertedIndex.from_extractions(
+                _corpus_extractor().extractions()),
+            InvertedIndex.load,
+        ),
+        FULL_TEXT_INDEX_PATH: (
+            lambda: FullTextIndex.from_documents(
+                iterate_documents(DOCUMENTS_PATH)),
+            FullTextIndex.load,
+        ),
+        SECTION_INDEX_PATH: (
+            lambda: SectionIndex.from_documents(
+                iterate_documents(DOCUMENTS_PATH)),
+            SectionIndex.load,
+        ),
+        INFOBOX_TABLE_PATH: (
+            lambda: InfoboxTable.from_documents(
+                iterate_documents(DOCUMENTS_PATH),
+                BasicInformationCache(BASIC_INFORMATION_CACHE_PATH)),
+            InfoboxTable.load,
+        ),
+        SUFFIX_ARRAY_PATH: (
+            lambda: SuffixArrayIndex.from_documents(
+                iterate_documents(DOCUMENTS_PATH)),
+            SuffixArrayIndex.load,
+        ),
+        LINK_GRAPH_PATH: (
+            lambda: LinkGraph.from_documents(
+                iterate_documents(DOCUMENTS_PATH)),
+            LinkGraph.load,
+        ),
+    }
+
+
+@functools.lru_cache(maxsize=None)
+def _corpus_artifact(
+        file_path: str,
+    ) -> typing.Any:
+    """
+        本章で扱うドキュメントから作成したデータを返す.
+
+        prepare_corpus() で保存したファイルが現在のダンプから作成されたもので
+        あれば読み込み, そうでなければ (保存せずに) 作成する.
+
+        Arguments
+        ---------
+        file_path : str
+            _corpus_artifacts() に含まれるファイルのパス.
+
+        Returns
+        -------
+        typing.Any
+            作成したデータ.
+    """
+    build, load = _corpus_artifacts()[file_path]
+    if _corpus_extractor().is_current(file_path):
+        return load(file_path)
+    return build()
+
+
+def prepare_corpus() -> None:
+    """
+        本章で扱うドキュメントのマニフェストとインデックスを更新し, 保存する.
+
+        prepare-data.sh から呼び出す. ダンプが変わっていないファイルは作成し
+        直さない. 各課題はこれらのファイルを読み込むだけで保存しない.
+    """
+    extractor = _corpus_extractor()
+    for file_path, (build, _) in _corpus_artifacts().items():
+        if not extractor.is_current(file_path):
+            build().save(file_path)
+            extractor.record(file_path)
+    extractor.save()
+
+
+@functools.lru_cache(maxsize=None)
+def _scan_corpus() -> CorpusScanResult:
+    """
+        本章で扱うドキュメントを走査した結果を返す.
+
+        Returns
+        -------
+        CorpusScanResult
+            走査結果.
+    """
+    return _corpus_extractor().scan_result()
+
+
+# セクション木を保存するパス.
+SECTION_INDEX_PATH = 'data/jawiki-country.sections.json'
+
+
+class Section(typing.NamedTuple):
+    """
+        記事のセクション.
+
+        オフセットは記事本文 (str) の文字単位の位置で,
+        text[section.body_start:section.end] がサブセクションを含む本文になる.
+    """
+
+    # レベル (見出しの '=' の数).
+    level: int
+
+    # セクション名.
+    name: str
+
+    # 見出し行の開始位置.
+    start: int
+
+    # 見出し行の直後 (本文の開始位置).
+    body_start: int
+
+    # セクションの終了位置 (次の同じレベル以上の見出し行, または本文の末尾).
+    end: int
+
+    # サブセクションのタプル.
+    children: typing.Tuple['Section', ...]
+
+    def to_json(self) -> list:
+        """
+            JSON として保存できるリストに変換する.
+
+            Returns
+            -------
+            list
+                [level, name, start, body_start, end, children] のリスト.
+        """
+        return [*self[:5], [child.to_json() for child in self.children]]
+
+    @classmethod
+    def from_json(
+            cls,
+            value: list,
+        ) -> 'Section':
+        """
+            to_json() で変換したリストから復元する.
+
+            Arguments
+            ---------
+            value : list
+                to_json() で変換したリスト.
+
+            Returns
+            -------
+            Section
+                セクション.
+        """
+        *fields, children = value
+        return cls(*fields, tuple(map(cls.from_json, children)))
+
+
+def sections_from_text(
+        text: str,
+    ) -> typing.List[Section]:
+    """
+        記事本文を 1 回だけ走査し, セクションの木を作成する.
+
+        Arguments
+        ---------
+        text : str
+            記事本文.
+
+        Returns
+        -------
+        typing.List[Section]
+            最上位のセクションのリスト.
+
+        Examples
+        --------
+        >>> text = '概要\\n== 歴史 ==\\n古代\\n=== 近代 ===\\n近代史\\n== 地理 ==\\n'
+        >>> for section in sections_from_text(text):
+        ...     print(section.name, repr(text[section.body_start:section.end]))
+        ...     for child in section.children:
+        ...         print(' ', child.name, repr(text[child.body_start:child.end]))
+        歴史 '古代\\n=== 近代 ===\\n近代史\\n'
+          近代 '近代史\\n'
+        地理 ''
+    """
+    # 最上位のセクションを受け取る番兵を置く.
+    # 各要素は [level, name, start, body_start, children].
+    stack = [[0, None, 0, 0, []]]
+
+    def close(end):
+        level, name, start, body_start, children = stack.pop()
+        section = Section(level, name, start, body_start, end, tuple(children))
+        stack[-1][4].append(section)
+
+    offset = 0
+    for line in text.splitlines(keepends=True):
+        start, offset = offset, offset + len(line)
+        if line[0] != '=':
+            continue
+        match = match_section_line(line.splitlines()[0])
+        if not match:
+            continue
+        level = len(match[1])
+        while stack[-1][0] >= level:
+            close(start)
+        stack.append([level, match[2], start, offset, []])
+
+    while len(stack) > 1:
+        close(len(text))
+    return stack[0][4]
+
+
+class SectionsFromTextTestCase(unittest.TestCase):
+    """
+        sections_from_text() のテストケース.
+    """
+
+    def test(self):
+        text = '\n'.join([
+            '{{基礎情報 国}}',
+            '== 歴史 ==',
+            '=== 古代 ===',
+            '==== 先史 ====',
+            '=== 近代 ===',
+            '== 経済 ==',
+            '==== 農業 ====',
+            '=== 工業 ===',
+            '',
+        ])
+        sections = sections_from_text(text)
+
+        def names(sections):
+            return [
+                [section.level, section.name, names(section.children)]
+                for section in sections
+            ]
+
+        self.assertEqual(
+            [
+                [2, '歴史', [[3, '古代', [[4, '先史', []]]], [3, '近代', []]]],
+                [2, '経済', [[4, '農業', []], [3, '工業', []]]],
+            ],
+            names(sections))
+
+        history, economy = sections
+        self.assertEqual('== 歴史 ==\n', text[history.start:history.body_start])
+        self.assertEqual(
+            '=== 古代 ===\n==== 先史 ====\n=== 近代 ===\n',
+            text[history.body_start:history.end])
+        self.assertEqual(len(text), economy.end)
+        self.assertEqual(
+            sections,
+            [Section.from_json(section.to_json()) for section in sections])
+
+    def test_without_sections(self):
+        self.assertEqual([], sections_from_text(''))
+        self.assertEqual([], sections_from_text('本文\n=本文=\n'))
+
+
+class SectionIndex:
+    """
+        記事ごとのセクションの木.
+
+        記事タイトルとセクション名から, 記事を走査し直さずに
+        セクションの位置を得る.
+    """
+
+    def __init__(
+            self,
+            trees: typing.Dict[str, typing.List[Section]],
+        ) -> None:
+        """
+            Arguments
+            ---------
+            trees : typing.Dict[str, typing.List[Section]]
+                キーが記事タイトル, 値が sections_from_text() の結果である辞書.
+        """
+        self.trees = trees
+
+    @classmethod
+    def from_documents(
+            cls,
+            documents: typing.Iterable[dict],
+        ) -> 'SectionIndex':
+        """
+            ドキュメントからセクションの木を作成する.
+
+            Arguments
+            ---------
+            documents : typing.Iterable[dict]
+                ドキュメント.
+
+            Returns
+            -------
+            SectionIndex
+                記事ごとのセクションの木.
+        """
+        return cls({
+            document['title']: sections_from_text(text_from_document(document))
+            for document in documents
+        })
+
+    @classmethod
+    def load(
+            cls,
+            file_path: str,
+        ) -> 'SectionIndex':
+        """
+            save() で保存したセクションの木を読み込む.
+
+            ファイルが存在しない場合は FileNotFoundError を送出する.
+
+            Arguments
+            ---------
+            file_path : str
+                ファイルのパス.
+
+            Returns
+            -------
+            SectionIndex
+                記事ごとのセクションの木.
+        """
+        with open(file_path) as file:
+            trees = json.load(file)
+        return cls({
+            title: list(map(Section.from_json, sections))
+            for title, sections in trees.items()
+        })
+
+    def save(
+            self,
+            file_path: str,
+        ) -> None:
+        """
+            セクションの木をファイルに保存する.
+
+            Arguments
+            ---------
+            file_path : str
+                ファイルのパス.
+        """
+        _save_json(file_path, {
+            title: [section.to_json() for section in sections]
+            for title, sections in self.trees.items()
+        })
+
+    def sections(self) -> typing.Iterator[Section]:
+        """
+            全ての記事のセクションを, 記事ごとに木を深さ優先でたどって生成する.
+
+            Returns
+            -------
+            typing.Iterator[Section]
+                セクションを生成するイテレータ.
+        """
+        for sections in self.trees.values():
+            stack = list(reversed(sections))
+            while stack:
+                section = stack.pop()
+                yield section
+                stack.extend(reversed(section.children))
+
+    def find(
+            self,
+            title: str,
+            name: str,
+        ) -> typing.Optional[Section]:
+        """
+            記事のセクションを名前で探す.
+
+            Arguments
+            ---------
+            title : str
+                記事タイトル.
+            name : str
+                セクション名. 同じ名前が複数ある場合は最初に現れたものを返す.
+
+            Returns
+            -------
+            typing.Optional[Section]
+                セクション. 見つからない場合は None.
+        """
+        sections = list(reversed(self.trees.get(title, [])))
+        while sections:
+            section = sections.pop()
+            if section.name == name:
+                return section
+            sections.extend(reversed(section.children))
+        return None
+
+
+class SectionIndexTestCase(unittest.TestCase):
+    """
+        SectionIndex のテストケース.
+    """
+
+    def test(self):
+        documents = [
+            {'title': '日本', 'text': '== 地理 ==\n島国\n== 歴史 ==\n=== 古代 ===\n縄文\n'},
+            {'title': 'スイス', 'text': '== 歴史 ==\n中世\n'},
+        ]
+        index = _saved_and_loaded(
+            SectionIndex.from_documents(documents), SectionIndex.load)
+
+        text = documents[0]['text']
+        section = index.find('日本', '歴史')
+        self.assertEqual('=== 古代 ===\n縄文\n', text[section.body_start:section.end])
+        section = index.find('日本', '古代')
+        self.assertEqual('縄文\n', text[section.body_start:section.end])
+        self.assertIsNone(index.find('日本', '経済'))
+        self.assertIsNone(index.find('フランス', '歴史'))
+        self.assertEqual(
+            ['地理', '歴史', '古代', '歴史'],
+            [section.name for section in index.sections()])
+
+
+class MediaReference(typing.NamedTuple):
+    """
+        記事から参照されているメディアファイル.
+    """
+
+    # 参照元の記事タイトル.
+    title: str
+
+    # 参照している行の (1 から始まる) 行番号.
+    line_number: int
+
+    # メディアファイル名.
+    file_name: str
+
+
+def media_references_from_document(
+        document: dict,
+    ) -> typing.List[MediaReference]:
+    """
+        1 件のドキュメントからメディアファイルの参照を抽出する.
+
+        Arguments
+        ---------
+        document : dict
+            ドキュメント.
+
+        Returns
+        -------
+        typing.List[MediaReference]
+            メディアファイルの参照のリスト (出現順).
+
+        Examples
+        --------
+        >>> document = {'title': 'A', 'text': '本文\\n[[ファイル:A.png|thumb]]'}
+        >>> media_references_from_document(document)
+        [MediaReference(title='A', line_number=2, file_name='A.png')]
+    """
+    title = document['title']
+    lines = text_from_document(document).splitlines()
+    return [
+        MediaReference(title, line_number, match[1])
+        for line_number, line in enumerate(lines, 1)
+        for match in match_file_references(line)
+    ]
+
+
+def iterate_media_references(
+        documents: typing.Iterable[dict],
+        processes: typing.Optional[int]=None,
+    ) -> typing.Iterator[MediaReference]:
+    """
+        ドキュメントを 1 件ずつ処理し, メディアファイルの参照を生成する.
+
+        記事を連結せずに記事ごとに抽出するため, 記事の境界をまたいだ誤検出が
+        なく, 参照元の記事も分かる.
+
+        Arguments
+        ---------
+        documents : typing.Iterable[dict]
+            ドキュメント.
+        processes : typing.Optional[int]
+            並列に処理するプロセス数. None の場合は並列化しない.
+            並列化した場合もドキュメントの順序は保たれる.
+
+        Returns
+        -------
+        typing.Iterator[MediaReference]
+            メディアファイルの参照を出現順に生成するイテレータ.
+    """
+    if processes is None:
+        for document in documents:
+            yield from media_references_from_document(document)
+    else:
+        with multiprocessing.Pool(processes) as pool:
+            results = pool.imap(
+                media_references_from_document, documents, chunksize=8)
+            for references in results:
+                yield from references
+
+
+class CompactHashSet:
+    """
+        文字列そのものではなく 64 ビットのハッシュ値を保持する集合.
+
+        ハッシュ値は昇順に並べた array('Q') に 1 件 8 バイトで保持する.
+        追加したハッシュ値はいったん小さな set に溜め, 配列の大きさに比例する
+        件数を超えたらまとめて配列にマージするため, 追加のたびに配列を作り直す
+        ことはない. 異なる文字列のハッシュ値が衝突する確率は無視できるものとする.
+    """
+
+    def __init__(
+            self,
+            pending_limit: int=1024,
+        ) -> None:
+        """
+            Arguments
+            ---------
+            pending_limit : int
+                配列にマージするまでに溜めるハッシュ値の最小の件数.
+        """
+        self._hashes = array.array('Q')
+        self._pending = set()
+        self._pending_limit = pending_limit
+
+    @staticmethod
+    def _hash(
+            value: str,
+        ) -> int:
+        """
+            文字列の 64 ビットのハッシュ値を求める.
+
+            Arguments
+            ---------
+            value : str
+                文字列.
+
+            Returns
+            -------
+            int
+                ハッシュ値.
+        """
+        digest = hashlib.blake2b(value.encode(), digest_size=8).digest()
+        return int.from_bytes(digest, 'little')
+
+    def _contains_hash(
+            self,
+            hash_value: int,
+        ) -> bool:
+        """
+            ハッシュ値が含まれるかを判定する.
+        """
+        if hash_value in self._pending:
+            return True
+        i = bisect.bisect_left(self._hashes, hash_value)
+        return i < len(self._hashes) and self._hashes[i] == hash_value
+
+    def _merge(self) -> None:
+        """
+            溜めたハッシュ値を配列にマージする.
+        """
+        # 溜めた分だけを先にソートしておけば, 昇順の 2 つの並びの連結になり,
+        # Timsort は 2 つの並びを併合するだけで済む.
+        self._hashes = array.array(
+            'Q', sorted(itertools.chain(self._hashes, sorted(self._pending))))
+        self._pending.clear()
+
+    def add(
+            self,
+            value: str,
+        ) -> bool:
+        """
+            文字列を追加する.
+
+            Arguments
+            ---------
+            value : str
+                文字列.
+
+            Returns
+            -------
+            bool
+                新しく追加した場合は True, 既に含まれていた場合は False.
+        """
+        hash_value = self._hash(value)
+        if self._contains_hash(hash_value):
+            return False
+        self._pending.add(hash_value)
+        if len(self._pending) >= max(self._pending_limit, len(self._hashes) // 8):
+            self._merge()
+        return True
+
+    def __contains__(
+            self,
+            value: str,
+        ) -> bool:
+        return self._contains_hash(self._hash(value))
+
+    def __len__(self) -> int:
+        return len(self._hashes) + len(self._pending)
+
+
+def unique_media_references(
+        references: typing.Iterable[MediaReference],
+    ) -> typing.Iterator[MediaReference]:
+    """
+        コーパス全体で, 各メディアファイルの最初の参照だけを生成する.
+
+        Arguments
+        ---------
+        references : typing.Iterable[MediaReference]
+            メディアファイルの参照.
+
+        Returns
+        -------
+        typing.Iterator[MediaReference]
+            重複を除いたメディアファイルの参照を生成するイテレータ.
+    """
+    file_names = CompactHashSet()
+    for reference in references:
+        if file_names.add(reference.file_name):
+            yield reference
+
+
+class MediaReferencesTestCase(unittest.TestCase):
+    """
+        メディアファイルの参照を抽出する処理のテストケース.
+    """
+
+    DOCUMENTS = [
+        {'title': 'A', 'text': '[[ファイル:A.png|thumb]]\n本文\n[[ファイル:B.png|thumb]]'},
+        {'title': 'B', 'text': '[[ファイル:B.png|thumb]]'},
+        # 連結すると前の記事の末尾と次の記事の先頭がつながってしまう.
+        {'title': 'C', 'text': '[[ファイル:C'},
+        {'title': 'D', 'text': '.png|thumb]]'},
+    ]
+
+    def test_iterate_media_references(self):
+        expected = [
+            MediaReference('A', 1, 'A.png'),
+            MediaReference('A', 3, 'B.png'),
+            MediaReference('B', 1, 'B.png'),
+        ]
+        self.assertEqual(
+            expected,
+            list(iterate_media_references(iter(self.DOCUMENTS))))
+        self.assertEqual(
+            expected,
+            list(iterate_media_references(iter(self.DOCUMENTS), processes=2)))
+
+    def test_unique_media_references(self):
+        references = iterate_media_references(self.DOCUMENTS)
+        self.assertEqual(
+            [MediaReference('A', 1, 'A.png'), MediaReference('A', 3, 'B.png')],
+            list(unique_media_references(references)))
+
+    def test_compact_hash_set(self):
+        file_names = CompactHashSet()
+        self.assertTrue(file_names.add('A.png'))
+        self.assertFalse(file_names.add('A.png'))
+        self.assertTrue(file_names.add('B.png'))
+        self.assertIn('B.png', file_names)
+        self.assertNotIn('C.png', file_names)
+        self.assertEqual(2, len(file_names))
+
+    def test_compact_hash_set_merge(self):
+        # 配列にマージした後も, マージ前と同じように判定できる.
+        file_names = CompactHashSet(pending_limit=3)
+        values = ['{}.png'.format(i % 50) for i in range(200)]
+        added = [file_names.add(value) for value in values]
+        self.assertEqual([True] * 50 + [False] * 150, added)
+        self.assertEqual(50, len(file_names))
+        self.assertIn('49.png', file_names)
+        self.assertNotIn('50.png', file_names)
+
+
+# テンプレートの構造を成すトークンにマッチするパターン.
+TEMPLATE_TOKEN_PATTERN = re.compile(r'{{|}}|\[\[|]]|\|')
+
+
+class Template(typing.NamedTuple):
+    """
+        MediaWiki のテンプレート '{{name|param|...}}'.
+
+        入れ子のテンプレートが深い場合に文字列の複製が増えないよう,
+        各部分は位置だけを保持し, 参照時に切り出す.
+    """
+
+    # テンプレートを含むテキスト.
+    text: str
+
+    # text における '{{' の位置.
+    start: int
+
+    # text における '}}' の直後の位置.
+    end: int
+
+    # 各部分の (開始位置, 終了位置) を平坦に並べたリスト.
+    bounds: typing.List[int]
+
+    @property
+    def parts(self) -> typing.List[str]:
+        """
+            '{{' と '}}' の間を (入れ子のテンプレートや内部リンクの内側を除く)
+            '|' で区切った各部分. 先頭はテンプレート名.
+        """
+        bounds = self.bounds
+        return [
+            self.text[bounds[i]:bounds[i + 1]]
+            for i in range(0, len(bounds), 2)
+        ]
+
+    @property
+    def name(self) -> str:
+        """
+            テンプレート名.
+        """
+        return self.text[self.bounds[0]:self.bounds[1]].strip()
+
+
+def _iterate_templates(
+        text: str,
+        start: int,
+    ) -> typing.Iterator[typing.Tuple[Template, int]]:
+    """
+        text[start:] を 1 回だけ走査し, 閉じたテンプレートを順に返す.
+
+        '{{', '}}', '[[', ']]' をスタックで対応付ける.
+        入れ子のテンプレートや内部リンクの内側の '|' では区切らない.
+
+        Returns
+        -------
+        typing.Iterator[typing.Tuple[Template, int]]
+            (テンプレート, そのテンプレートを閉じた後のスタックの深さ) を
+            '}}' の出現順に返すイテレータ.
+    """
+    # 各要素は (開始位置, 区切り位置のリスト).
+    # 内部リンクの場合, 区切り位置のリストは None.
+    stack = []
+
+    for match in TEMPLATE_TOKEN_PATTERN.finditer(text, start):
+        token = match[0]
+        if token == '{{':
+            stack.append((match.start(), [match.end()]))
+        elif not stack:
+            continue
+        elif token == '|':
+            separators = stack[-1][1]
+            if separators is not None:
+                separators.append(match.start())
+                separators.append(match.end())
+        elif token == '[[':
+            stack.append((match.start(), None))
+        elif token == ']]':
+            if stack[-1][1] is None:
+                stack.pop()
+        else:
+            # '}}' は閉じていない内部リンクも閉じる.
+            while stack and stack[-1][1] is None:
+                stack.pop()
+            if not stack:
+                continue
+            template_start, separators = stack.pop()
+            separators.append(match.start())
+            template = Template(text, template_start, match.end(), separators)
+            yield template, len(stack)
+
+
+def templates_from_text(
+        text: str,
+    ) -> typing.List[Template]:
+    """
+        テキストに含まれるテンプレートを抽出する.
+
+        テキストを 1 回だけ走査し, '{{', '}}', '[[', ']]' をスタックで対応付ける.
+        入れ子のテンプレートや内部リンクの内側の '|' では区切らない.
+        対応する '}}' が無いテンプレートは抽出しない.
+
+        Arguments
+        ---------
+        text : str
+            テキスト.
+
+        Returns
+        -------
+        templates : typing.List[Template]
+            入れ子のものを含む全てのテンプレート ('}}' の出現順).
+
+        Examples
+        --------
+        >>> [template.parts for template in templates_from_text('{{a|[[b|c]]|{{d|e}}}}')]
+        [['d', 'e'], ['a', '[[b|c]]', '{{d|e}}']]
+    """
+    return [template for template, _ in _iterate_templates(text, 0)]
+
+
+class TemplatesFromTextTestCase(unittest.TestCase):
+    """
+        templates_from_text() のテストケース.
+    """
+
+    def test(self):
+        self.assertEqual([], templates_from_text(''))
+        self.assertEqual([], templates_from_text('abc'))
+        templates = templates_from_text('x{{a|b}}y')
+        self.assertEqual(
+            [(1, 8, ['a', 'b'])],
+            [(t.start, t.end, t.parts) for t in templates])
+
+        # 入れ子のテンプレートと内部リンク.
+        text = '{{a\n|k1 = [[b|c]]\n|k2 = {{d|e}}\n}}'
+        templates = templates_from_text(text)
+        self.assertEqual(2, len(templates))
+        self.assertEqual(['d', 'e'], templates[0].parts)
+        self.assertEqual('a', templates[1].name)
+        self.assertEqual(
+            ['a\n', 'k1 = [[b|c]]\n', 'k2 = {{d|e}}\n'],
+            templates[1].parts)
+        self.assertEqual(text, text[templates[1].start:templates[1].end])
+
+        # 閉じていないテンプレートや内部リンク.
+        self.assertEqual([], templates_from_text('{{a|b'))
+        templates = templates_from_text('{{a|[[b|c}}]]')
+        self.assertEqual(
+            [(0, 11, ['a', '[[b|c'])],
+            [(t.start, t.end, t.parts) for t in templates])
+        templates = templates_from_text('}}{{a}}]]')
+        self.assertEqual(
+            [(2, 7, ['a'])],
+            [(t.start, t.end, t.parts) for t in templates])
+
+    def test_hostile_input(self):
+        # 入れ子が深い場合や閉じていない場合でも線形時間で終わること.
+        n = 100000
+        self.assertEqual(n, len(templates_from_text('{{a|' * n + '}}' * n)))
+        self.assertEqual([], templates_from_text('{{a|' * n))
+
+
+def properties_from_template(
+        template: Template,
+    ) -> typing.Dict[str, str]:
+    """
+        テンプレートの名前付き引数 '|key = value' を抽出する.
+
+        Arguments
+        ---------
+        template : Template
+            テンプレート.
+
+        Returns
+        -------
+        properties : typing.Dict[str, str]
+            キーがプロパティ名, 値がプロパティ値である辞書.
+            いずれも前後の空白を除去する.
+    """
+    properties = {}
+    for part in template.parts[1:]:
+        index = part.find('=')
+        if index < 0 or '{{' in part[:index] or '[[' in part[:index]:
+            continue
+        properties[part[:index].strip()] = part[index + 1:].strip()
+    return properties
+
+
+class PropertiesFromTemplateTestCase(unittest.TestCase):
+    """
+        properties_from_template() のテストケース.
+    """
+
+    def test(self):
+        text = '{{a\n|k1 = v1 \n| k2=[[b|c]] \n|k3 = {{d|e=f}}\n|g\n|{{h|i=j}}\n}}'
+        template = templates_from_text(text)[-1]
+        self.assertEqual({
+            'k1': 'v1',
+            'k2': '[[b|c]]',
+            'k3': '{{d|e=f}}',
+        }, properties_from_template(template))
+
+
+class CleanedProperties(collections.abc.Mapping):
+    """
+        プロパティ値を参照された時点でクリーンアップする辞書.
+
+        クリーンアップの結果は保持し, 同じキーを再度参照しても再計算しない.
+    """
+
+    def __init__(
+            self,
+            properties: typing.Dict[str, str],
+            clean: typing.Callable[[str], str],
+        ) -> None:
+        """
+            Arguments
+            ---------
+            properties : typing.Dict[str, str]
+                クリーンアップ前のプロパティ.
+            clean : typing.Callable[[str], str]
+                プロパティ値をクリーンアップする関数.
+        """
+        self._properties = properties
+        self._clean = clean
+        self._cleaned = {}
+
+    def __getitem__(self, key: str) -> str:
+        try:
+            return self._cleaned[key]
+        except KeyError:
+            value = self._clean(self._properties[key])
+            self._cleaned[key] = value
+            return value
+
+    def __iter__(self) -> typing.Iterator[str]:
+        return iter(self._properties)
+
+    def __len__(self) -> int:
+        return len(self._properties)
+
+    def __repr__(self) -> str:
+        return '{}({!r})'.format(type(self).__name__, dict(self))
+
+
+class CleanedPropertiesTestCase(unittest.TestCase):
+    """
+        CleanedProperties のテストケース.
+    """
+
+    def test(self):
+        cleaned_values = []
+
+        def clean(value):
+            cleaned_values.append(value)
+            return value.upper()
+
+        properties = CleanedProperties({'a': 'x', 'b': 'y'}, clean)
+        self.assertEqual(['a', 'b'], list(properties))
+        self.assertEqual([], cleaned_values)
+
+        self.assertEqual('X', properties['a'])
+        self.assertEqual('X', properties['a'])
+        self.assertEqual(['x'], cleaned_values)
+
+        self.assertEqual({'a': 'X', 'b': 'Y'}, dict(properties))
+        self.assertEqual(['x', 'y'], cleaned_values)
+
+        with self.assertRaises(KeyError):
+            properties['c']
+
+
+class CleanupCacheInfo(typing.NamedTuple):
+    """
+        MemoizedCleanup のキャッシュの統計情報.
+    """
+
+    # キャッシュから結果を返した回数.
+    hits: int
+
+    # クリーンアップを実行した回数.
+    misses: int
+
+    # キャッシュしている値の数.
+    count: int
+
+    # キャッシュしている値と結果の合計の文字数.
+    size: int
+
+    # size の上限.
+    max_size: int
+
+
+class MemoizedCleanup:
+    """
+        プロパティ値のクリーンアップ結果を LRU でキャッシュする関数.
+
+        キャッシュの大きさは値と結果の合計の文字数で制限し, 上限を超えた場合は
+        最も長く参照されていないものから破棄する. 上限より長い値はキャッシュし
+        ない.
+
+        Examples
+        --------
+        >>> clean = MemoizedCleanup(markdown, max_size=100)
+        >>> clean('[[共和制]]'), clean('[[共和制]]')
+        ('共和制', '共和制')
+        >>> clean.cache_info()
+        CleanupCacheInfo(hits=1, misses=1, count=1, size=10, max_size=100)
+    """
+
+    def __init__(
+            self,
+            clean: typing.Callable[[str], str],
+            max_size: int=1 << 20,
+        ) -> None:
+        """
+            Arguments
+            ---------
+            clean : typing.Callable[[str], str]
+                プロパティ値をクリーンアップする関数.
+            max_size : int
+                キャッシュする値と結果の合計の文字数の上限.
+        """
+        self._clean = clean
+        self._max_size = max_size
+        self._cache = collections.OrderedDict()
+        self._size = 0
+        self._hits = 0
+        self._misses = 0
+
+    def __call__(self, value: str) -> str:
+        cache = self._cache
+        try:
+            cleaned = cache[value]
+        except KeyError:
+            pass
+        else:
+            cache.move_to_end(value)
+            self._hits += 1
+            return cleaned
+
+        self._misses += 1
+        cleaned = self._clean(value)
+        size = len(value) + len(cleaned)
+        if size > self._max_size:
+            return cleaned
+
+        cache[value] = cleaned
+        self._size += size
+        while self._size > self._max_size:
+            old_value, old_cleaned = cache.popitem(last=False)
+            self._size -= len(old_value) + len(old_cleaned)
+        return cleaned
+
+    def cache_info(self) -> CleanupCacheInfo:
+        """
+            キャッシュの統計情報を返す.
+        """
+        return CleanupCacheInfo(
+            self._hits, self._misses, len(self._cache),
+            self._size, self._max_size)
+
+    def cache_clear(self) -> None:
+        """
+            キャッシュと統計情報を破棄する.
+        """
+        self._cache.clear()
+        self._size = self._hits = self._misses = 0
+
+
+class MemoizedCleanupTestCase(unittest.TestCase):
+    """
+        MemoizedCleanup のテストケース.
+    """
+
+    def test(self):
+        cleaned_values = []
+
+        def clean(value):
+            cleaned_values.append(value)
+            return value.upper()
+
+        clean = MemoizedCleanup(clean, max_size=8)
+        self.assertEqual('AA', clean('aa'))
+        self.assertEqual('BB', clean('bb'))
+        self.assertEqual('AA', clean('aa'))
+        self.assertEqual(['aa', 'bb'], cleaned_values)
+        self.assertEqual(
+            CleanupCacheInfo(hits=1, misses=2, count=2, size=8, max_size=8),
+            clean.cache_info())
+
+        # 上限を超えると最も長く参照されていない 'bb' から破棄する.
+        self.assertEqual('CC', clean('cc'))
+        self.assertEqual('AA', clean('aa'))
+        self.assertEqual('BB', clean('bb'))
+        self.assertEqual(['aa', 'bb', 'cc', 'bb'], cleaned_values)
+        self.assertEqual(8, clean.cache_info().size)
+
+        # 上限より長い値はキャッシュしない.
+        self.assertEqual('DDDDD', clean('ddddd'))
+        self.assertEqual(2, clean.cache_info().count)
+
+        clean.cache_clear()
+        self.assertEqual(
+            CleanupCacheInfo(hits=0, misses=0, count=0, size=0, max_size=8),
+            clean.cache_info())
+
+
+# 基礎情報のテンプレート名の接頭辞.
+BASIC_INFORMATION_TEMPLATE_PREFIX = '基礎情報 '
+
+
+def basic_information_from_text(
+        text: str,
+        clean: typing.Optional[typing.Callable[[str], str]]=None,
+    ) -> typing.Dict[str, typing.Mapping[str, str]]:
+    """
+        テキストから基礎情報を抽出する.
+
+        テキストから '{{基礎情報' を探し, そこから始まるテンプレートだけを走査する.
+        clean を指定した場合, プロパティ値は参照された時点でクリーンアップされる
+        ため, 本文や参照されないプロパティ値はクリーンアップしない.
+
+        Arguments
+        ---------
+        text : str
+            テキスト.
+        clean : typing.Optional[typing.Callable[[str], str]]
+            プロパティ値をクリーンアップする関数 (例えば markdown).
+            None の場合はクリーンアップしない.
+
+        Returns
+        -------
+        basic_information : typing.Dict[str, typing.Mapping[str, str]]
+            キーに基礎情報の名称, 値に基礎情報のプロパティ情報.
+            プロパティ情報はキーがプロパティ名, 値がプロパティ値である辞書.
+    """
+    basic_information = {}
+    marker = '{{' + BASIC_INFORMATION_TEMPLATE_PREFIX
+    position = text.find(marker)
+
+    while position >= 0:
+        # 基礎情報が閉じるまで走査する. 閉じていない場合は末尾まで走査し,
+        # その内側で閉じた基礎情報を全て拾うため, 再走査は起こらない.
+        for template, depth in _iterate_templates(text, position):
+            name = template.name
+            if name.startswith(BASIC_INFORMATION_TEMPLATE_PREFIX):
+                name = name[len(BASIC_INFORMATION_TEMPLATE_PREFIX):].strip()
+                properties = properties_from_template(template)
+                if clean is not None:
+                    properties = CleanedProperties(properties, clean)
+                basic_information[name] = properties
+            if depth == 0:
+                position = text.find(marker, template.end)
+                break
+        else:
+            break
+    return basic_information
+
+
+class BasicInformationTestCase(unittest.TestCase):
+    """
+        basic_information_from_text() のテストケース.
+    """
+
+    @parameterized.parameterized.expand([
+        ('data/jawiki-country.イラク.txt', 44),
+        ('data/jawiki-country.カンボジア.txt', 44),
+        ('data/jawiki-country.マレーシア.txt', 46),
+        ('data/jawiki-country.セントクリストファー・ネイビス.txt', 43),
+    ])
+    def test(self, file_path, property_count):
+        text = text_from_file(file_path)
+        basic_information = basic_information_from_text(text)
+        self.assertEqual(['国'], list(basic_information))
+        self.assertEqual(property_count, len(basic_information['国']))
+
+    def test_nested_templates(self):
+        text = '{{otheruses|a}}\n' \
+               '{{基礎情報 国\n' \
+               '|略名 = 日本\n' \
+               '|首都 = [[東京都|東京]]<ref>{{Cite web|url=http://x?a=b|title=t}}</ref>\n' \
+               '|注記 = {{Reflist\n|group=注}}\n' \
+               '}}\n'
+        self.assertEqual({
+            '国': {
+                '略名': '日本',
+                '首都': '[[東京都|東京]]<ref>{{Cite web|url=http://x?a=b|title=t}}</ref>',
+                '注記': '{{Reflist\n|group=注}}',
+            },
+        }, basic_information_from_text(text))
+
+    def test_nested_template_value(self):
+        text = '{{基礎情報 国\n' \
+               '|標語 = {{lang|fr|[[Dieu et mon droit]]}}\n' \
+               '|国歌 = {{center|{{lang|en|God Save the Queen}}}}<br />神よ\n' \
+               '|位置画像 = Europe-UK.svg\n' \
+               '}}'
+        self.assertEqual({
+            '国': {
+                '標語': '{{lang|fr|[[Dieu et mon droit]]}}',
+                '国歌': '{{center|{{lang|en|God Save the Queen}}}}<br />神よ',
+                '位置画像': 'Europe-UK.svg',
+            },
+        }, basic_information_from_text(text))
+
+    def test_pipe_in_link(self):
+        text = '{{基礎情報 国\n' \
+               '|首都 = [[ロンドン|倫敦]]\n' \
+               '|国歌 = [[女王陛下万歳|a=b]]\n' \
+               '|略名 = イギリス\n' \
+               '}}'
+        self.assertEqual({
+            '国': {
+                '首都': '[[ロンドン|倫敦]]',
+                '国歌': '[[女王陛下万歳|a=b]]',
+                '略名': 'イギリス',
+            },
+        }, basic_information_from_text(text))
+
+    def test_multiline_value(self):
+        text = '{{基礎情報 国\n' \
+               '|公式国名 = {{lang|en|United Kingdom}}<br />\n' \
+               '*{{lang|gd|Rìoghachd Aonaichte}}\n' \
+               '*{{lang|cy|Teyrnas Gyfunol}}\n' \
+               '|略名 = イギリス\n' \
+               '}}'
+        self.assertEqual({
+            '国': {
+                '公式国名': '{{lang|en|United Kingdom}}<br />\n'
+                            '*{{lang|gd|Rìoghachd Aonaichte}}\n'
+                            '*{{lang|cy|Teyrnas Gyfunol}}',
+                '略名': 'イギリス',
+            },
+        }, basic_information_from_text(text))
+
+    def test_clean(self):
+        text = '"本文" {{基礎情報 国\n|略名 = "日本"\n|首都 = [[東京都|東京]]\n}}'
+        basic_information = basic_information_from_text(text, markdown)
+        self.assertEqual(
+            {'国': {'略名': '日本', '首都': '東京'}},
+            basic_information)
+
+    def test_hostile_input(self):
+        n = 10000
+        text = '{{基礎情報 国\n|a=' * n + '{{基礎情報 島\n|b=c}}'
+        self.assertEqual(
+            {'島': {'b': 'c'}},
+            basic_information_from_text(text))
+
+
+# 基礎情報の抽出処理のバージョン.
+# 抽出結果が変わる変更を行った場合は値を変え, 古いキャッシュを無効にする.
+BASIC_INFORMATION_PARSER_VERSION = 1
+
+
+# 基礎情報のキャッシュファイルのパス.
+BASIC_INFORMATION_CACHE_PATH = 'data/basic-information-cache.json'
+
+
+class BasicInformationCache:
+    """
+        記事本文のハッシュ値をキーとして基礎情報の抽出結果をキャッシュする.
+
+        キャッシュするのはクリーンアップ前のプロパティであり, クリーンアップは
+        basic_information_from_text() と同様に参照時に行う.
+        キャッシュファイルは BASIC_INFORMATION_PARSER_VERSION が異なる場合は
+        使用しない. save() では, 読み込んでから一度も参照されなかったエントリ
+        (変更前の版の記事や削除された記事のもの) を破棄する.
+    """
+
+    def __init__(
+            self,
+            cache_path: typing.Optional[str]=None,
+            version: int=BASIC_INFORMATION_PARSER_VERSION,
+        ) -> None:
+        """
+            Arguments
+            ---------
+            cache_path : typing.Optional[str]
+                キャッシュファイルのパス. None の場合はファイルに保存しない.
+            version : int
+                抽出処理のバージョン.
+        """
+        self._cache_path = cache_path
+        self._version = version
+        self._entries = {}
+        # 参照されたエントリのキー.
+        self._used_keys = set()
+        self._modified = False
+        self.hits = 0
+        self.misses = 0
+
+        if cache_path is not None:
+            cache = _load_json(cache_path, {})
+            if cache.get('version') == version:
+                self._entries = cache['entries']
+
+    def basic_information_from_text(
+            self,
+            text: str,
+            clean: typing.Optional[typing.Callable[[str], str]]=None,
+        ) -> typing.Dict[str, typing.Mapping[str, str]]:
+        """
+            テキストから基礎情報を抽出する.
+
+            引数と戻り値は basic_information_from_text() と同じ.
+            同じテキストを抽出済みの場合はキャッシュした結果 (の複製) を返す.
+        """
+        key = _fingerprint(text)
+        self._used_keys.add(key)
+        basic_information = self._entries.get(key)
+        if basic_information is None:
+            self.misses += 1
+            basic_information = basic_information_from_text(text)
+            self._entries[key] = basic_information
+            self._modified = True
+        else:
+            self.hits += 1
+
+        if clean is None:
+            # 呼び出し元が変更してもキャッシュが壊れないよう複製して返す.
+            return {
+                name: dict(properties)
+                for name, properties in basic_information.items()
+            }
+        return {
+            name: CleanedProperties(properties, clean)
+            for name, properties in basic_information.items()
+        }
+
+    def save(self) -> None:
+        """
+            キャッシュをファイルに保存する. 変更が無い場合は何もしない.
+
+            参照されなかったエントリは破棄する.
+        """
+        if len(self._used_keys) < len(self._entries):
+            self._entries = {
+                key: value
+                for key, value in self._entries.items()
+                if key in self._used_keys
+            }
+            self._modified = True
+        if self._cache_path is None or not self._modified:
+            return
+        _save_json(self._cache_path, {
+            'version': self._version,
+            'entries': self._entries,
+        })
+        self._modified = False
+
+
+class BasicInformationCacheTestCase(unittest.TestCase):
+    """
+        BasicInformationCache のテストケース.
+    """
+
+    def test(self):
+        with tempfile.TemporaryDirectory() as directory:
+            cache_path = os.path.join(directory, 'cache.json')
+            text1 = '{{基礎情報 国\n|略名 = "日本"\n}}'
+            text2 = '{{基礎情報 国\n|略名 = 米国\n}}'
+
+            cache = BasicInformationCache(cache_path)
+            self.assertEqual(
+                basic_information_from_text(text1),
+                cache.basic_information_from_text(text1))
+            cache.basic_information_from_text(text1)
+            self.assertEqual((1, 1), (cache.hits, cache.misses))
+            cache.save()
+
+            # 保存したキャッシュを使用する.
+            cache = BasicInformationCache(cache_path)
+            self.assertEqual(
+                {'国': {'略名': '日本'}},
+                cache.basic_information_from_text(text1, markdown))
+            self.assertEqual(
+                {'国': {'略名': '米国'}},
+                cache.basic_information_from_text(text2))
+            self.assertEqual((1, 1), (cache.hits, cache.misses))
+            cache.save()
+
+            # 参照されなかったエントリ (text1) は保存時に破棄する.
+            cache = BasicInformationCache(cache_path)
+            cache.basic_information_from_text(text2)
+            cache.save()
+            cache = BasicInformationCache(cache_path)
+            cache.basic_information_from_text(text1)
+            cache.basic_information_from_text(text2)
+            self.assertEqual((1, 1), (cache.hits, cache.misses))
+
+            # バージョンが異なる場合は使用しない.
+            cache = BasicInformationCache(cache_path, version=0)
+            cache.basic_information_from_text(text1)
+            self.assertEqual((0, 1), (cache.hits, cache.misses))
+
+    def test_copy(self):
+        text = '{{基礎情報 国\n|略名 = 日本\n}}'
+        cache = BasicInformationCache()
+        cache.basic_information_from_text(text)['国']['略名'] = '変更'
+        self.assertEqual(
+            {'国': {'略名': '日本'}},
+            cache.basic_information_from_text(text))
+
+
+# 記事ごとの抽出処理のバージョン.
+# 抽出結果が変わる変更を行った場合は値を変え, 古いマニフェストを無効にする.
+DOCUMENT_EXTRACTION_VERSION = 2
+
+
+# 記事ごとの抽出結果を保存するマニフェストのパス.
+DOCUMENT_MANIFEST_PATH = 'data/jawiki-country.manifest.json'
+
+
+def extract_document(
+        text: str,
+    ) -> dict:
+    """
+        記事本文からカテゴリ, セクション, ファイル参照を抽出する.
+
+        基礎情報は BasicInformationCache が記事本文のフィンガープリントをキー
+        としてキャッシュするため, ここでは抽出しない.
+
+        Arguments
+        ---------
+        text : str
+            記事本文.
+
+        Returns
+        -------
+        extraction : dict
+            以下のキーを持つ辞書 (JSON として保存できる値のみを含む).
+
+             * 'category_lines': カテゴリ行のリスト.
+             * 'category_names': カテゴリ名のリスト.
+             * 'sections': セクションの [レベル, 名前] のリスト.
+             * 'file_names': 参照されているメディアファイル名のリスト.
+    """
+    extraction = {
+        'category_lines': [],
+        'category_names': [],
+        'sections': [],
+        'file_names': [],
+    }
+    for kind, match in scan_lines(text.splitlines()):
+        if kind == SCAN_EVENT_CATEGORY:
+            extraction['category_lines'].append(match.string)
+            extraction['category_names'].append(match[1])
+        elif kind == SCAN_EVENT_SECTION:
+            extraction['sections'].append([len(match[1]), match[2]])
+        else:
+            extraction['file_names'].append(match[1])
+    return extraction
+
+
+class DumpDiff(typing.NamedTuple):
+    """
+        前回と今回のダンプの差分 (記事タイトルのリスト).
+    """
+
+    added: typing.List[str]
+
+    modified: typing.List[str]
+
+    removed: typing.List[str]
+
+    unchanged: typing.List[str]
+
+
+class IncrementalExtractor:
+    """
+        ダンプの更新時に, 追加・変更された記事だけを抽出し直す.
+
+        記事タイトルごとに本文のフィンガープリントと extract_document() の結果
+        をマニフェストに保持し, 新しいダンプと比較する. 削除された記事の
+        結果は破棄する. マニフェストは save() を呼び出した場合だけ保存する.
+
+        マニフェストには, ダンプから作成して保存したファイル (インデックス等)
+        ごとに, 作成したときのダンプのフィンガープリントも記録する.
+    """
+
+    def __init__(
+            self,
+            manifest_path: typing.Optional[str]=None,
+        ) -> None:
+        """
+            Arguments
+            ---------
+            manifest_path : typing.Optional[str]
+                マニフェストのパス. None の場合はファイルに保存しない.
+        """
+        self._manifest_path = manifest_path
+        self._version = DOCUMENT_EXTRACTION_VERSION
+        # キーが記事タイトル, 値が {'fingerprint': ..., 'extraction': ...}.
+        self._entries = {}
+        # キーがファイルのパス, 値が作成したときのダンプのフィンガープリント.
+        self._artifacts = {}
+        self._modified = False
+
+        if manifest_path is not None:
+            manifest = _load_json(manifest_path, {})
+            if manifest.get('version') == self._version:
+                self._entries = manifest['documents']
+                self._artifacts = manifest['artifacts']
+
+    def update(
+            self,
+            documents: typing.Iterable[dict],
+        ) -> DumpDiff:
+        """
+            新しいダンプでマニフェストを (メモリ上で) 更新する.
+
+            Arguments
+            ---------
+            documents : typing.Iterable[dict]
+                新しいダンプのドキュメント.
+
+            Returns
+            -------
+            DumpDiff
+                前回のダンプとの差分.
+        """
+        diff = DumpDiff([], [], [], [])
+        entries = {}
+
+        for document in documents:
+            title, text = document['title'], document['text']
+            fingerprint = _fingerprint(text)
+            entry = self._entries.get(title)
+            if entry is not None and entry['fingerprint'] == fingerprint:
+                diff.unchanged.append(title)
+            else:
+                (diff.added if entry is None else diff.modified).append(title)
+                entry = {
+                    'fingerprint': fingerprint,
+                    'extraction': extract_document(text),
+                }
+            entries[title] = entry
+
+        diff.removed.extend(title for title in self._entries if title not in entries)
+        self._entries = entries
+        if diff.added or diff.modified or diff.removed:
+            self._modified = True
+        return diff
+
+    def save(self) -> None:
+        """
+            マニフェストをファイルに保存する. 変更が無い場合は何もしない.
+        """
+        if self._manifest_path is None or not self._modified:
+            return
+        _save_json(self._manifest_path, {
+            'version': self._version,
+            'documents': self._entries,
+            'artifacts': self._artifacts,
+        })
+        self._modified = False
+
+    def fingerprint(self) -> str:
+        """
+            最後に update() したダンプのフィンガープリントを求める.
+
+            Returns
+            -------
+            str
+                記事タイトルと本文のフィンガープリントの並びから求めた
+                フィンガープリント.
+        """
+        return _fingerprint(json.dumps([
+            [title, entry['fingerprint']]
+            for title, entry in self._entries.items()
+        ], ensure_ascii=False))
+
+    def is_current(
+            self,
+            file_path: str,
+        ) -> bool:
+        """
+            ファイルが最後に update() したダンプから作成されたものかを判定する.
+
+            Arguments
+            ---------
+            file_path : str
+                ファイルのパス.
+
+            Returns
+            -------
+            bool
+                ファイルが存在し, record() で記録したフィンガープリントが
+                現在のダンプと一致する場合は True.
+        """
+        return os.path.exists(file_path) \
+            and self._artifacts.get(file_path) == self.fingerprint()
+
+    def record(
+            self,
+            file_path: str,
+        ) -> None:
+        """
+            ファイルを最後に update() したダンプから作成したことを記録する.
+
+            Arguments
+            ---------
+            file_path : str
+                ファイルのパス.
+        """
+        self._artifacts[file_path] = self.fingerprint()
+        self._modified = True
+
+    def extractions(self) -> typing.Dict[str, dict]:
+        """
+            記事ごとの抽出結果を返す.
+
+            Returns
+            -------
+            typing.Dict[str, dict]
+                キーが記事タイトル, 値が extract_document() の結果である辞書.
+                最後に update() したダンプの順に並ぶ.
+        """
+        return {
+            title: entry['extraction']
+            for title, entry in self._entries.items()
+        }
+
+    def scan_result(self) -> CorpusScanResult:
+        """
+            記事ごとの抽出結果を集計する.
+
+            記事本文を走査し直さず, update() で抽出した結果だけを使う.
+
+            Returns
+            -------
+            CorpusScanResult
+                集計結果.
+        """
+        result = CorpusScanResult(set(), set(), set(), [])
+        for entry in self._entries.values():
+            extraction = entry['extraction']
+            result.category_lines.update(extraction['category_lines'])
+            result.category_names.update(extraction['category_names'])
+            result.sections.update(map(tuple, extraction['sections']))
+            result.file_names.extend(extraction['file_names'])
+        return result
+
+
+class IncrementalExtractorTestCase(unittest.TestCase):
+    """
+        IncrementalExtractor のテストケース.
+    """
+
+    def test(self):
+        documents = [
+            {'title': 'A', 'text': '== 歴史 ==\n[[Category:国]]'},
+            {'title': 'B', 'text': '{{基礎情報 国\n|略名 = B\n}}\n[[ファイル:B.png|thumb]]'},
+            {'title': 'C', 'text': '[[Category:島国]]'},
+        ]
+        with tempfile.TemporaryDirectory() as directory:
+            manifest_path = os.path.join(directory, 'manifest.json')
+
+            extractor = IncrementalExtractor(manifest_path)
+            self.assertEqual(
+                DumpDiff(['A', 'B', 'C'], [], [], []),
+                extractor.update(documents))
+            self.assertEqual(
+                CorpusScanResult(
+                    {'[[Category:国]]', '[[Category:島国]]'},
+                    {'国', '島国'},
+                    {(2, '歴史')},
+                    ['B.png']),
+                extractor.scan_result())
+            self.assertEqual(['B.png'], extractor.extractions()['B']['file_names'])
+
+            # マニフェストは save() を呼び出すまで保存しない.
+            self.assertFalse(os.path.exists(manifest_path))
+            extractor.save()
+            self.assertTrue(os.path.exists(manifest_path))
+
+            # 変更された記事と追加された記事だけを抽出し直す.
+            new_documents = [
+                {'title': 'A', 'text': '== 地理 ==\n[[Category:国]]'},
+                {'title': 'B', 'text': documents[1]['text']},
+                {'title': 'D', 'text': '[[Category:内陸国]]'},
+            ]
+            extractor = IncrementalExtractor(manifest_path)
+            with unittest.mock.patch.object(
+                    sys.modules[__name__],
+                    'extract_document',
+                    wraps=extract_document) as mock:
+                diff = extractor.update(new_documents)
+
+            self.assertEqual(DumpDiff(['D'], ['A'], ['C'], ['B']), diff)
+            self.assertEqual(
+                [
+                    unittest.mock.call(new_documents[0]['text']),
+                    unittest.mock.call(new_documents[2]['text']),
+                ],
+                mock.call_args_list)
+            self.assertEqual(
+                CorpusScanResult(
+                    {'[[Category:国]]', '[[Category:内陸国]]'},
+                    {'国', '内陸国'},
+                    {(2, '地理')},
+                    ['B.png']),
+                extractor.scan_result())
+            self.assertEqual(['A', 'B', 'D'], list(extractor.extractions()))
+
+    def test_is_current(self):
+        documents = [{'title': 'A', 'text': 'a'}, {'title': 'B', 'text': 'b'}]
+        with tempfile.TemporaryDirectory() as directory:
+            manifest_path = os.path.join(directory, 'manifest.json')
+            file_path = os.path.join(directory, 'index.json')
+
+            extractor = IncrementalExtractor(manifest_path)
+            extractor.update(documents)
+            extractor.record(file_path)
+            extractor.save()
+            # 記録してもファイルが無ければ作成し直す.
+            self.assertFalse(extractor.is_current(file_path))
+            _save_json(file_path, {})
+            self.assertTrue(extractor.is_current(file_path))
+
+            extractor = IncrementalExtractor(manifest_path)
+            extractor.update(documents)
+            self.assertTrue(extractor.is_current(file_path))
+            extractor.update(documents + [{'title': 'C', 'text': 'c'}])
+            self.assertFalse(extractor.is_current(file_path))
+
+
+# 転置インデックスを保存するパス.
+INVERTED_INDEX_PATH = 'data/jawiki-country.index.json'
+
+
+def _intersect_postings(
+        postings1: typing.List[int],
+        postings2: typing.List[int],
+    ) -> typing.List[int]:
+    """
+        昇順のポスティングリストの共通部分を求める.
+
+        Arguments
+        ---------
+        postings1 : typing.List[int]
+            昇順のポスティングリスト.
+        postings2 : typing.List[int]
+            昇順のポスティングリスト.
+
+        Returns
+        -------
+        typing.List[int]
+            昇順のポスティングリスト.
+
+        Examples
+        --------
+        >>> _intersect_postings([1, 3, 5, 7], [2, 3, 4, 7])
+        [3, 7]
+    """
+    intersection = []
+    i, j = 0, 0
+    while i < len(postings1) and j < len(postings2):
+        if postings1[i] < postings2[j]:
+            i += 1
+        elif postings1[i] > postings2[j]:
+            j += 1
+        else:
+            intersection.append(postings1[i])
+            i += 1
+            j += 1
+    return intersection
+
+
+def _union_postings(
+        postings1: typing.List[int],
+        postings2: typing.List[int],
+    ) -> typing.List[int]:
+    """
+        昇順のポスティングリストの和集合を求める.
+
+        Arguments
+        ---------
+        postings1 : typing.List[int]
+            昇順のポスティングリスト.
+        postings2 : typing.List[int]
+            昇順のポスティングリスト.
+
+        Returns
+        -------
+        typing.List[int]
+            昇順のポスティングリスト.
+
+        Examples
+        --------
+        >>> _union_postings([1, 3, 5], [2, 3, 6])
+        [1, 2, 3, 5, 6]
+    """
+    union = []
+    i, j = 0, 0
+    while i < len(postings1) and j < len(postings2):
+        if postings1[i] < postings2[j]:
+            union.append(postings1[i])
+            i += 1
+        elif postings1[i] > postings2[j]:
+            union.append(postings2[j])
+            j += 1
+        else:
+            union.append(postings1[i])
+            i += 1
+            j += 1
+    union.extend(postings1[i:])
+    union.extend(postings2[j:])
+    return union
+
+
+class InvertedIndex:
+    """
+        カテゴリ名とセクション名から記事を引く転置インデックス.
+
+        記事には読み込んだ順に 0 からの ID を振り, カテゴリ名・セクション名
+        ごとに記事 ID の昇順のポスティングリストを持つ. 検索語は
+        (SCAN_EVENT_CATEGORY, カテゴリ名) または (SCAN_EVENT_SECTION, セクション名)
+        のタプルで指定する.
+    """
+
+    def __init__(
+            self,
+            titles: typing.List[str],
+            postings: typing.Dict[str, typing.Dict[str, typing.List[int]]],
+        ) -> None:
+        """
+            Arguments
+            ---------
+            titles : typing.List[str]
+                記事 ID をインデックスとする記事タイトルのリスト.
+            postings : typing.Dict[str, typing.Dict[str, typing.List[int]]]
+                検索語の種類 -> 名前 -> ポスティングリスト の辞書.
+        """
+        self.titles = titles
+        self._postings = postings
+
+    @classmethod
+    def from_documents(
+            cls,
+            documents: typing.Iterable[dict],
+        ) -> 'InvertedIndex':
+        """
+            ドキュメントから転置インデックスを作成する.
+
+            Arguments
+            ---------
+            documents : typing.Iterable[dict]
+                ドキュメント.
+
+            Returns
+            -------
+            InvertedIndex
+                転置インデックス.
+        """
+        return cls.from_extractions({
+            document['title']: extract_document(document['text'])
+            for document in documents
+        })
+
+    @classmethod
+    def from_extractions(
+            cls,
+            extractions: typing.Dict[str, dict],
+        ) -> 'InvertedIndex':
+        """
+            記事ごとの extract_document() の結果から転置インデックスを作成する.
+
+            Arguments
+            ---------
+            extractions : typing.Dict[str, dict]
+                キーが記事タイトル, 値が extract_document() の結果である辞書.
+
+            Returns
+            -------
+            InvertedIndex
+                転置インデックス.
+        """
+        titles = []
+        postings = {
+            SCAN_EVENT_CATEGORY: collections.defaultdict(list),
+            SCAN_EVENT_SECTION: collections.defaultdict(list),
+        }
+        for doc_id, (title, extraction) in enumerate(extractions.items()):
+            titles.append(title)
+            names = {
+                SCAN_EVENT_CATEGORY: extraction['category_names'],
+                SCAN_EVENT_SECTION: [name for _, name in extraction['sections']],
+            }
+            for kind, kind_names in names.items():
+                # 同じ記事に同じ名前が複数回現れても 1 回だけ登録する.
+                for name in dict.fromkeys(kind_names):
+                    postings[kind][name].append(doc_id)
+        return cls(titles, {kind: dict(value) for kind, value in postings.items()})
+
+    @classmethod
+    def load(
+            cls,
+            file_path: str,
+        ) -> 'InvertedIndex':
+        """
+            save() で保存した転置インデックスを読み込む.
+
+            ファイルが存在しない場合は FileNotFoundError を送出する.
+
+            Arguments
+            ---------
+            file_path : str
+                ファイルのパス.
+
+            Returns
+            -------
+            InvertedIndex
+                転置インデックス.
+        """
+        with open(file_path) as file:
+            value = json.load(file)
+        return cls(value['titles'], value['postings'])
+
+    def save(
+            self,
+            file_path: str,
+        ) -> None:
+        """
+            転置インデックスをファイルに保存する.
+
+            Arguments
+            ---------
+            file_path : str
+                ファイルのパス.
+        """
+        _save_json(file_path, {'titles': self.titles, 'postings': self._postings})
+
+    def names(
+            self,
+            kind: str,
+        ) -> typing.List[str]:
+        """
+            登録されている名前を返す.
+
+            Arguments
+            ---------
+            kind : str
+                SCAN_EVENT_CATEGORY または SCAN_EVENT_SECTION.
+
+            Returns
+            -------
+            typing.List[str]
+                名前のリスト.
+        """
+        return list(self._postings[kind])
+
+    def postings(
+            self,
+            term: typing.Tuple[str, str],
+        ) -> typing.List[int]:
+        """
+            検索語のポスティングリストを返す.
+
+            Arguments
+            ---------
+            term : typing.Tuple[str, str]
+                (種類, 名前) のタプル.
+
+            Returns
+            -------
+            typing.List[int]
+                記事 ID の昇順のリスト. 該当する記事がなければ空のリスト.
+        """
+        kind, name = term
+        return self._postings[kind].get(name, [])
+
+    def query_and(
+            self,
+            *terms: typing.Tuple[str, str],
+        ) -> typing.List[str]:
+        """
+            全ての検索語を含む記事を返す.
+
+            Arguments
+            ---------
+            *terms : typing.Tuple[str, str]
+                (種類, 名前) のタプル.
+
+            Returns
+            -------
+            typing.List[str]
+                記事タイトルのリスト (記事 ID 順).
+        """
+        # 短いポスティングリストから順に絞り込む.
+        postings_list = sorted(map(self.postings, terms), key=len)
+        if not postings_list:
+            return []
+        doc_ids = functools.reduce(_intersect_postings, postings_list)
+        return [self.titles[doc_id] for doc_id in doc_ids]
+
+    def query_or(
+            self,
+            *terms: typing.Tuple[str, str],
+        ) -> typing.List[str]:
+        """
+            いずれかの検索語を含む記事を返す.
+
+            Arguments
+            ---------
+            *terms : typing.Tuple[str, str]
+                (種類, 名前) のタプル.
+
+            Returns
+            -------
+            typing.List[str]
+                記事タイトルのリスト (記事 ID 順).
+        """
+        doc_ids = functools.reduce(_union_postings, map(self.postings, terms), [])
+        return [self.titles[doc_id] for doc_id in doc_ids]
+
+
+class InvertedIndexTestCase(unittest.TestCase):
+    """
+        InvertedIndex のテストケース.
+    """
+
+    DOCUMENTS = [
+        {'title': 'A', 'text': '== 経済 ==\n[[Category:国]]\n[[Category:島国]]'},
+        {'title': 'B', 'text': '== 歴史 ==\n=== 経済 ===\n[[Category:国|B]]'},
+        {'title': 'C', 'text': '== 歴史 ==\n[[Category:島国]]\n[[Category:島国]]'},
+    ]
+
+    def test_query(self):
+        index = InvertedIndex.from_documents(self.DOCUMENTS)
+        category = lambda name: (SCAN_EVENT_CATEGORY, name)
+        section = lambda name: (SCAN_EVENT_SECTION, name)
+
+        self.assertEqual([0, 2], index.postings(category('島国')))
+        self.assertEqual([], index.postings(category('内陸国')))
+        self.assertEqual(['A', 'B'], index.query_and(section('経済')))
+        self.assertEqual(['A'], index.query_and(category('国'), category('島国')))
+        self.assertEqual(['B'], index.query_and(category('国'), section('歴史')))
+        self.assertEqual([], index.query_and(category('国'), category('内陸国')))
+        self.assertEqual(['A', 'B', 'C'], index.query_or(section('経済'), category('島国')))
+        self.assertEqual([], index.query_or())
+
+    def test_save_and_load(self):
+        index = InvertedIndex.from_documents(self.DOCUMENTS)
+        loaded = _saved_and_loaded(index, InvertedIndex.load)
+        self.assertEqual(index.titles, loaded.titles)
+        for kind in (SCAN_EVENT_CATEGORY, SCAN_EVENT_SECTION):
+            for name in index.names(kind):
+                term = (kind, name)
+                self.assertEqual(index.postings(term), loaded.postings(term))
+
+    def test_load_missing_file(self):
+        with tempfile.TemporaryDirectory() as directory:
+            with self.assertRaises(FileNotFoundError):
+                InvertedIndex.load(os.path.join(directory, 'index.json'))
+
+
+# 全文検索インデックスを保存するパス.
+FULL_TEXT_INDEX_PATH = 'data/jawiki-country.full-text-index.bin'
+
+
+# 全文検索インデックスのファイル形式を識別するバイト列.
+FULL_TEXT_INDEX_MAGIC = b'NLP100FTI1'
+
+
+# 全文検索インデックスで各テキストの末尾に付ける番兵.
+# 末尾の文字も bi-gram の先頭として索引付けされるようにする.
+FULL_TEXT_INDEX_SENTINEL = '\0'
+
+
+def _encode_varint(
+        value: int,
+        buffer: bytearray,
+    ) -> None:
+    """
+        非負整数を可変長バイト列 (下位 7 ビットずつ, 継続ビット付き) で追加する.
+
+        Arguments
+        ---------
+        value : int
+            非負整数.
+        buffer : bytearray
+            追加先のバッファ.
+
+        Examples
+        --------
+        >>> buffer = bytearray()
+        >>> _encode_varint(1, buffer)
+        >>> _encode_varint(300, buffer)
+        >>> bytes(buffer)
+        b'\\x01\\xac\\x02'
+    """
+    while value >= 0x80:
+        buffer.append(value & 0x7f | 0x80)
+        value >>= 7
+    buffer.append(value)
+
+
+def _decode_varints(
+        data: bytes,
+    ) -> typing.Iterator[int]:
+    """
+        _encode_varint() で追加した非負整数を順に取り出す.
+
+        Arguments
+        ---------
+        data : bytes
+            バイト列.
+
+        Returns
+        -------
+        typing.Iterator[int]
+            非負整数を生成するイテレータ.
+
+        Examples
+        --------
+        >>> list(_decode_varints(b'\\x01\\xac\\x02'))
+        [1, 300]
+    """
+    value, shift = 0, 0
+    for byte in data:
+        value |= (byte & 0x7f) << shift
+        if byte & 0x80:
+            shift += 7
+        else:
+            yield value
+            value, shift = 0, 0
+
+
+def _read_varint(
+        data: bytes,
+        offset: int,
+    ) -> typing.Tuple[int, int]:
+    """
+        バイト列の指定した位置から _encode_varint() で追加した非負整数を読む.
+
+        Arguments
+        ---------
+        data : bytes
+            バイト列.
+        offset : int
+            読み始める位置.
+
+        Returns
+        -------
+        typing.Tuple[int, int]
+            読んだ非負整数と, 次に読む位置のタプル.
+
+        Examples
+        --------
+        >>> _read_varint(b'\\x01\\xac\\x02', 1)
+        (300, 3)
+    """
+    value, shift = 0, 0
+    while True:
+        byte = data[offset]
+        offset += 1
+        value |= (byte & 0x7f) << shift
+        if not byte & 0x80:
+            return value, offset
+        shift += 7
+
+
+def _char_bigram_positions(
+        text: str,
+    ) -> typing.Dict[str, typing.List[int]]:
+    """
+        テキストの文字 bi-gram ごとに出現位置を求める.
+
+        chapter1.to_char_ngram() と同じく 1 文字ずつずらして bi-gram を作るが,
+        検索結果の位置を元のテキストと対応させるため, 記号や空白も取り除かない.
+
+        Arguments
+        ---------
+        text : str
+            テキスト.
+
+        Returns
+        -------
+        typing.Dict[str, typing.List[int]]
+            キーが文字 bi-gram, 値が出現位置の昇順のリストである辞書.
+
+        Examples
+        --------
+        >>> _char_bigram_positions('日本の日本\\0')
+        {'日本': [0, 3], '本の': [1], 'の日': [2], '本\\x00': [4]}
+    """
+    positions = collections.defaultdict(list)
+    for i in range(len(text) - 1):
+        positions[text[i:i+2]].append(i)
+    return dict(positions)
+
+
+class FullTextIndex:
+    """
+        記事本文の文字 bi-gram による全文検索インデックス.
+
+        bi-gram ごとのポスティングリストは, 記事 ID の差分, 出現回数,
+        出現位置の差分を可変長整数で並べたバイト列として保持する.
+        部分文字列の検索は, 検索語を覆う bi-gram のポスティングリストを
+        出現頻度の低い順に突き合わせて候補を絞り込み, 各 bi-gram が検索語内の
+        オフセットどおりに並ぶ位置だけを一致とする.
+    """
+
+    def __init__(
+            self,
+            titles: typing.List[str],
+            postings: typing.Dict[str, bytes],
+        ) -> None:
+        """
+            Arguments
+            ---------
+            titles : typing.List[str]
+                記事 ID をインデックスとする記事タイトルのリスト.
+            postings : typing.Dict[str, bytes]
+                キーが文字 bi-gram, 値が符号化したポスティングリストである辞書.
+        """
+        self.titles = titles
+        self._postings = postings
+        # キーが先頭の文字, 値がその文字で始まる bi-gram のリストである辞書.
+        # 1 文字の検索語で bi-gram の語彙全体を走査しないようにする.
+        self._bigrams_by_head = collections.defaultdict(list)
+        for bigram in postings:
+            self._bigrams_by_head[bigram[0]].append(bigram)
+
+    @classmethod
+    def from_documents(
+            cls,
+            documents: typing.Iterable[dict],
+        ) -> 'FullTextIndex':
+        """
+            ドキュメントから全文検索インデックスを作成する.
+
+            Arguments
+            ---------
+            documents : typing.Iterable[dict]
+                ドキュメント.
+
+            Returns
+            -------
+            FullTextIndex
+                全文検索インデックス.
+        """
+        titles = []
+        # bi-gram -> [符号化済みのバイト列, 最後に追加した記事 ID].
+        buffers = {}
+
+        for doc_id, document in enumerate(documents):
+            titles.append(document['title'])
+            text = text_from_document(document) + FULL_TEXT_INDEX_SENTINEL
+            for bigram, positions in _char_bigram_positions(text).items():
+                entry = buffers.get(bigram)
+                if entry is None:
+                    entry = buffers[bigram] = [bytearray(), -1]
+                buffer = entry[0]
+                _encode_varint(doc_id - entry[1], buffer)
+                _encode_varint(len(positions), buffer)
+                previous = 0
+                for position in positions:
+                    _encode_varint(position - previous, buffer)
+                    previous = position
+                entry[1] = doc_id
+
+        postings = {bigram: bytes(entry[0]) for bigram, entry in buffers.items()}
+        return cls(titles, postings)
+
+    @classmethod
+    def load(
+            cls,
+            file_path: str,
+        ) -> 'FullTextIndex':
+        """
+            save() で保存した全文検索インデックスを読み込む.
+
+            Arguments
+            ---------
+            file_path : str
+                ファイルのパス.
+
+            Returns
+            -------
+            FullTextIndex
+                全文検索インデックス.
+        """
+        with open(file_path, 'rb') as file:
+            data = file.read()
+        if not data.startswith(FULL_TEXT_INDEX_MAGIC):
+            raise ValueError('not a full text index: {}'.format(file_path))
+        data = zlib.decompress(data[len(FULL_TEXT_INDEX_MAGIC):])
+
+        def read_chunk(offset):
+            length, offset = _read_varint(data, offset)
+            return data[offset:offset+length], offset + length
+
+        offset = 0
+        titles, postings = [], {}
+        title_count, offset = _read_varint(data, offset)
+        for _ in range(title_count):
+            title, offset = read_chunk(offset)
+            titles.append(title.decode())
+        while offset < len(data):
+            bigram, offset = read_chunk(offset)
+            posting, offset = read_chunk(offset)
+            postings[bigram.decode()] = posting
+        return cls(titles, postings)
+
+    def save(
+            self,
+            file_path: str,
+        ) -> None:
+        """
+            全文検索インデックスをファイルに保存する.
+
+            長さ付きのタイトルと (bi-gram, ポスティングリスト) を並べ,
+            全体を zlib で圧縮する.
+
+            Arguments
+            ---------
+            file_path : str
+                ファイルのパス.
+        """
+        buffer = bytearray()
+
+        def write_chunk(chunk):
+            _encode_varint(len(chunk), buffer)
+            buffer.extend(chunk)
+
+        _encode_varint(len(self.titles), buffer)
+        for title in self.titles:
+            write_chunk(title.encode())
+        for bigram, posting in self._postings.items():
+            write_chunk(bigram.encode())
+            write_chunk(posting)
+
+        temporary_path = file_path + '.tmp'
+        with open(temporary_path, 'wb') as file:
+            file.write(FULL_TEXT_INDEX_MAGIC)
+            file.write(zlib.compress(bytes(buffer)))
+        os.replace(temporary_path, file_path)
+
+    def _decode_postings(
+            self,
+            bigram: str,
+            doc_ids: typing.Optional[typing.Set[int]]=None,
+        ) -> typing.Dict[int, typing.List[int]]:
+        """
+            bi-gram のポスティングリストを復号する.
+
+            Arguments
+            ---------
+            bigram : str
+                文字 bi-gram.
+            doc_ids : typing.Optional[typing.Set[int]]
+                復号する記事 ID の集合. None の場合は全ての記事を復号する.
+
+            Returns
+            -------
+            typing.Dict[int, typing.List[int]]
+                キーが記事 ID, 値が出現位置の昇順のリストである辞書.
+        """
+        postings = {}
+        values = _decode_varints(self._postings.get(bigram, b''))
+        doc_id = -1
+        for doc_delta in values:
+            doc_id += doc_delta
+            count = next(values)
+            if doc_ids is not None and doc_id not in doc_ids:
+                for _ in range(count):
+                    next(values)
+                continue
+            positions = []
+            position = 0
+            for _ in range(count):
+                position += next(values)
+                positions.append(position)
+            postings[doc_id] = positions
+        return postings
+
+    def find(
+            self,
+            query: str,
+        ) -> typing.Dict[str, typing.List[int]]:
+        """
+            部分文字列を検索する.
+
+            Arguments
+            ---------
+            query : str
+                検索する部分文字列. 複数の語からなるフレーズもそのまま渡す.
+
+            Returns
+            -------
+            typing.Dict[str, typing.List[int]]
+                キーが query を含む記事のタイトル, 値が記事本文中の query の
+                出現位置 (文字単位) の昇順のリストである辞書.
+        """
+        if not query:
+            raise ValueError('query must not be empty')
+        if FULL_TEXT_INDEX_SENTINEL in query:
+            return {}
+
+        if len(query) == 1:
+            # query で始まる全ての bi-gram の出現位置を合わせる.
+            matches = collections.defaultdict(list)
+            for bigram in self._bigrams_by_head.get(query, []):
+                for doc_id, positions in self._decode_postings(bigram).items():
+                    matches[doc_id].extend(positions)
+            return {
+                self.titles[doc_id]: sorted(matches[doc_id])
+                for doc_id in sorted(matches)
+            }
+
+        # 検索語を覆う bi-gram (オフセット 0, 2, 4, ... と末尾) を選ぶ.
+        offsets = list(range(0, len(query) - 1, 2))
+        if offsets[-1] != len(query) - 2:
+            offsets.append(len(query) - 2)
+        terms = sorted(
+            {(query[offset:offset+2], offset) for offset in offsets},
+            key=lambda term: len(self._postings.get(term[0], b'')))
+
+        candidates = None
+        for bigram, offset in terms:
+            postings = self._decode_postings(bigram, candidates)
+            if candidates is None:
+                # 出現位置を query の先頭の位置に揃える.
+                matches = {
+                    doc_id: set(position - offset for position in positions)
+                    for doc_id, positions in postings.items()
+                }
+            else:
+                matches = {
+                    doc_id: matches[doc_id].intersection(
+                        position - offset for position in postings[doc_id])
+                    for doc_id in candidates
+                    if doc_id in postings
+                }
+            matches = {
+                doc_id: starts
+                for doc_id, starts in matches.items()
+                if starts
+            }
+            candidates = set(matches)
+            if not candidates:
+                break
+
+        return {
+            self.titles[doc_id]: sorted(matches[doc_id])
+            for doc_id in sorted(matches)
+        }
+
+    def search(
+            self,
+            query: str,
+        ) -> typing.List[str]:
+        """
+            部分文字列を含む記事を検索する.
+
+            Arguments
+            ---------
+            query : str
+                検索する部分文字列.
+
+            Returns
+            -------
+            typing.List[str]
+                query を含む記事のタイトルのリスト (記事 ID 順).
+        """
+        return list(self.find(query))
+
+
+class FullTextIndexTestCase(unittest.TestCase):
+    """
+        FullTextIndex のテストケース.
+    """
+
+    DOCUMENTS = [
+        {'title': 'A', 'text': '日本は島国である。日本の首都は東京。'},
+        {'title': 'B', 'text': 'イギリスは島国。首都はロンドン。'},
+        {'title': 'C', 'text': 'スイスは内陸国。The capital is Bern.'},
+        {'title': 'D', 'text': ''},
+    ]
+
+    def find_by_scan(self, query):
+        matches = {}
+        for document in self.DOCUMENTS:
+            text = document['text']
+            positions = [
+                i for i in range(len(text))
+                if text.startswith(query, i)
+            ]
+            if positions:
+                matches[document['title']] = positions
+        return matches
+
+    def test_find(self):
+        index = FullTextIndex.from_documents(self.DOCUMENTS)
+        self.assertEqual({'A': [0, 9]}, index.find('日本'))
+        self.assertEqual({'B': [6], 'C': [6]}, index.find('国。'))
+        self.assertEqual(['A', 'B'], index.search('首都は'))
+        self.assertEqual(['C'], index.search('capital is'))
+        self.assertEqual({'A': [8, 17], 'B': [7, 15], 'C': [7]}, index.find('。'))
+        self.assertEqual({}, index.find('首都はパリ'))
+        self.assertEqual({}, index.find('\0'))
+        self.assertEqual({}, index.find('。\0'))
+        with self.assertRaises(ValueError):
+            index.find('')
+
+    def test_find_random(self):
+        index = FullTextIndex.from_documents(self.DOCUMENTS)
+        random_ = random.Random(0)
+        texts = [document['text'] for document in self.DOCUMENTS]
+        for _ in range(500):
+            text = random_.choice(texts) or 'x'
+            start = random_.randrange(len(text))
+            query = text[start:start + random_.randint(1, 8)]
+            if random_.random() < 0.2:
+                query += random_.choice('国はX')
+            self.assertEqual(self.find_by_scan(query), index.find(query), query)
+
+    def test_save_and_load(self):
+        index = FullTextIndex.from_documents(self.DOCUMENTS)
+        loaded = _saved_and_loaded(index, FullTextIndex.load)
+        self.assertEqual(index.titles, loaded.titles)
+        for query in ['日本', '首都は', '。', 'is Bern']:
+            self.assertEqual(index.find(query), loaded.find(query))
+
+
+# 数値として扱う基礎情報のフィールド.
+INFOBOX_NUMERIC_PROPERTIES = ('人口値', '面積値', 'GDP値', 'GDP値元', 'GDP値MER')
+
+
+# 基礎情報の表を保存するパス.
+INFOBOX_TABLE_PATH = 'data/jawiki-country.infobox.bin'
+
+
+# 基礎情報の表のファイル形式を識別するバイト列.
+INFOBOX_TABLE_MAGIC = b'NLP100IBT1'
+
+
+# 基礎情報の値の先頭の数値 ('{{0}}' による桁揃えや '約' は読み飛ばす) にマッチするパターン.
+INFOBOX_NUMBER_PATTERN = re.compile(
+    r'(?:\{\{0\}\}|約|\s)*'
+    r'(?P<number>[0-9][0-9,]*(?:\.[0-9]+)?)\s*(?P<unit>[兆億万]?)')
+
+
+# 数値の単位.
+INFOBOX_NUMBER_UNITS = {'': 1, '万': 10**4, '億': 10**8, '兆': 10**12}
+
+
+def number_from_property(
+        value: str,
+    ) -> typing.Optional[float]:
+    """
+        基礎情報の値の先頭の数値を取り出す.
+
+        '2兆3,162億' のように単位付きの数値が続く場合は合計する.
+
+        Arguments
+        ---------
+        value : str
+            基礎情報の値.
+
+        Returns
+        -------
+        typing.Optional[float]
+            数値. 値が数値で始まらない場合は None.
+
+        Examples
+        --------
+        >>> number_from_property('63,181,775<ref>...</ref>')
+        63181775.0
+        >>> number_from_property('{{0}}2兆3,162億')
+        2316200000000.0
+        >>> number_from_property('約1億2,000万人')
+        120000000.0
+        >>> number_from_property('不明') is None
+        True
+    """
+    number = None
+    position = 0
+    while True:
+        match = INFOBOX_NUMBER_PATTERN.match(value, position)
+        if not match:
+            break
+        digits = float(match['number'].replace(',', ''))
+        number = (number or 0) + digits * INFOBOX_NUMBER_UNITS[match['unit']]
+        position = match.end()
+        # 単位のない数値の後には続きがないものとする.
+        if not match['unit']:
+            break
+    return number
+
+
+class InfoboxColumn(typing.NamedTuple):
+    """
+        InfoboxTable の列.
+    """
+
+    # 値がない行のビットを立てたビットマップ.
+    nulls: bytearray
+
+    # 値のリスト (文字列の列) または array.array('d') (数値の列).
+    # 値がない行は '' または NaN になる.
+    values: typing.Union[typing.List[str], array.array]
+
+
+class InfoboxTable:
+    """
+        全ての記事の基礎情報を列ごとに格納した表.
+
+        基礎情報のフィールドごとに文字列の列を持ち, INFOBOX_NUMERIC_PROPERTIES の
+        フィールドは数値に変換した列 (array.array('d')) も持つ. 値がない行は
+        列ごとのビットマップで表す.
+    """
+
+    def __init__(
+            self,
+            titles: typing.List[str],
+            strings: typing.Dict[str, InfoboxColumn],
+            numbers: typing.Dict[str, InfoboxColumn],
+        ) -> None:
+        """
+            Arguments
+            ---------
+            titles : typing.List[str]
+                行番号をインデックスとする記事タイトルのリスト.
+            strings : typing.Dict[str, InfoboxColumn]
+                フィールド名から文字列の列への辞書.
+            numbers : typing.Dict[str, InfoboxColumn]
+                フィールド名から数値の列への辞書.
+        """
+        self.titles = titles
+        self._strings = strings
+        self._numbers = numbers
+
+    @classmethod
+    def from_documents(
+            cls,
+            documents: typing.Iterable[dict],
+            cache: typing.Optional[BasicInformationCache]=None,
+        ) -> 'InfoboxTable':
+        """
+            ドキュメントの基礎情報から表を作成する.
+
+            Arguments
+            ---------
+            documents : typing.Iterable[dict]
+                ドキュメント.
+            cache : typing.Optional[BasicInformationCache]
+                基礎情報の抽出結果のキャッシュ.
+                None の場合はキャッシュファイルを使わずに抽出する.
+
+            Returns
+            -------
+            InfoboxTable
+                基礎情報の表.
+        """
+        cache = cache or BasicInformationCache()
+        titles = []
+        rows = []
+        for document in documents:
+            basic_information = \
+                cache.basic_information_from_text(text_from_document(document))
+            # 複数の基礎情報がある場合は先に現れた値を優先する.
+            row = {}
+            for properties in basic_information.values():
+                for key, value in properties.items():
+                    row.setdefault(key, value)
+            titles.append(document['title'])
+            rows.append(row)
+
+        size = len(rows)
+        names = list(dict.fromkeys(key for row in rows for key in row))
+        strings = {}
+        for name in names:
+            column = InfoboxColumn(_null_bitmap(size), [])
+            for i, row in enumerate(rows):
+                value = row.get(name)
+                if value is None:
+                    _set_bit(column.nulls, i)
+                column.values.append(value or '')
+            strings[name] = column
+
+        numbers = {}
+        for name in INFOBOX_NUMERIC_PROPERTIES:
+            column = InfoboxColumn(_null_bitmap(size), array.array('d'))
+            for i, row in enumerate(rows):
+                number = number_from_property(row.get(name, ''))
+                if number is None:
+                    _set_bit(column.nulls, i)
+                    number = math.nan
+                column.values.append(number)
+            numbers[name] = column
+
+        return cls(titles, strings, numbers)
+
+    @classmethod
+    def load(
+            cls,
+            file_path: str,
+        ) -> 'InfoboxTable':
+        """
+            save() で保存した表を読み込む.
+
+            Arguments
+            ---------
+            file_path : str
+                ファイルのパス.
+
+            Returns
+            -------
+            InfoboxTable
+                基礎情報の表.
+        """
+        with open(file_path, 'rb') as file:
+            data = file.read()
+        if not data.startswith(INFOBOX_TABLE_MAGIC):
+            raise ValueError('not an infobox table: {}'.format(file_path))
+        data = zlib.decompress(data[len(INFOBOX_TABLE_MAGIC):])
+
+        offset = 0
+
+        def read_chunk():
+            nonlocal offset
+            length, offset = _read_varint(data, offset)
+            offset += length
+            return data[offset-length:offset]
+
+        def read_count():
+            nonlocal offset
+            count, offset = _read_varint(data, offset)
+            return count
+
+        size = read_count()
+        titles = [read_chunk().decode() for _ in range(size)]
+
+        strings = {}
+        for _ in range(read_count()):
+            name = read_chunk().decode()
+            nulls = bytearray(read_chunk())
+            values = [read_chunk().decode() for _ in range(size)]
+            strings[name] = InfoboxColumn(nulls, values)
+
+        numbers = {}
+        for _ in range(read_count()):
+            name = read_chunk().decode()
+            nulls = bytearray(read_chunk())
+            values = array.array('d', read_chunk())
+            if sys.byteorder != 'little':
+                values.byteswap()
+            numbers[name] = InfoboxColumn(nulls, values)
+
+        return cls(titles, strings, numbers)
+
+    def save(
+            self,
+            file_path: str,
+        ) -> None:
+        """
+            表をファイルに保存する.
+
+            行数, 記事タイトル, 文字列の列, 数値の列 (リトルエンディアンの
+            倍精度浮動小数点数) を長さ付きで並べ, 全体を zlib で圧縮する.
+
+            Arguments
+            ---------
+            file_path : str
+                ファイルのパス.
+        """
+        buffer = bytearray()
+
+        def write_chunk(chunk):
+            _encode_varint(len(chunk), buffer)
+            buffer.extend(chunk)
+
+        _encode_varint(len(self.titles), buffer)
+        for title in self.titles:
+            write_chunk(title.encode())
+
+        _encode_varint(len(self._strings), buffer)
+        for name, column in self._strings.items():
+            write_chunk(name.encode())
+            write_chunk(column.nulls)
+            for value in column.values:
+                write_chunk(value.encode())
+
+        _encode_varint(len(self._numbers), buffer)
+        for name, column in self._numbers.items():
+            write_chunk(name.encode())
+            write_chunk(column.nulls)
+            values = array.array('d', column.values)
+            if sys.byteorder != 'little':
+                values.byteswap()
+            write_chunk(values.tobytes())
+
+        temporary_path = file_path + '.tmp'
+        with open(temporary_path, 'wb') as file:
+            file.write(INFOBOX_TABLE_MAGIC)
+            file.write(zlib.compress(bytes(buffer)))
+        os.replace(temporary_path, file_path)
+
+    def __len__(self) -> int:
+        return len(self.titles)
+
+    def column_names(self) -> typing.List[str]:
+        """
+            文字列の列のフィールド名を返す.
+
+            Returns
+            -------
+            typing.List[str]
+                フィールド名のリスト (最初に現れた順).
+        """
+        return list(self._strings)
+
+    def _column(
+            self,
+            name: str,
+        ) -> InfoboxColumn:
+        """
+            列を返す. 数値の列があればそちらを優先する.
+
+            Arguments
+            ---------
+            name : str
+                フィールド名.
+
+            Returns
+            -------
+            InfoboxColumn
+                列.
+        """
+        column = self._numbers.get(name) or self._strings.get(name)
+        if column is None:
+            raise KeyError(name)
+        return column
+
+    def is_null(
+            self,
+            name: str,
+            row: int,
+        ) -> bool:
+        """
+            値がないかどうかを返す.
+
+            Arguments
+            ---------
+            name : str
+                フィールド名.
+            row : int
+                行番号.
+
+            Returns
+            -------
+            bool
+                値がない場合は True.
+        """
+        return _test_bit(self._column(name).nulls, row)
+
+    def values(
+            self,
+            name: str,
+        ) -> typing.List[typing.Optional[str]]:
+        """
+            文字列の列の値を返す.
+
+            Arguments
+            ---------
+            name : str
+                フィールド名.
+
+            Returns
+            -------
+            typing.List[typing.Optional[str]]
+                行ごとの値のリスト. 値がない行は None.
+        """
+        column = self._strings[name]
+        return [
+            None if _test_bit(column.nulls, row) else value
+            for row, value in enumerate(column.values)
+        ]
+
+    def numbers(
+            self,
+            name: str,
+        ) -> array.array:
+        """
+            数値の列を返す.
+
+            Arguments
+            ---------
+            name : str
+                INFOBOX_NUMERIC_PROPERTIES のいずれか.
+
+            Returns
+            -------
+            array.array
+                行ごとの値の配列 (typecode 'd'). 値がない行は NaN.
+        """
+        return self._numbers[name].values
+
+    def order_by(
+            self,
+            name: str,
+            descending: bool=False,
+        ) -> typing.List[typing.Tuple[str, typing.Any]]:
+        """
+            値がある行を値の順に並べる.
+
+            Arguments
+            ---------
+            name : str
+                フィールド名. 数値の列があれば数値で比較する.
+            descending : bool
+                True の場合は降順に並べる.
+
+            Returns
+            -------
+            typing.List[typing.Tuple[str, typing.Any]]
+                (記事タイトル, 値) のリスト.
+        """
+        column = self._column(name)
+        rows = [
+            row for row in range(len(self))
+            if not _test_bit(column.nulls, row)
+        ]
+        rows.sort(key=column.values.__getitem__, reverse=descending)
+        return [(self.titles[row], column.values[row]) for row in rows]
+
+    def where(
+            self,
+            name: str,
+            predicate: typing.Callable[[typing.Any], bool],
+        ) -> typing.List[str]:
+        """
+            値が条件を満たす行の記事タイトルを返す.
+
+            Arguments
+            ---------
+            name : str
+                フィールド名. 数値の列があれば数値を predicate に渡す.
+            predicate : typing.Callable[[typing.Any], bool]
+                値を受け取り, 条件を満たすかどうかを返す関数.
+
+            Returns
+            -------
+            typing.List[str]
+                記事タイトルのリスト (行番号順). 値がない行は含まない.
+        """
+        column = self._column(name)
+        return [
+            self.titles[row]
+            for row, value in enumerate(column.values)
+            if not _test_bit(column.nulls, row) and predicate(value)
+        ]
+
+
+def _null_bitmap(
+        size: int,
+    ) -> bytearray:
+    """
+        全てのビットが 0 のビットマップを作成する.
+
+        Arguments
+        ---------
+        size : int
+            ビット数.
+
+        Returns
+        -------
+        bytearray
+            ビットマップ.
+    """
+    return bytearray((size + 7) // 8)
+
+
+def _set_bit(
+        bitmap: bytearray,
+        index: int,
+    ) -> None:
+    """
+        ビットマップのビットを立てる.
+
+        Arguments
+        ---------
+        bitmap : bytearray
+            ビットマップ.
+        index : int
+            ビットの位置.
+    """
+    bitmap[index >> 3] |= 1 << (index & 7)
+
+
+def _test_bit(
+        bitmap: bytearray,
+        index: int,
+    ) -> bool:
+    """
+        ビットマップのビットが立っているかどうかを返す.
+
+        Arguments
+        ---------
+        bitmap : bytearray
+            ビットマップ.
+        index : int
+            ビットの位置.
+
+        Returns
+        -------
+        bool
+            ビットが立っている場合は True.
+    """
+    return bool(bitmap[index >> 3] >> (index & 7) & 1)
+
+
+class InfoboxTableTestCase(unittest.TestCase):
+    """
+        InfoboxTable のテストケース.
+    """
+
+    DOCUMENTS = [
+        {'title': 'A', 'text': '{{基礎情報 国\n|略名 = A\n|人口値 = 1,000<ref>x</ref>\n|面積値 = 50\n}}'},
+        {'title': 'B', 'text': '{{基礎情報 国\n|略名 = B\n|人口値 = 約2億\n|GDP値 = 1兆2,000億\n}}'},
+        {'title': 'C', 'text': '本文'},
+        {'title': 'D', 'text': '{{基礎情報 国\n|人口値 = 300\n|面積値 = 不明\n}}'},
+    ]
+
+    def assert_table(self, table):
+        self.assertEqual(['A', 'B', 'C', 'D'], table.titles)
+        self.assertEqual(['略名', '人口値', '面積値', 'GDP値'], table.column_names())
+        self.assertEqual(['A', 'B', None, None], table.values('略名'))
+        self.assertEqual(
+            [('B', 2e8), ('A', 1000.0), ('D', 300.0)],
+            table.order_by('人口値', descending=True))
+        self.assertEqual(['A', 'B'], table.where('人口値', lambda value: value >= 1000))
+        self.assertEqual(['A'], table.where('面積値', lambda value: True))
+        self.assertEqual('不明', table.values('面積値')[3])
+        self.assertEqual(1.2e12, table.numbers('GDP値')[1])
+        self.assertTrue(math.isnan(table.numbers('GDP値')[0]))
+        self.assertTrue(table.is_null('面積値', 3))
+        self.assertFalse(table.is_null('略名', 0))
+        self.assertEqual('d', table.numbers('面積値').typecode)
+
+    def test(self):
+        self.assert_table(InfoboxTable.from_documents(self.DOCUMENTS))
+
+    def test_save_and_load(self):
+        table = InfoboxTable.from_documents(self.DOCUMENTS)
+        self.assert_table(_saved_and_loaded(table, InfoboxTable.load))
+
+    def test_cache(self):
+        cache = BasicInformationCache()
+        InfoboxTable.from_documents(self.DOCUMENTS, cache)
+        self.assertEqual(len(self.DOCUMENTS), cache.misses)
+        self.assert_table(InfoboxTable.from_documents(self.DOCUMENTS, cache))
+        self.assertEqual(len(self.DOCUMENTS), cache.hits)
+
+
+# 接尾辞配列を保存するパス.
+SUFFIX_ARRAY_PATH = 'data/jawiki-country.suffix-array.bin'
+
+
+# 接尾辞配列のファイル形式を識別するバイト列.
+SUFFIX_ARRAY_MAGIC = b'NLP100SA01'
+
 
+# 接尾辞配列で記事の間に置く区切り文字.
+SUFFIX_ARRAY_SEPARATOR = '\0'
 
-def match_section_line(
-        line: str,
-    ) -> typing.Optional[re.Match]:
+
+def _suffix_array_codes(
+        text: str,
+    ) -> array.array:
     """
-        セクション行としてマッチさせる.
+        テキストを文字コードの配列に変換する.
+
+        UTF-32 に符号化したバイト列をそのまま配列に読み込むため, 文字ごとの
+        Python の整数を作らない.
 
         Arguments
         ---------
-        line : str
-            行データ.
+        text : str
+            テキスト.
 
         Returns
         -------
-        typing.Optional[re.Match]
-            line がセクション行の場合はマッチ結果.
-            マッチしなかった場合は None.
-    """
-    pattern = re.compile(r'(?P<mark>=+) (.*) (?P=mark)')
-    return pattern.fullmatch(line)
-
+        array.array
+            文字コードの配列 (typecode 'I').
 
-# '|key=value' にマッチするパターン.
-PROPERTIES_TEXT_PATTERN = \
-    re.compile(r'^ *\| *([^=]+?) *= *(.*) *', re.M)
+        Examples
+        --------
+        >>> list(_suffix_array_codes('a\\0b'))
+        [97, 0, 98]
+    """
+    codes = array.array('I')
+    codes.frombytes(text.encode('utf-32-le'))
+    if sys.byteorder != 'little':
+        codes.byteswap()
+    return codes
 
 
-class PropertiesTextPatternTestCase(unittest.TestCase):
-    """
-        PROPERTIES_TEXT_PATTERN のテストケース.
+def _build_suffix_array(
+        codes: array.array,
+    ) -> array.array:
     """
+        接尾辞配列を prefix doubling で作成する.
 
-    @parameterized.parameterized.expand([
-        ('data/jawiki-country.イラク.txt', 44),
-        ('data/jawiki-country.カンボジア.txt', 44),
-        ('data/jawiki-country.マレーシア.txt', 46),
-        ('data/jawiki-country.セントクリストファー・ネイビス.txt', 43),
-    ])
-    def test(self, file_path, property_count):
-        text = text_from_file(file_path)
-        matches = BASIC_INFORMATION_PATTERN.findall(text)
-        basic_information_text = matches[0][1]
-        pattern = re.compile(r'\A{{基礎情報 .+\n|}}\Z')
-
-        properties_text = pattern.sub('', basic_information_text)
-        properties = dict(PROPERTIES_TEXT_PATTERN.findall(properties_text))
-        self.assertEqual(property_count, len(properties))
+        各段階で (rank[i], rank[i+k]) の組を基数ソート (計数ソート 2 回) で
+        並べ替えるため, 全体の計算量は O(n log n). 作業領域は全て
+        array.array('I') であり, 長さ n の Python のリストは作らない.
 
+        文字コード 0 (SUFFIX_ARRAY_SEPARATOR) は区切り文字とし, 出現順に
+        異なる, どの文字よりも小さい順位を与える.
 
-# '{{基礎情報 <name> ...}}' にマッチするパターン.
-# NOTE: 再帰的マッチを行うため re ではなく regex を使用する.
-BASIC_INFORMATION_PATTERN = \
-    regex.compile(r'(?={{基礎情報 (.+)\n)(?P<_>{(?:[^{}]+|(?&_))*})')
+        Arguments
+        ---------
+        codes : array.array
+            文字コードの配列 (typecode 'I').
 
+        Returns
+        -------
+        array.array
+            接尾辞配列 (typecode 'I').
 
-class BasicInformationPatternTestCase(unittest.TestCase):
-    """
-        BASIC_INFORMATION_PATTERN のテストケース.
+        Examples
+        --------
+        >>> list(_build_suffix_array(_suffix_array_codes('banana')))
+        [5, 3, 1, 0, 4, 2]
+        >>> list(_build_suffix_array(_suffix_array_codes('ab\\0ab\\0')))
+        [2, 5, 0, 3, 1, 4]
     """
-
-    @parameterized.parameterized.expand([
-        'data/jawiki-country.イラク.txt',
-        'data/jawiki-country.カンボジア.txt',
-        'data/jawiki-country.マレーシア.txt',
-        'data/jawiki-country.セントクリストファー・ネイビス.txt',
-    ])
-    def test(self, file_path):
-        text = text_from_file(file_path)
-        matches = BASIC_INFORMATION_PATTERN.findall(text)
-        self.assertEqual(1, len(matches))
-        match = matches[0]
-        self.assertEqual(2, len(match))
-        self.assertEqual('国', match[0])
-        self.assertTrue(match[1].startswith('{{基礎情報'))
-        self.assertTrue(match[1].endswith('}}'))
-
-
-def basic_information_from_text(
+    n = len(codes)
+    if n == 0:
+        return array.array('I')
+
+    # 文字コードを 0 から始まる順位に詰める. 区切り文字は出現順の順位とする.
+    separators = codes.count(0)
+    alphabet = {
+        code: separators + rank
+        for rank, code in enumerate(sorted(set(codes) - {0}))
+    }
+    rank = array.array('I', [0]) * n
+    separator_rank = 0
+    for i, code in enumerate(codes):
+        if code:
+            rank[i] = alphabet[code]
+        else:
+            rank[i] = separator_rank
+            separator_rank += 1
+    classes = separators + len(alphabet)
+
+    # 1 文字目の順位で計数ソートする.
+    counts = [0] * (classes + 1)
+    for r in rank:
+        counts[r + 1] += 1
+    for r in range(classes):
+        counts[r + 1] += counts[r]
+    sa = array.array('I', [0]) * n
+    for i, r in enumerate(rank):
+        sa[counts[r]] = i
+        counts[r] += 1
+
+    k = 1
+    while classes < n:
+        # 2 番目のキー (rank[i+k], 範囲外は最小) の順に並べる.
+        second = array.array('I', range(n - k, n))
+        second.extend(i - k for i in sa if i >= k)
+
+        # 1 番目のキー (rank[i]) で安定な計数ソートを行う.
+        counts = [0] * (classes + 1)
+        for r in rank:
+            counts[r + 1] += 1
+        for r in range(classes):
+            counts[r + 1] += counts[r]
+        for i in second:
+            r = rank[i]
+            sa[counts[r]] = i
+            counts[r] += 1
+
+        # 新しい順位を振る.
+        new_rank = array.array('I', [0]) * n
+        classes = 1
+        previous = sa[0]
+        for i in sa[1:]:
+            if rank[i] != rank[previous] or (
+                    (rank[i + k] if i + k < n else -1) !=
+                    (rank[previous + k] if previous + k < n else -1)):
+                classes += 1
+            new_rank[i] = classes - 1
+            previous = i
+        rank = new_rank
+        k *= 2
+    return sa
+
+
+def _build_lcp_array(
         text: str,
-    ) -> typing.Dict[str, typing.Dict[str, str]]:
+        sa: array.array,
+    ) -> array.array:
     """
-        テキストから基礎情報を抽出する.
+        LCP 配列を Kasai らの方法で O(n) で作成する.
 
         Arguments
         ---------
         text : str
             テキスト.
+        sa : array.array
+            text の接尾辞配列.
 
         Returns
         -------
-        basic_information : typing.Dict[str, typing.Dict[str, str]]
-            キーに基礎情報の名称, 値に基礎情報のプロパティ情報.
-            プロパティ情報はキーがプロパティ名, 値がプロパティ値である辞書.
+        array.array
+            lcp[i] が sa[i-1] と sa[i] の接尾辞の最長共通接頭辞の長さである配列
+            (typecode 'I', lcp[0] は 0).
+
+        Examples
+        --------
+        >>> text = 'banana'
+        >>> list(_build_lcp_array(text, _build_suffix_array(_suffix_array_codes(text))))
+        [0, 1, 3, 0, 0, 2]
     """
-    def properties_from_basic_information_text(basic_information_text):
-        pattern = re.compile(r'\A{{基礎情報 .+\n|}}\Z')
-        properties_text = pattern.sub('', basic_information_text)
-        return dict(PROPERTIES_TEXT_PATTERN.findall(properties_text))
+    n = len(text)
+    rank = array.array('I', [0]) * n
+    for i, suffix in enumerate(sa):
+        rank[suffix] = i
+    lcp = array.array('I', [0]) * n
+    h = 0
+    for i in range(n):
+        if rank[i] == 0:
+            h = 0
+            continue
+        j = sa[rank[i] - 1]
+        while i + h < n and j + h < n and text[i + h] == text[j + h] \
+                and text[i + h] != SUFFIX_ARRAY_SEPARATOR:
+            h += 1
+        lcp[rank[i]] = h
+        if h > 0:
+            h -= 1
+    return lcp
 
-    return {
-        name: properties_from_basic_information_text(basic_information_text)
-        for name, basic_information_text
-        in BASIC_INFORMATION_PATTERN.findall(text)
-    }
+
+class SuffixArrayIndex:
+    """
+        コーパス全体の接尾辞配列と LCP 配列.
+
+        記事本文を区切り文字 (SUFFIX_ARRAY_SEPARATOR) を挟んで連結したテキスト
+        の接尾辞配列を持つ. 区切り文字には記事ごとに異なる順位を与えるため,
+        記事をまたいだ共通接頭辞は生じない.
+    """
+
+    def __init__(
+            self,
+            titles: typing.List[str],
+            text: str,
+            starts: array.array,
+            sa: array.array,
+            lcp: array.array,
+        ) -> None:
+        """
+            Arguments
+            ---------
+            titles : typing.List[str]
+                記事 ID をインデックスとする記事タイトルのリスト.
+            text : str
+                連結したテキスト.
+            starts : array.array
+                各記事の連結したテキストにおける開始位置.
+            sa : array.array
+                接尾辞配列.
+            lcp : array.array
+                LCP 配列.
+        """
+        self.titles = titles
+        self.text = text
+        self._starts = starts
+        self._sa = sa
+        self._lcp = lcp
+
+    @classmethod
+    def from_documents(
+            cls,
+            documents: typing.Iterable[dict],
+        ) -> 'SuffixArrayIndex':
+        """
+            ドキュメントから接尾辞配列を作成する.
+
+            Arguments
+            ---------
+            documents : typing.Iterable[dict]
+                ドキュメント.
+
+            Returns
+            -------
+            SuffixArrayIndex
+                接尾辞配列.
+        """
+        titles, texts = [], []
+        for document in documents:
+            text = text_from_document(document)
+            if SUFFIX_ARRAY_SEPARATOR in text:
+                raise ValueError('text contains the separator: {}'.format(
+                    document['title']))
+            titles.append(document['title'])
+            texts.append(text)
+
+        starts = array.array('I')
+        position = 0
+        for text in texts:
+            starts.append(position)
+            position += len(text) + 1
+
+        text = ''.join(text + SUFFIX_ARRAY_SEPARATOR for text in texts)
+        # 区切り文字は _build_suffix_array() が記事ごとに異なる順位にする.
+        sa = _build_suffix_array(_suffix_array_codes(text))
+        lcp = _build_lcp_array(text, sa)
+        return cls(titles, text, starts, sa, lcp)
+
+    @classmethod
+    def load(
+            cls,
+            file_path: str,
+        ) -> 'SuffixArrayIndex':
+        """
+            save() で保存した接尾辞配列を読み込む.
+
+            Arguments
+            ---------
+            file_path : str
+                ファイルのパス.
+
+            Returns
+            -------
+            SuffixArrayIndex
+                接尾辞配列.
+        """
+        with open(file_path, 'rb') as file:
+            data = file.read()
+        if not data.startswith(SUFFIX_ARRAY_MAGIC):
+            raise ValueError('not a suffix array: {}'.format(file_path))
+
+        offset = len(SUFFIX_ARRAY_MAGIC)
+
+        def read_chunk():
+            nonlocal offset
+            length, offset = _read_varint(data, offset)
+            offset += length
+            return data[offset-length:offset]
+
+        def read_array():
+            values = array.array('I', read_chunk())
+            if sys.byteorder != 'little':
+                values.byteswap()
+            return values
+
+        titles = json.loads(read_chunk())
+        text = read_chunk().decode()
+        starts, sa, lcp = read_array(), read_array(), read_array()
+        return cls(titles, text, starts, sa, lcp)
+
+    def save(
+            self,
+            file_path: str,
+        ) -> None:
+        """
+            接尾辞配列をファイルに保存する.
+
+            記事タイトル (JSON), 連結したテキスト (UTF-8), 開始位置, 接尾辞配列,
+            LCP 配列 (リトルエンディアンの 32 ビット整数) を長さ付きで並べる.
+
+            Arguments
+            ---------
+            file_path : str
+                ファイルのパス.
+        """
+        temporary_path = file_path + '.tmp'
+        with open(temporary_path, 'wb') as file:
+            def write_chunk(chunk):
+                header = bytearray()
+                _encode_varint(len(chunk), header)
+                file.write(header)
+                file.write(chunk)
+
+            def write_array(values):
+                if sys.byteorder != 'little':
+                    values = array.array(values.typecode, values)
+                    values.byteswap()
+                write_chunk(values.tobytes())
+
+            file.write(SUFFIX_ARRAY_MAGIC)
+            write_chunk(json.dumps(self.titles, ensure_ascii=False).encode())
+            write_chunk(self.text.encode())
+            write_array(self._starts)
+            write_array(self._sa)
+            write_array(self._lcp)
+        os.replace(temporary_path, file_path)
+
+    def _locate(
+            self,
+            position: int,
+        ) -> typing.Tuple[str, int]:
+        """
+            連結したテキストにおける位置を (記事タイトル, 記事内の位置) に変換する.
+        """
+        doc_id = bisect.bisect_right(self._starts, position) - 1
+        return self.titles[doc_id], position - self._starts[doc_id]
+
+    def _range(
+            self,
+            pattern: str,
+        ) -> typing.Tuple[int, int]:
+        """
+            pattern で始まる接尾辞の接尾辞配列における範囲 [low, high) を
+            二分探索で求める (O(m log n)).
+        """
+        text, sa, m = self.text, self._sa, len(pattern)
+
+        low, high = 0, len(sa)
+        while low < high:
+            middle = (low + high) // 2
+            if text[sa[middle]:sa[middle] + m] < pattern:
+                low = middle + 1
+            else:
+                high = middle
+        start = low
+
+        high = len(sa)
+        while low < high:
+            middle = (low + high) // 2
+            if text[sa[middle]:sa[middle] + m] == pattern:
+                low = middle + 1
+            else:
+                high = middle
+        return start, low
+
+    def count(
+            self,
+            pattern: str,
+        ) -> int:
+        """
+            部分文字列の出現回数を返す.
+
+            Arguments
+            ---------
+            pattern : str
+                部分文字列.
+
+            Returns
+            -------
+            int
+                出現回数.
+        """
+        if not pattern or SUFFIX_ARRAY_SEPARATOR in pattern:
+            return 0
+        start, end = self._range(pattern)
+        return end - start
+
+    def find(
+            self,
+            pattern: str,
+        ) -> typing.List[typing.Tuple[str, int]]:
+        """
+            部分文字列の全ての出現位置を返す.
+
+            Arguments
+            ---------
+            pattern : str
+                部分文字列.
+
+            Returns
+            -------
+            typing.List[typing.Tuple[str, int]]
+                (記事タイトル, 記事内の位置) のリスト (連結したテキストの位置順).
+        """
+        if not pattern or SUFFIX_ARRAY_SEPARATOR in pattern:
+            return []
+        start, end = self._range(pattern)
+        return list(map(self._locate, sorted(self._sa[start:end])))
+
+    def longest_repeats(
+            self,
+            count: int=10,
+        ) -> typing.List[typing.Tuple[str, typing.List[typing.Tuple[str, int]]]]:
+        """
+            2 回以上現れる部分文字列を長い順に返す.
+
+            LCP 配列の大きい値から順に, 既に返した部分文字列の一部でない
+            ものを選ぶ.
+
+            Arguments
+            ---------
+            count : int
+                返す部分文字列の数の上限.
+
+            Returns
+            -------
+            typing.List[typing.Tuple[str, typing.List[typing.Tuple[str, int]]]]
+                (部分文字列, 出現位置のリスト) のリスト.
+        """
+        repeats = []
+        order = sorted(
+            range(1, len(self._lcp)), key=self._lcp.__getitem__, reverse=True)
+        for i in order:
+            if len(repeats) >= count:
+                break
+            length = self._lcp[i]
+            if length == 0:
+                break
+            start = self._sa[i]
+            repeat = self.text[start:start + length]
+            if any(repeat in reported for reported, _ in repeats):
+                continue
+            repeats.append((repeat, self.find(repeat)))
+        return repeats
+
+
+class SuffixArrayIndexTestCase(unittest.TestCase):
+    """
+        SuffixArrayIndex のテストケース.
+    """
+
+    DOCUMENTS = [
+        {'title': 'A', 'text': 'banana{{基礎情報 国}}'},
+        {'title': 'B', 'text': 'ananas{{基礎情報 国}}'},
+        {'title': 'C', 'text': ''},
+        {'title': 'D', 'text': 'na'},
+    ]
+
+    def test_suffix_array(self):
+        random_ = random.Random(0)
+        for _ in range(100):
+            text = ''.join(
+                random_.choice('abc') for _ in range(random_.randint(0, 40)))
+            self.assertEqual(
+                sorted(range(len(text)), key=lambda i: text[i:]),
+                list(_build_suffix_array(_suffix_array_codes(text))))
+
+    def test_suffix_array_separators(self):
+        random_ = random.Random(0)
+        for _ in range(100):
+            text = ''.join(
+                random_.choice('ab\0') for _ in range(random_.randint(0, 40)))
+            # 区切り文字を出現順に異なり, 'a' より小さい文字に置き換えて比べる.
+            separators = iter(map(chr, range(1, len(text) + 1)))
+            key = ''.join(
+                next(separators) if c == '\0' else chr(ord(c) + len(text))
+                for c in text)
+            self.assertEqual(
+                sorted(range(len(text)), key=lambda i: key[i:]),
+                list(_build_suffix_array(_suffix_array_codes(text))))
+
+    def test_find(self):
+        index = SuffixArrayIndex.from_documents(self.DOCUMENTS)
+        self.assertEqual(
+            [('A', 2), ('A', 4), ('B', 1), ('B', 3), ('D', 0)],
+            index.find('na'))
+        self.assertEqual(2, index.count('{{基礎情報 国}}'))
+        self.assertEqual([], index.find('nab'))
+        self.assertEqual(0, index.count(''))
+        # 記事の境界をまたいだ部分文字列は見つからない.
+        self.assertEqual([], index.find('}}an'))
+
+    def test_longest_repeats(self):
+        index = SuffixArrayIndex.from_documents(self.DOCUMENTS)
+        repeat, positions = index.longest_repeats(1)[0]
+        self.assertEqual('{{基礎情報 国}}', repeat)
+        self.assertEqual([('A', 6), ('B', 6)], positions)
+        repeats = [repeat for repeat, _ in index.longest_repeats()]
+        self.assertIn('anana', repeats)
+
+    def test_save_and_load(self):
+        index = SuffixArrayIndex.from_documents(self.DOCUMENTS)
+        loaded = _saved_and_loaded(index, SuffixArrayIndex.load)
+        self.assertEqual(index.titles, loaded.titles)
+        self.assertEqual(index.text, loaded.text)
+        self.assertEqual(list(index._sa), list(loaded._sa))
+        self.assertEqual(list(index._lcp), list(loaded._lcp))
+        self.assertEqual(index.find('na'), loaded.find('na'))
 
 
 def print_basic_information(
-        basic_information: typing.Dict[str, typing.Dict[str, str]],
+        basic_information: typing.Dict[str, typing.Mapping[str, str]],
         indent: str='    ',
     ) -> None:
     """
@@ -234,7 +4223,7 @@ def print_basic_information(
 
         Arguments
         ---------
-        basic_information : typing.Dict[str, typing.Dict[str, str]
+        basic_information : typing.Dict[str, typing.Mapping[str, str]]
             基礎情報を含む辞書.
         indent: str
             インデントに使用する文字列.
@@ -251,6 +4240,13 @@ def print_basic_information(
             print('{}{} = {}'.format(indent * 2, key, value))
 
 
+# 強調マークアップにマッチするパターン.
+# タグとテンプレートの内側は強調として扱わないよう protected としてマッチさせる.
+MARKDOWN_ENPHASIS_PATTERN = re.compile(
+    r'(?P<protected><[^>]+>|{[^}]+})'
+    r'|(?P<enphasis>(?P<mark>"{1,3})(?P<enphasis_text>[^"]+)(?P=mark))')
+
+
 def markdown_enphasis(
         text: str,
     ) -> str:
@@ -276,8 +4272,8 @@ def markdown_enphasis(
         >>> markdown_enphasis('aaa \"\"\"bbb\"\"\" ccc')
         'aaa bbb ccc'
     """
-    pattern = re.compile(r'(<[^>]+>|{[^}]+})|(?P<mark>"{1,3})([^"]+)(?P=mark)')
-    return pattern.sub('\\1\\3', text)
+    return MARKDOWN_ENPHASIS_PATTERN.sub(
+        r'\g<protected>\g<enphasis_text>', text)
 
 
 class MarkdownEnphasisTestCase(unittest.TestCase):
@@ -337,6 +4333,12 @@ class MarkdownEnphasisTestCase(unittest.TestCase):
         self.assertEqual(expected, markdown_enphasis(text))
 
 
+# 内部リンク '[[記事名]]', '[[記事名|表示文字]]' にマッチするパターン.
+MARKDOWN_INTERNAL_LINK_PATTERN = re.compile(
+    r'(?P<link>\[\[(?!ファイル:|File:|Category:|]])'
+    r'(?:(?P<link_target>[^|\]]+)\|(?P<link_text>[^\]]+?)|(?P<link_name>[^\]]+?))]])')
+
+
 def markdown_internal_links(
         text: str,
     ) -> str:
@@ -360,8 +4362,8 @@ def markdown_internal_links(
         >>> markdown_internal_links('[[記事名|表示テキスト]]')
         '表示テキスト'
     """
-    pattern = re.compile(r'\[\[(?!ファイル:|File:|Category:|]])(?:[^|\]]+\|([^\]]+?)|([^\]]+?))]]')
-    return pattern.sub('\\1\\2', text)
+    return MARKDOWN_INTERNAL_LINK_PATTERN.sub(
+        r'\g<link_text>\g<link_name>', text)
 
 
 class MarkdownInternalLinksTestCase(unittest.TestCase):
@@ -421,6 +4423,436 @@ class MarkdownInternalLinksTestCase(unittest.TestCase):
         self.assertEqual(expected, markdown_internal_links(text))
 
 
+# 内部リンクのグラフを保存するパス.
+LINK_GRAPH_PATH = 'data/jawiki-country.links.bin'
+
+
+# 内部リンクのグラフのファイル形式を識別するバイト列.
+LINK_GRAPH_MAGIC = b'NLP100LG01'
+
+
+class LinkGraph:
+    """
+        記事間の内部リンクのグラフ.
+
+        記事には読み込んだ順に 0 からの ID を振り, 出リンクと入リンクを
+        それぞれ CSR 形式 (オフセットの配列と隣接する記事 ID の配列) で持つ.
+        記事 v の出リンク先は targets[offsets[v]:offsets[v+1]] になる.
+    """
+
+    def __init__(
+            self,
+            titles: typing.List[str],
+            out_offsets: array.array,
+            out_targets: array.array,
+        ) -> None:
+        """
+            Arguments
+            ---------
+            titles : typing.List[str]
+                記事 ID をインデックスとする記事タイトルのリスト.
+            out_offsets : array.array
+                出リンクのオフセットの配列 (要素数は記事数 + 1).
+            out_targets : array.array
+                出リンク先の記事 ID の配列.
+        """
+        self.titles = titles
+        self._ids = {title: doc_id for doc_id, title in enumerate(titles)}
+        self._out_offsets = out_offsets
+        self._out_targets = out_targets
+        self._in_offsets, self._in_sources = \
+            _transpose_adjacency(len(titles), out_offsets, out_targets)
+
+    @classmethod
+    def from_documents(
+            cls,
+            documents: typing.Iterable[dict],
+        ) -> 'LinkGraph':
+        """
+            ドキュメントを 1 回だけ走査し, 内部リンクのグラフを作成する.
+
+            リンク先の名前は走査中に番号を振って配列に記録し, 走査後に
+            記事 ID へ解決する. 記事でないリンク先, 自己リンクは除き,
+            同じ記事への複数のリンクは 1 本とする.
+
+            Arguments
+            ---------
+            documents : typing.Iterable[dict]
+                ドキュメント.
+
+            Returns
+            -------
+            LinkGraph
+                内部リンクのグラフ.
+        """
+        titles = []
+        # リンク先の名前 -> 名前の番号.
+        names = {}
+        out_offsets = array.array('L', [0])
+        out_names = array.array('L')
+
+        for document in documents:
+            titles.append(document['title'])
+            targets = dict.fromkeys(
+                link_target_from_match(match)
+                for match in MARKDOWN_INTERNAL_LINK_PATTERN.finditer(
+                    text_from_document(document)))
+            for target in targets:
+                out_names.append(names.setdefault(target, len(names)))
+            out_offsets.append(len(out_names))
+
+        # 名前の番号を記事 ID に解決する (記事でなければ -1).
+        ids = {title: doc_id for doc_id, title in enumerate(titles)}
+        doc_ids = [-1] * len(names)
+        for name, name_id in names.items():
+            doc_ids[name_id] = ids.get(name, -1)
+
+        resolved_offsets = array.array('L', [0])
+        resolved_targets = array.array('L')
+        for source in range(len(titles)):
+            for i in range(out_offsets[source], out_offsets[source + 1]):
+                target = doc_ids[out_names[i]]
+                if target >= 0 and target != source:
+                    resolved_targets.append(target)
+            resolved_offsets.append(len(resolved_targets))
+
+        return cls(titles, resolved_offsets, resolved_targets)
+
+    @classmethod
+    def load(
+            cls,
+            file_path: str,
+        ) -> 'LinkGraph':
+        """
+            save() で保存したグラフを読み込む.
+
+            入リンクは出リンクから作り直す.
+
+            Arguments
+            ---------
+            file_path : str
+                ファイルのパス.
+
+            Returns
+            -------
+            LinkGraph
+                内部リンクのグラフ.
+        """
+        with open(file_path, 'rb') as file:
+            data = file.read()
+        if not data.startswith(LINK_GRAPH_MAGIC):
+            raise ValueError('not a link graph: {}'.format(file_path))
+
+        offset = len(LINK_GRAPH_MAGIC)
+
+        def read_chunk():
+            nonlocal offset
+            length, offset = _read_varint(data, offset)
+            offset += length
+            return data[offset-length:offset]
+
+        def read_array():
+            values = array.array('I', read_chunk())
+            if sys.byteorder != 'little':
+                values.byteswap()
+            return array.array('L', values)
+
+        titles = json.loads(read_chunk())
+        out_offsets, out_targets = read_array(), read_array()
+        return cls(titles, out_offsets, out_targets)
+
+    def save(
+            self,
+            file_path: str,
+        ) -> None:
+        """
+            グラフをファイルに保存する.
+
+            記事タイトル (JSON), 出リンクのオフセットの配列と出リンク先の配列
+            (リトルエンディアンの 32 ビット整数) を長さ付きで並べる.
+
+            Arguments
+            ---------
+            file_path : str
+                ファイルのパス.
+        """
+        temporary_path = file_path + '.tmp'
+        with open(temporary_path, 'wb') as file:
+            def write_chunk(chunk):
+                header = bytearray()
+                _encode_varint(len(chunk), header)
+                file.write(header)
+                file.write(chunk)
+
+            def write_array(values):
+                values = array.array('I', values)
+                if sys.byteorder != 'little':
+                    values.byteswap()
+                write_chunk(values.tobytes())
+
+            file.write(LINK_GRAPH_MAGIC)
+            write_chunk(json.dumps(self.titles, ensure_ascii=False).encode())
+            write_array(self._out_offsets)
+            write_array(self._out_targets)
+        os.replace(temporary_path, file_path)
+
+    def __len__(self) -> int:
+        return len(self.titles)
+
+    def id_of(
+            self,
+            title: str,
+        ) -> int:
+        """
+            記事タイトルから記事 ID を求める.
+
+            Arguments
+            ---------
+            title : str
+                記事タイトル.
+
+            Returns
+            -------
+            int
+                記事 ID.
+        """
+        return self._ids[title]
+
+    def successors(
+            self,
+            doc_id: int,
+        ) -> array.array:
+        """
+            記事からリンクしている記事の ID を返す.
+
+            Arguments
+            ---------
+            doc_id : int
+                記事 ID.
+
+            Returns
+            -------
+            array.array
+                リンク先の記事 ID の配列.
+        """
+        offsets = self._out_offsets
+        return self._out_targets[offsets[doc_id]:offsets[doc_id + 1]]
+
+    def predecessors(
+            self,
+            doc_id: int,
+        ) -> array.array:
+        """
+            記事にリンクしている記事の ID を返す.
+
+            Arguments
+            ---------
+            doc_id : int
+                記事 ID.
+
+            Returns
+            -------
+            array.array
+                リンク元の記事 ID の配列 (昇順).
+        """
+        offsets = self._in_offsets
+        return self._in_sources[offsets[doc_id]:offsets[doc_id + 1]]
+
+    def out_degree(
+            self,
+            doc_id: int,
+        ) -> int:
+        """
+            記事の出次数を返す.
+        """
+        return self._out_offsets[doc_id + 1] - self._out_offsets[doc_id]
+
+    def in_degree(
+            self,
+            doc_id: int,
+        ) -> int:
+        """
+            記事の入次数を返す.
+        """
+        return self._in_offsets[doc_id + 1] - self._in_offsets[doc_id]
+
+    def pagerank(
+            self,
+            damping: float=0.85,
+            iterations: int=100,
+            tolerance: float=1e-10,
+        ) -> array.array:
+        """
+            PageRank を求める.
+
+            出リンクのない記事のスコアは全ての記事に均等に分配する.
+
+            Arguments
+            ---------
+            damping : float
+                リンクをたどる確率.
+            iterations : int
+                反復回数の上限.
+            tolerance : float
+                反復を打ち切るスコアの変化量 (L1 ノルム) の閾値.
+
+            Returns
+            -------
+            array.array
+                記事 ID をインデックスとするスコアの配列 (typecode 'd', 合計は 1).
+        """
+        size = len(self)
+        if size == 0:
+            return array.array('d')
+        offsets, targets = self._out_offsets, self._out_targets
+        ranks = array.array('d', [1 / size]) * size
+
+        for _ in range(iterations):
+            dangling = 0.0
+            next_ranks = array.array('d', [0.0]) * size
+            for source in range(size):
+                start, end = offsets[source], offsets[source + 1]
+                if start == end:
+                    dangling += ranks[source]
+                    continue
+                share = ranks[source] / (end - start)
+                for i in range(start, end):
+                    next_ranks[targets[i]] += share
+            base = (1 - damping + damping * dangling) / size
+            for doc_id in range(size):
+                next_ranks[doc_id] = base + damping * next_ranks[doc_id]
+            delta = sum(abs(a - b) for a, b in zip(ranks, next_ranks))
+            ranks = next_ranks
+            if delta < tolerance:
+                break
+        return ranks
+
+
+def link_target_from_match(
+        match: re.Match,
+    ) -> str:
+    """
+        MARKDOWN_INTERNAL_LINK_PATTERN のマッチ結果からリンク先の記事名を取り出す.
+
+        節へのリンク ('記事名#節') は記事名だけにし, '_' は空白に置き換える.
+
+        Arguments
+        ---------
+        match : re.Match
+            MARKDOWN_INTERNAL_LINK_PATTERN のマッチ結果.
+
+        Returns
+        -------
+        str
+            リンク先の記事名.
+
+        Examples
+        --------
+        >>> match = MARKDOWN_INTERNAL_LINK_PATTERN.search('[[日本_国#歴史|日本]]')
+        >>> link_target_from_match(match)
+        '日本 国'
+    """
+    target = match['link_target'] or match['link_name']
+    return target.partition('#')[0].replace('_', ' ').strip()
+
+
+def _transpose_adjacency(
+        size: int,
+        offsets: array.array,
+        targets: array.array,
+    ) -> typing.Tuple[array.array, array.array]:
+    """
+        CSR 形式の隣接リストの向きを逆にする.
+
+        Arguments
+        ---------
+        size : int
+            頂点数.
+        offsets : array.array
+            オフセットの配列.
+        targets : array.array
+            隣接する頂点の配列.
+
+        Returns
+        -------
+        typing.Tuple[array.array, array.array]
+            逆向きの (オフセットの配列, 隣接する頂点の配列).
+            各頂点の隣接する頂点は昇順に並ぶ.
+    """
+    counts = array.array('L', [0]) * (size + 1)
+    for target in targets:
+        counts[target + 1] += 1
+    for i in range(size):
+        counts[i + 1] += counts[i]
+    transposed_offsets = array.array('L', counts)
+
+    positions = counts
+    sources = array.array('L', [0]) * len(targets)
+    for source in range(size):
+        for i in range(offsets[source], offsets[source + 1]):
+            target = targets[i]
+            sources[positions[target]] = source
+            positions[target] += 1
+    return transposed_offsets, sources
+
+
+class LinkGraphTestCase(unittest.TestCase):
+    """
+        LinkGraph のテストケース.
+    """
+
+    DOCUMENTS = [
+        {'title': 'A', 'text': '[[B]]と[[C|シー]]と[[B#歴史|B]]. [[A]] [[Z]]'},
+        {'title': 'B', 'text': '[[ファイル:x.png|[[C]]の図]] [[Category:国]]'},
+        {'title': 'C', 'text': '[[A]]'},
+        {'title': 'D', 'text': ''},
+    ]
+
+    def test_adjacency(self):
+        graph = LinkGraph.from_documents(iter(self.DOCUMENTS))
+        self.assertEqual([1, 2], list(graph.successors(graph.id_of('A'))))
+        self.assertEqual([2], list(graph.successors(graph.id_of('B'))))
+        self.assertEqual([], list(graph.successors(graph.id_of('D'))))
+        self.assertEqual([0, 1], list(graph.predecessors(graph.id_of('C'))))
+        self.assertEqual([1, 1, 2, 0], [graph.in_degree(i) for i in range(len(graph))])
+        self.assertEqual([2, 1, 1, 0], [graph.out_degree(i) for i in range(len(graph))])
+
+    def test_pagerank(self):
+        graph = LinkGraph.from_documents(self.DOCUMENTS)
+        ranks = graph.pagerank()
+        self.assertAlmostEqual(1.0, sum(ranks))
+
+        # 遷移行列を使った素朴な計算と比べる.
+        size, damping = len(graph), 0.85
+        expected = [1 / size] * size
+        for _ in range(200):
+            next_ranks = [(1 - damping) / size] * size
+            for source in range(size):
+                targets = list(graph.successors(source)) or range(size)
+                for target in targets:
+                    next_ranks[target] += damping * expected[source] / len(targets)
+            expected = next_ranks
+        for rank, expected_rank in zip(ranks, expected):
+            self.assertAlmostEqual(expected_rank, rank)
+
+    def test_save_and_load(self):
+        graph = LinkGraph.from_documents(self.DOCUMENTS)
+        loaded = _saved_and_loaded(graph, LinkGraph.load)
+        self.assertEqual(graph.titles, loaded.titles)
+        for doc_id in range(len(graph)):
+            self.assertEqual(
+                list(graph.successors(doc_id)), list(loaded.successors(doc_id)))
+            self.assertEqual(
+                list(graph.predecessors(doc_id)),
+                list(loaded.predecessors(doc_id)))
+        self.assertEqual(list(graph.pagerank()), list(loaded.pagerank()))
+
+
+# ファイル '[[File:<name>]]' にマッチするパターン.
+MARKDOWN_FILE_PATTERN = re.compile(
+    r'(?P<file>\[\[(?:File|ファイル):(?P<file_name>[^|\]+)(?:[^\]]*?)]])')
+
+
 def markdown_file(
         text: str,
     ) -> str:
@@ -444,8 +4876,7 @@ def markdown_file(
         >>> markdown_file('[[ファイル:a.png]]')
         'a.png'
     """
-    pattern = re.compile(r'\[\[(?:File|ファイル):([^|\]+)(?:[^\]]*?)]]')
-    return pattern.sub('\\1', text)
+    return MARKDOWN_FILE_PATTERN.sub(r'\g<file_name>', text)
 
 
 class MarkdownFileTestCase(unittest.TestCase):
@@ -455,6 +4886,11 @@ class MarkdownFileTestCase(unittest.TestCase):
     # TODO テストを書く.
 
 
+# カテゴリ '[[Category:<name>|<sort key>]]' にマッチするパターン.
+MARKDOWN_CATEGORY_PATTERN = re.compile(
+    r'(?P<category>\[\[Category:[^|\]]+\|(?P<category_text>[^\]]+?)]])')
+
+
 def markdown_category(
         text: str,
     ) -> str:
@@ -476,8 +4912,7 @@ def markdown_category(
         >>> markdown_category('[[Category:ヘルプ|はやみひよう]]')
         'はやみひよう'
     """
-    pattern = re.compile(r'\[\[Category:[^|\]]+\|([^\]]+?)]]')
-    return pattern.sub('\\1', text)
+    return MARKDOWN_CATEGORY_PATTERN.sub(r'\g<category_text>', text)
 
 
 class MarkdownCategoryTestCase(unittest.TestCase):
@@ -487,11 +4922,38 @@ class MarkdownCategoryTestCase(unittest.TestCase):
     # TODO テストを書く.
 
 
-def markdown(
+# markdown() の各段のうち '[[...]]' を扱うものを 1 つにまとめたパターン.
+# NOTE: 先頭文字の先読みが無いと, 選択の各候補を全位置で試すため遅くなる.
+MARKDOWN_BRACKET_PATTERN = re.compile(r'(?=\[\[)(?:{})'.format('|'.join([
+    MARKDOWN_INTERNAL_LINK_PATTERN.pattern,
+    MARKDOWN_FILE_PATTERN.pattern,
+    MARKDOWN_CATEGORY_PATTERN.pattern,
+])))
+
+
+# markdown() の全段を 1 つにまとめたパターン.
+MARKDOWN_PATTERN = re.compile(r'(?=[\[<{{"])(?:{})'.format('|'.join([
+    MARKDOWN_ENPHASIS_PATTERN.pattern,
+    MARKDOWN_BRACKET_PATTERN.pattern,
+])))
+
+
+# '[[...]]' の内側に他のマークアップが含まれることを検出するパターン.
+MARKDOWN_NESTED_PATTERN = re.compile(r'[\["<{]')
+
+
+class _MarkdownFallback(Exception):
+    """
+        1 回の走査では markdown_*() を順に適用した結果と一致しない可能性がある
+        (マークアップが入れ子になっている) ことを表す.
+    """
+
+
+def _markdown_by_chain(
         text: str,
     ) -> str:
     """
-        MediaWiki のマークアップを通常テキストに置換する.
+        markdown_*() を順に適用して MediaWiki のマークアップを通常テキストに置換する.
 
         Arguments
         ---------
@@ -516,43 +4978,793 @@ def markdown(
     return functools.reduce(reducer, markdown_functions, text)
 
 
+def _is_in_cascading_bracket(
+        text: str,
+        position: int,
+    ) -> bool:
+    """
+        position が, 内側の置換後に初めてマッチするような '[[...' の内側にあるか判定する.
+
+        例えば '[[File:[[a]]]]' は内部リンクの置換後に '[[File:a]]' となり,
+        続くファイルの置換でさらに 'a' となる.
+    """
+    close = text.rfind(']', 0, position)
+    open = text.rfind('[[', close + 1, position)
+    if open < 0:
+        return False
+    prefix = text[open + 2:position]
+    if prefix.startswith('Category:'):
+        return True
+    return prefix.startswith(('File:', 'ファイル:')) and '|' not in prefix
+
+
+def _markdown_bracket(
+        text: str,
+        match: re.Match,
+    ) -> str:
+    """
+        MARKDOWN_BRACKET_PATTERN のマッチ結果を置換後の文字列に変換する.
+    """
+    start, end = match.span()
+    if MARKDOWN_NESTED_PATTERN.search(text, start + 2, end - 2):
+        raise _MarkdownFallback()
+    kind = match.lastgroup
+    if kind != 'category' and _is_in_cascading_bracket(text, start):
+        raise _MarkdownFallback()
+    if kind == 'link':
+        return match['link_text'] or match['link_name']
+    if kind == 'file':
+        return match['file_name']
+    return match['category_text']
+
+
+def _markdown_brackets_in_range(
+        text: str,
+        start: int,
+        end: int,
+        pieces: typing.List[str],
+    ) -> None:
+    """
+        text[start:end] の '[[...]]' を置換し, 結果を pieces に追加する.
+    """
+    if text.rfind('[[', start, end) > text.rfind(']]', start, end):
+        # '[[' が範囲の外側の ']]' と対応している可能性がある.
+        raise _MarkdownFallback()
+    position = start
+    for match in MARKDOWN_BRACKET_PATTERN.finditer(text, start, end):
+        pieces.append(text[position:match.start()])
+        pieces.append(_markdown_bracket(text, match))
+        position = match.end()
+    pieces.append(text[position:end])
+
+
+def markdown(
+        text: str,
+    ) -> str:
+    """
+        MediaWiki のマークアップを通常テキストに置換する.
+
+        markdown_enphasis(), markdown_internal_links(), markdown_file(),
+        markdown_category() を順に適用した結果と同じ文字列を, テキストを 1 回
+        走査するだけで求める. マークアップが入れ子になっていて 1 回の走査では
+        結果が一致しない可能性がある場合に限り, 各関数を順に適用する.
+
+        Arguments
+        ---------
+        text : str
+            テキスト.
+
+        Returns
+        -------
+        str
+            マークアップを通常テキストに置換した文字列.
+
+        Examples
+        --------
+        >>> markdown('"[[記事名|表示]]" [[File:a.png]] [[Category:b|c]]')
+        '表示 a.png c'
+    """
+    pieces = []
+    position = 0
+    # 直前に除去した強調の終了位置と, その強調の最後の文字.
+    enphasis_end, enphasis_last = -1, ''
+
+    try:
+        for match in MARKDOWN_PATTERN.finditer(text):
+            start, end = match.span()
+            pieces.append(text[position:start])
+            kind = match.lastgroup
+            if kind == 'protected':
+                if text.find('[', start, end) < 0:
+                    pieces.append(match[0])
+                else:
+                    _markdown_brackets_in_range(text, start, end, pieces)
+            elif kind == 'enphasis':
+                # 強調を除去した結果, 前後の文字と '[[' や ']]' を成す場合.
+                text_start, text_end = match.span('enphasis_text')
+                first, last = text[text_start], text[text_end - 1]
+                previous = enphasis_last if start == enphasis_end else text[start - 1:start]
+                if first in '[]' and previous == first \
+                        or last in '[]' and text[end:end + 1] == last:
+                    raise _MarkdownFallback()
+                _markdown_brackets_in_range(text, text_start, text_end, pieces)
+                enphasis_end, enphasis_last = end, last
+            else:
+                pieces.append(_markdown_bracket(text, match))
+            position = end
+    except _MarkdownFallback:
+        return _markdown_by_chain(text)
+
+    pieces.append(text[position:])
+    return ''.join(pieces)
+
+
 class MarkdownTestCase(unittest.TestCase):
     """
         markdown() のテストケース.
     """
-    # TODO テストを書く.
+
+    def test(self):
+        # 空文字列を渡した場合.
+        self.assertEqual('', markdown(''))
+
+        # マークアップを含まない場合.
+        self.assertEqual('abc', markdown('abc'))
+
+        # 各マークアップを含む場合.
+        text = '1: "one", [[記事名]], [[記事名|表示文字]], ' \
+               '[[ファイル:a.png]], [[File:b.png|thumb|説明文]], ' \
+               '[[Category:ヘルプ|はやみひよう]], {{lang|en|"x"}}, <ref name="y"/>'
+        expected = '1: one, 記事名, 表示文字, ' \
+                   'a.png, [[File:b.png|thumb|説明文]], ' \
+                   'はやみひよう, {{lang|en|"x"}}, <ref name="y"/>'
+        self.assertEqual(expected, markdown(text))
+
+    def test_nested_markups(self):
+        texts = [
+            '{{仮リンク|[[記事名|表示]]|en|x}}',
+            '"[[記事名]]"',
+            '[[ファイル:a.png|thumb|[[記事名]]の説明]]',
+            '[[File:[[a]]]]',
+            '[[Category:x [[a]]|y]]',
+            '[[Category:x [[File:a]]|y]]',
+            '[[a "b]] c"',
+            '["[a"]]',
+            '{[[a}]]',
+            '[[[[File:x]]]]',
+        ]
+        for text in texts:
+            self.assertEqual(_markdown_by_chain(text), markdown(text), text)
+
+    def test_random_markups(self):
+        tokens = [
+            '[[', ']]', '[', ']', '|', '"', '""', '{', '}', '<', '>',
+            'File:', 'ファイル:', 'Category:', 'a', 'b', ' ',
+        ]
+        random_ = random.Random(0)
+        for _ in range(2000):
+            text = ''.join(random_.choices(tokens, k=random_.randint(0, 12)))
+            self.assertEqual(_markdown_by_chain(text), markdown(text), text)
+
+
+# MediaWiki API の URL.
+MEDIAWIKI_API_URL = 'https://www.mediawiki.org/w/api.php'
+
+
+# MediaWiki API の 1 回の問い合わせで指定できるタイトルの最大数.
+MEDIAWIKI_API_MAX_TITLES = 50
+
+
+def _imageinfo_urls_from_response(
+        response: dict,
+        titles: typing.List[str],
+    ) -> typing.Dict[str, typing.Optional[str]]:
+    """
+        MediaWiki API (imageinfo) のレスポンスから各タイトルの URL を取り出す.
+
+        Arguments
+        ---------
+        response : dict
+            レスポンスの JSON.
+        titles : typing.List[str]
+            問い合わせたタイトルのリスト.
+
+        Returns
+        -------
+        urls : typing.Dict[str, typing.Optional[str]]
+            キーがタイトル, 値が URL である辞書.
+            URL が得られなかったタイトルの値は None.
+    """
+    query = response.get('query', {})
+    # タイトルは 'File:a_b.png' -> 'File:A b.png' のように正規化される.
+    normalized = {
+        normalization['from']: normalization['to']
+        for normalization in query.get('normalized', [])
+    }
+    urls = {
+        page['title']: page['imageinfo'][0]['url']
+        for page in query.get('pages', {}).values()
+        if page.get('imageinfo')
+    }
+    return {
+        title: urls.get(normalized.get(title, title))
+        for title in titles
+    }
+
+
+# 画像の URL のキャッシュファイルのパス.
+IMAGE_URL_CACHE_PATH = 'data/image-urls.json'
+
+
+class ImageUrlResolver:
+    """
+        ファイル名を MediaWiki API (imageinfo) で画像の URL に変換する.
+
+         * 最大 MEDIAWIKI_API_MAX_TITLES 件のファイル名をまとめて問い合わせる.
+         * 1 つの requests.Session を使い回し, 接続を再利用する.
+         * 結果 (URL が存在しないことを含む) をファイルにキャッシュし,
+           キャッシュ済みのファイル名は問い合わせない.
+    """
+
+    def __init__(
+            self,
+            cache_path: typing.Optional[str]=None,
+            api_url: str=MEDIAWIKI_API_URL,
+            session: typing.Optional[requests.Session]=None,
+            timeout: float=10.0,
+            batch_size: int=MEDIAWIKI_API_MAX_TITLES,
+        ) -> None:
+        """
+            Arguments
+            ---------
+            cache_path : typing.Optional[str]
+                キャッシュファイルのパス. None の場合はファイルに保存しない.
+            api_url : str
+                MediaWiki API の URL.
+            session : typing.Optional[requests.Session]
+                使用するセッション. None の場合は新たに作成する.
+            timeout : float
+                1 回の問い合わせのタイムアウト秒数.
+            batch_size : int
+                1 回の問い合わせで指定するファイル名の最大数.
+        """
+        self._cache_path = cache_path
+        self._api_url = api_url
+        self._session = session or requests.Session()
+        self._timeout = timeout
+        self._batch_size = min(batch_size, MEDIAWIKI_API_MAX_TITLES)
+        self._cache = {} if cache_path is None else _load_json(cache_path, {})
+
+    def resolve(
+            self,
+            file_names: typing.Iterable[str],
+        ) -> typing.Dict[str, typing.Optional[str]]:
+        """
+            ファイル名を画像の URL に変換する.
+
+            Arguments
+            ---------
+            file_names : typing.Iterable[str]
+                ファイル名 ('File:' は含まない).
+
+            Returns
+            -------
+            urls : typing.Dict[str, typing.Optional[str]]
+                キーがファイル名, 値が URL である辞書.
+                URL が得られなかったファイル名の値は None.
+        """
+        file_names = list(dict.fromkeys(file_names))
+        missing_file_names = [
+            file_name
+            for file_name in file_names
+            if file_name not in self._cache
+        ]
+
+        for i in range(0, len(missing_file_names), self._batch_size):
+            batch = missing_file_names[i:i + self._batch_size]
+            titles = ['File:{}'.format(file_name) for file_name in batch]
+            response = self._session.get(self._api_url, params={
+                'action': 'query',
+                'format': 'json',
+                'prop': 'imageinfo',
+                'iiprop': 'url',
+                'titles': '|'.join(titles),
+            }, timeout=self._timeout)
+            response.raise_for_status()
+            urls = _imageinfo_urls_from_response(response.json(), titles)
+            for file_name, title in zip(batch, titles):
+                self._cache[file_name] = urls[title]
+
+        if missing_file_names and self._cache_path is not None:
+            _save_json(self._cache_path, self._cache)
+        return {file_name: self._cache[file_name] for file_name in file_names}
+
+
+class _StubMediaWikiApiHandler(http.server.BaseHTTPRequestHandler):
+    """
+        テスト用の MediaWiki API (imageinfo) のスタブ.
+
+        'Missing' で始まるファイル名は存在しないものとして扱う.
+    """
+
+    # 受け付けたリクエストのタイトルのリスト.
+    requests = []
+
+    def do_GET(self):
+        query = urllib.parse.parse_qs(urllib.parse.urlsplit(self.path).query)
+        titles = query['titles'][0].split('|')
+        type(self).requests.append(titles)
+
+        normalized, pages = [], {}
+        for i, title in enumerate(titles):
+            normalized_title = title.replace('_', ' ')
+            if normalized_title != title:
+                normalized.append({'from': title, 'to': normalized_title})
+            page = {'title': normalized_title}
+            if not normalized_title.startswith('File:Missing'):
+                page['imageinfo'] = [{
+                    'url': 'http://example.com/{}'.format(normalized_title[5:]),
+                }]
+            pages[str(-1 - i)] = page
+
+        body = json.dumps({
+            'query': {'normalized': normalized, 'pages': pages},
+        }).encode()
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+class ImageUrlResolverTestCase(unittest.TestCase):
+    """
+        ImageUrlResolver のテストケース.
+    """
+
+    def setUp(self):
+        _StubMediaWikiApiHandler.requests = []
+        self.server = http.server.ThreadingHTTPServer(
+            ('127.0.0.1', 0), _StubMediaWikiApiHandler)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.api_url = 'http://127.0.0.1:{}/w/api.php'.format(
+            self.server.server_address[1])
+        self.directory = tempfile.TemporaryDirectory()
+        self.cache_path = os.path.join(self.directory.name, 'cache.json')
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+        self.directory.cleanup()
+
+    def test(self):
+        file_names = ['a.png', 'b_c.png', 'Missing.png', 'a.png', 'd.png']
+        expected = {
+            'a.png': 'http://example.com/a.png',
+            'b_c.png': 'http://example.com/b c.png',
+            'Missing.png': None,
+            'd.png': 'http://example.com/d.png',
+        }
+
+        resolver = ImageUrlResolver(
+            self.cache_path, api_url=self.api_url, batch_size=2)
+        self.assertEqual(expected, resolver.resolve(file_names))
+        self.assertEqual([
+            ['File:a.png', 'File:b_c.png'],
+            ['File:Missing.png', 'File:d.png'],
+        ], _StubMediaWikiApiHandler.requests)
+
+        # キャッシュ済みのファイル名 (存在しないものを含む) は問い合わせない.
+        resolver = ImageUrlResolver(self.cache_path, api_url=self.api_url)
+        self.assertEqual(expected, resolver.resolve(file_names))
+        self.assertEqual(2, len(_StubMediaWikiApiHandler.requests))
+
+        resolver.resolve(['e.png'])
+        self.assertEqual(
+            [['File:e.png']],
+            _StubMediaWikiApiHandler.requests[2:])
+
+
+class TokenBucket:
+    """
+        トークンバケットによるレート制限.
+
+        毎秒 rate 個のトークンが最大 capacity 個まで補充され,
+        acquire() はトークンを 1 個消費するまで待つ.
+    """
+
+    def __init__(
+            self,
+            rate: float,
+            capacity: int=1,
+        ) -> None:
+        """
+            Arguments
+            ---------
+            rate : float
+                1 秒あたりに補充するトークンの数.
+            capacity : int
+                保持できるトークンの最大数 (連続して許可するリクエストの数).
+        """
+        self._rate = rate
+        self._capacity = capacity
+        self._tokens = capacity
+        self._updated_at = None
+        self._lock = asyncio.Lock()
+
+    async def acquire(self) -> None:
+        """
+            トークンを 1 個消費する. トークンが無い場合は補充されるまで待つ.
+        """
+        async with self._lock:
+            loop = asyncio.get_running_loop()
+            while True:
+                now = loop.time()
+                if self._updated_at is not None:
+                    elapsed = now - self._updated_at
+                    self._tokens = min(
+                        self._capacity, self._tokens + elapsed * self._rate)
+                self._updated_at = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                await asyncio.sleep((1 - self._tokens) / self._rate)
+
+
+class TokenBucketTestCase(unittest.TestCase):
+    """
+        TokenBucket のテストケース.
+    """
+
+    def test(self):
+        async def acquire_all(bucket, n):
+            loop = asyncio.get_running_loop()
+            started_at = loop.time()
+            for _ in range(n):
+                await bucket.acquire()
+            return loop.time() - started_at
+
+        # capacity 個までは待たずに消費でき, 以降は 1 / rate 秒ごとに消費できる.
+        self.assertLess(asyncio.run(acquire_all(TokenBucket(20, 3), 3)), 0.04)
+        self.assertGreaterEqual(
+            asyncio.run(acquire_all(TokenBucket(20, 3), 6)), 0.14)
+
+
+class AsyncImageUrlResolver:
+    """
+        ファイル名を MediaWiki API (imageinfo) で画像の URL に変換する (asyncio 版).
+
+        ImageUrlResolver と同様に問い合わせをまとめ, 結果をキャッシュする.
+        加えて以下を行う.
+
+         * 最大 concurrency 件の問い合わせを並行して行う.
+           問い合わせは ImageUrlResolver と同じく requests.Session で行い,
+           接続の再利用やリダイレクトは requests に任せる. requests は
+           ブロッキング I/O なので, 問い合わせは concurrency 本のスレッドで
+           実行する. イベントループはブロックしないが, 並行数の上限は
+           イベントループではなくスレッド数で決まる.
+         * rate を指定した場合, トークンバケットで問い合わせの頻度を制限する.
+         * タイムアウト, 接続エラー, 429 や 5xx のレスポンス, 空のレスポンスや
+           不完全な本文の場合は, 待ち時間を倍にしながら最大 retries 回まで再試行する.
+    """
+
+    def __init__(
+            self,
+            cache_path: typing.Optional[str]=None,
+            api_url: str=MEDIAWIKI_API_URL,
+            session: typing.Optional[requests.Session]=None,
+            concurrency: int=8,
+            rate: typing.Optional[float]=None,
+            timeout: float=10.0,
+            retries: int=3,
+            backoff: float=0.5,
+            batch_size: int=MEDIAWIKI_API_MAX_TITLES,
+        ) -> None:
+        """
+            Arguments
+            ---------
+            cache_path : typing.Optional[str]
+                キャッシュファイルのパス. None の場合はファイルに保存しない.
+                ImageUrlResolver と同じ形式.
+            api_url : str
+                MediaWiki API の URL.
+            session : typing.Optional[requests.Session]
+                使用するセッション. None の場合は concurrency 本の接続を
+                プールするセッションを新たに作成する.
+            concurrency : int
+                並行して行う問い合わせの最大数.
+            rate : typing.Optional[float]
+                1 秒あたりの問い合わせの最大数. None の場合は制限しない.
+            timeout : float
+                1 回の問い合わせのタイムアウト秒数.
+            retries : int
+                1 回の問い合わせを再試行する最大回数.
+            backoff : float
+                最初の再試行までの待ち時間 (秒). 再試行のたびに倍にする.
+            batch_size : int
+                1 回の問い合わせで指定するファイル名の最大数.
+        """
+        self._cache_path = cache_path
+        self._api_url = api_url
+        if session is None:
+            session = requests.Session()
+            adapter = requests.adapters.HTTPAdapter(pool_maxsize=concurrency)
+            session.mount('http://', adapter)
+            session.mount('https://', adapter)
+        self._session = session
+        self._concurrency = concurrency
+        self._rate = rate
+        self._timeout = timeout
+        self._retries = retries
+        self._backoff = backoff
+        self._batch_size = min(batch_size, MEDIAWIKI_API_MAX_TITLES)
+        self._cache = {} if cache_path is None else _load_json(cache_path, {})
+
+    async def resolve(
+            self,
+            file_names: typing.Iterable[str],
+        ) -> typing.Dict[str, typing.Optional[str]]:
+        """
+            ファイル名を画像の URL に変換する.
+
+            Arguments
+            ---------
+            file_names : typing.Iterable[str]
+                ファイル名 ('File:' は含まない).
+
+            Returns
+            -------
+            urls : typing.Dict[str, typing.Optional[str]]
+                キーがファイル名, 値が URL である辞書.
+                URL が得られなかったファイル名の値は None.
+        """
+        file_names = list(dict.fromkeys(file_names))
+        missing_file_names = [
+            file_name
+            for file_name in file_names
+            if file_name not in self._cache
+        ]
+        batches = [
+            missing_file_names[i:i + self._batch_size]
+            for i in range(0, len(missing_file_names), self._batch_size)
+        ]
+        semaphore = asyncio.Semaphore(self._concurrency)
+        bucket = None if self._rate is None else TokenBucket(self._rate)
+        executor = concurrent.futures.ThreadPoolExecutor(self._concurrency)
+
+        async def resolve_batch(batch):
+            titles = ['File:{}'.format(file_name) for file_name in batch]
+            async with semaphore:
+                response = await self._query(titles, bucket, executor)
+            urls = _imageinfo_urls_from_response(response, titles)
+            for file_name, title in zip(batch, titles):
+                self._cache[file_name] = urls[title]
+
+        try:
+            await asyncio.gather(*map(resolve_batch, batches))
+        finally:
+            executor.shutdown(wait=False)
+            # 失敗した場合も, 取得済みの結果は保存する.
+            if missing_file_names and self._cache_path is not None:
+                _save_json(self._cache_path, self._cache)
+        return {file_name: self._cache[file_name] for file_name in file_names}
+
+    def _get(
+            self,
+            params: typing.Dict[str, str],
+        ) -> dict:
+        """
+            imageinfo を問い合わせ, レスポンスの JSON を返す (スレッドで実行する).
+        """
+        response = self._session.get(
+            self._api_url, params=params, timeout=self._timeout)
+        response.raise_for_status()
+        return response.json()
+
+    async def _query(
+            self,
+            titles: typing.List[str],
+            bucket: typing.Optional[TokenBucket],
+            executor: concurrent.futures.Executor,
+        ) -> dict:
+        """
+            imageinfo を問い合わせ, レスポンスの JSON を返す.
+        """
+        params = {
+            'action': 'query',
+            'format': 'json',
+            'prop': 'imageinfo',
+            'iiprop': 'url',
+            'titles': '|'.join(titles),
+        }
+        loop = asyncio.get_running_loop()
+        for retry in range(self._retries + 1):
+            if bucket is not None:
+                await bucket.acquire()
+            try:
+                return await loop.run_in_executor(executor, self._get, params)
+            except requests.HTTPError as error:
+                status = error.response.status_code
+                if status != 429 and status < 500 or retry == self._retries:
+                    raise
+            except (
+                    requests.ConnectionError,
+                    requests.Timeout,
+                    requests.exceptions.ChunkedEncodingError,
+                    ValueError):
+                # 空のレスポンスは ConnectionError, 不完全な本文は
+                # ChunkedEncodingError や JSON の解析の失敗 (ValueError) になる.
+                if retry == self._retries:
+                    raise
+            await asyncio.sleep(self._backoff * 2 ** retry)
+
+
+class _AsyncStubMediaWikiApiServer:
+    """
+        テスト用の MediaWiki API (imageinfo) のスタブ (asyncio 版).
+
+        'Missing' で始まるファイル名は存在しないものとして扱う.
+    """
+
+    def __init__(
+            self,
+            delay: float=0.0,
+            failures: int=0,
+            failure: bytes=b'HTTP/1.0 503 Service Unavailable\r\n\r\n',
+        ) -> None:
+        """
+            Arguments
+            ---------
+            delay : float
+                レスポンスを返すまでの秒数.
+            failures : int
+                最初の failures 件のリクエストに failure を返す.
+            failure : bytes
+                失敗させるリクエストに返すレスポンス.
+        """
+        self.delay = delay
+        self.failures = failures
+        self.failure = failure
+        self.requests = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    async def handle(self, reader, writer):
+        request_line = (await reader.readline()).decode('ascii')
+        while (await reader.readline()) not in (b'\r\n', b''):
+            pass
+        query = urllib.parse.urlsplit(request_line.split()[1]).query
+        titles = urllib.parse.parse_qs(query)['titles'][0].split('|')
+        self.requests.append(titles)
+
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        await asyncio.sleep(self.delay)
+        self.in_flight -= 1
+
+        if len(self.requests) <= self.failures:
+            writer.write(self.failure)
+        else:
+            pages = {
+                str(-1 - i): {'title': title} if title.startswith('File:Missing') else {
+                    'title': title,
+                    'imageinfo': [{'url': 'http://example.com/' + title[5:]}],
+                }
+                for i, title in enumerate(titles)
+            }
+            body = json.dumps({'query': {'pages': pages}}).encode()
+            writer.write(b'HTTP/1.0 200 OK\r\n\r\n' + body)
+        await writer.drain()
+        writer.close()
+
+
+class AsyncImageUrlResolverTestCase(unittest.TestCase):
+    """
+        AsyncImageUrlResolver のテストケース.
+    """
+
+    def resolve(self, stub, file_names, **kwargs):
+        async def run():
+            server = await asyncio.start_server(stub.handle, '127.0.0.1', 0)
+            async with server:
+                api_url = 'http://127.0.0.1:{}/w/api.php'.format(
+                    server.sockets[0].getsockname()[1])
+                resolver = AsyncImageUrlResolver(api_url=api_url, **kwargs)
+                return await resolver.resolve(file_names)
+        return asyncio.run(run())
+
+    def test(self):
+        stub = _AsyncStubMediaWikiApiServer(delay=0.05)
+        file_names = ['{}.png'.format(i) for i in range(12)] + ['Missing.png']
+        urls = self.resolve(stub, file_names, concurrency=3, batch_size=2)
+
+        self.assertEqual(13, len(urls))
+        self.assertEqual('http://example.com/0.png', urls['0.png'])
+        self.assertIsNone(urls['Missing.png'])
+        self.assertEqual(7, len(stub.requests))
+        self.assertLessEqual(stub.max_in_flight, 3)
+        self.assertGreater(stub.max_in_flight, 1)
+
+    def test_retry(self):
+        stub = _AsyncStubMediaWikiApiServer(failures=2)
+        urls = self.resolve(stub, ['a.png'], backoff=0.01)
+        self.assertEqual({'a.png': 'http://example.com/a.png'}, urls)
+        self.assertEqual(3, len(stub.requests))
+
+        stub = _AsyncStubMediaWikiApiServer(failures=2)
+        with self.assertRaises(requests.HTTPError):
+            self.resolve(stub, ['a.png'], retries=1, backoff=0.01)
+
+    def test_retry_broken_response(self):
+        # 何も返さずに接続を閉じる場合と, 本文が途中で切れている場合.
+        for failure in [b'', b'HTTP/1.0 200 OK\r\n\r\n{"query": {"pa']:
+            stub = _AsyncStubMediaWikiApiServer(failures=2, failure=failure)
+            urls = self.resolve(stub, ['a.png'], backoff=0.01)
+            self.assertEqual({'a.png': 'http://example.com/a.png'}, urls)
+            self.assertEqual(3, len(stub.requests))
+
+    def test_timeout(self):
+        stub = _AsyncStubMediaWikiApiServer(delay=1.0)
+        with self.assertRaises(requests.Timeout):
+            self.resolve(stub, ['a.png'], timeout=0.05, retries=0)
+
+
+def country_flag_image_file_name_from_basic_information(
+        basic_information: typing.Dict[str, typing.Mapping[str, str]],
+    ) -> typing.Optional[str]:
+    """
+        基礎情報から国旗画像のファイル名を取得する.
+
+        Arguments
+        ---------
+        basic_information : typing.Dict[str, typing.Mapping[str, str]]
+            基礎情報.
+
+        Returns
+        -------
+        file_name : typing.Optional[str]
+            国旗画像のファイル名.
+            基礎情報に国旗画像の項目が含まれない場合は None.
+    """
+    try:
+        return basic_information['国']['国旗画像'] or None
+    except KeyError:
+        return None
 
 
 def country_flag_image_file_url_from_basic_information(
-        basic_information: typing.Dict[str, typing.Dict[str, str]],
+        basic_information: typing.Dict[str, typing.Mapping[str, str]],
+        resolver: typing.Optional[ImageUrlResolver]=None,
     ) -> typing.Optional[str]:
     """
         基礎情報から国旗画像の URL を取得する.
 
         Arguments
         ---------
-        basic_information : typing.Dict[str, typing.Dict[str, str]]
+        basic_information : typing.Dict[str, typing.Mapping[str, str]]
             基礎情報.
+        resolver : typing.Optional[ImageUrlResolver]
+            ファイル名を URL に変換するオブジェクト.
+            None の場合はキャッシュを持たないものを使用する.
 
         Returns
         -------
         country_flag_image_url : typing.Optional[str]
             国旗画像の URL.
+            以下のいずれかの場合は None.
+
+             * 基礎情報に国旗画像の項目が含まれない場合.
+             * レスポンスに画像の URL が含まれない場合.
     """
-    try:
-        file_name = basic_information['国']['国旗画像']
-        return requests.get('https://www.mediawiki.org/w/api.php', {
-            'action': 'query',
-            'format': 'json',
-            'prop': 'imageinfo',
-            'iiprop': 'url',
-            'titles': 'File:{}'.format(file_name),
-        }).json()['query']['pages']['-1']['imageinfo'][0]['url']
-    except (KeyError, IndexError) as exception:
-        # 以下のいずれかの場合にここを通る:
-        #  * 基礎情報に国旗画像の項目が含まれない場合.
-        #  * レスポンスに画像の URL が含まれない場合.
+    file_name = \
+        country_flag_image_file_name_from_basic_information(basic_information)
+    if file_name is None:
         return None
+    resolver = resolver or ImageUrlResolver()
+    return resolver.resolve([file_name])[file_name]
 
 
 def practice20():
@@ -562,10 +5774,9 @@ def practice20():
         Wikipedia 記事の JSON ファイルを読み込み, 「イギリス」に関する記事本文
         を表示せよ. 問題 21-29 では, ここで抽出した記事本文に対して実行せよ.
     """
-    documents = _load_documents()
-    is_england = lambda document: 'イギリス' in document['title']
+    documents = _load_documents(lambda title: 'イギリス' in title)
 
-    for document in filter(is_england, documents):
+    for document in documents:
         print(document['text'])
 
 
@@ -575,10 +5786,8 @@ def practice21():
 
         記事中でカテゴリ名を宣言している行を抽出せよ.
     """
-    documents = _load_documents()
-    lines = lines_from_documents(documents)
-    category_lines = filter(match_category_line, lines)
-    print('\n'.join(sorted(set(category_lines))))
+    category_lines = _scan_corpus().category_lines
+    print('\n'.join(sorted(category_lines)))
 
 
 def practice22():
@@ -587,11 +5796,9 @@ def practice22():
 
         記事のカテゴリ名を (行単位ではなく名前で) 抽出せよ.
     """
-    documents = _load_documents()
-    lines = lines_from_documents(documents)
-    category_line_matches = filter(None, map(match_category_line, lines))
-    category_names = map(lambda matched: matched[1], category_line_matches)
-    print('\n'.join(sorted(set(category_names))))
+    category_names = \
+        _corpus_artifact(INVERTED_INDEX_PATH).names(SCAN_EVENT_CATEGORY)
+    print('\n'.join(sorted(category_names)))
 
 
 def practice23():
@@ -601,12 +5808,9 @@ def practice23():
         記事中に含まれるセクション名とそのレベル (例えば "== セクション名 =="
         なら 1) を表示せよ.
     """
-    documents = _load_documents()
-    lines = lines_from_documents(documents)
-    section_line_matches = filter(None, map(match_section_line, lines))
     section_level_name_pairs = {
-        (len(match[1]), match[2])
-        for match in section_line_matches
+        (section.level, section.name)
+        for section in _corpus_artifact(SECTION_INDEX_PATH).sections()
     }
     sorted_section_level_name_pairs = sorted(
         map(list, section_level_name_pairs), reverse=True)
@@ -620,12 +5824,10 @@ def practice24():
 
         記事から参照されているメディアファイルをすべて抜き出せ.
     """
-    documents = _load_documents()
-    text = ''.join(texts_from_documents(documents))
-    pattern = re.compile(r'\[\[ファイル:(.+?)(:?\|.+)\]\]')
-
-    for name, _ in pattern.findall(text):
-        print(name)
+    documents = iterate_documents(DOCUMENTS_PATH)
+    references = iterate_media_references(documents, processes=os.cpu_count())
+    for reference in unique_media_references(references):
+        print(reference.file_name)
 
 
 def practice25():
@@ -635,14 +5837,17 @@ def practice25():
         記事中に含まれる「基礎情報」テンプレートのフィールド名と値を抽出し,
         辞書オブジェクトとして格納せよ.
     """
-    documents = _load_documents()
+    documents = iterate_documents(DOCUMENTS_PATH)
+    cache = BasicInformationCache(BASIC_INFORMATION_CACHE_PATH)
 
     for document in documents:
         title, text = document['title'], document['text']
         print('==== {}'.format(title))
-        basic_information = basic_information_from_text(text)
+        basic_information = cache.basic_information_from_text(text)
         print_basic_information(basic_information)
 
+    cache.save()
+
 
 def practice26():
     """
@@ -655,15 +5860,18 @@ def practice26():
          * マークアップ早見表
            https://ja.wikipedia.org/wiki/Help:%E6%97%A9%E8%A6%8B%E8%A1%A8
     """
-    documents = _load_documents()
+    documents = iterate_documents(DOCUMENTS_PATH)
+    cache = BasicInformationCache(BASIC_INFORMATION_CACHE_PATH)
+    clean = MemoizedCleanup(markdown_enphasis)
 
     for document in documents:
         title, text = document['title'], document['text']
         print('==== {}'.format(title))
-        text = markdown_enphasis(text)
-        basic_information = basic_information_from_text(text)
+        basic_information = cache.basic_information_from_text(text, clean)
         print_basic_information(basic_information)
 
+    cache.save()
+
 
 def practice27():
     """
@@ -675,16 +5883,19 @@ def practice27():
          * マークアップ早見表
            https://ja.wikipedia.org/wiki/Help:%E6%97%A9%E8%A6%8B%E8%A1%A8
     """
-    documents = _load_documents()
+    documents = iterate_documents(DOCUMENTS_PATH)
+    cache = BasicInformationCache(BASIC_INFORMATION_CACHE_PATH)
+    clean = MemoizedCleanup(
+        lambda value: markdown_internal_links(markdown_enphasis(value)))
 
     for document in documents:
         title, text = document['title'], document['text']
         print('==== {}'.format(title))
-        text = markdown_enphasis(text)
-        text = markdown_internal_links(text)
-        basic_information = basic_information_from_text(text)
+        basic_information = cache.basic_information_from_text(text, clean)
         print_basic_information(basic_information)
 
+    cache.save()
+
 
 def practice28():
     """
@@ -693,15 +5904,18 @@ def practice28():
         27 の処理に加えて, テンプレートの値から MediaWiki マークアップを可能な
         限り除去し, 国の基本情報を整形せよ.
     """
-    documents = _load_documents()
+    documents = iterate_documents(DOCUMENTS_PATH)
+    cache = BasicInformationCache(BASIC_INFORMATION_CACHE_PATH)
+    clean = MemoizedCleanup(markdown)
 
     for document in documents:
         title, text = document['title'], document['text']
         print('==== {}'.format(title))
-        text = markdown(text)
-        basic_information = basic_information_from_text(text)
+        basic_information = cache.basic_information_from_text(text, clean)
         print_basic_information(basic_information)
 
+    cache.save()
+
 
 def practice29():
     """
@@ -716,22 +5930,22 @@ def practice29():
          * MediaWiki API (imageinfo)
            https://www.mediawiki.org/wiki/API:Imageinfo
     """
-    # MediaWiki API に大量リクエストを送らないように, 対象の国を制限する.
-    target_countries = [
-        '日本',         # 国旗画像を含む
-        'エジプト',     # 国旗画像を含む
-        'キュラソー島', # 国旗画像を含まない
-    ]
+    documents = iterate_documents(DOCUMENTS_PATH)
+    cache = BasicInformationCache(BASIC_INFORMATION_CACHE_PATH)
+    file_names = {
+        document['title']: country_flag_image_file_name_from_basic_information(
+            cache.basic_information_from_text(document['text']))
+        for document in documents
+    }
+    cache.save()
 
-    for document in _load_documents():
-        title, text = document['title'], document['text']
-        if title not in target_countries:
-            continue
+    # 全ての国の国旗画像をまとめて問い合わせ, 結果をキャッシュする.
+    resolver = ImageUrlResolver(IMAGE_URL_CACHE_PATH)
+    urls = resolver.resolve(filter(None, file_names.values()))
+
+    for title, file_name in file_names.items():
         print('==== {}'.format(title))
-        basic_information = basic_information_from_text(text)
-        country_flag_image_file_url = \
-            country_flag_image_file_url_from_basic_information(basic_information)
-        print(country_flag_image_file_url)
+        print(urls.get(file_name))
 
 
 def test():